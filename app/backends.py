@@ -0,0 +1,301 @@
+"""
+LLM backends — the transport behind llm.py's retry / limiter / RAG logic.
+
+Backends
+--------
+* GroqBackend  — the production path (Groq + AsyncGroq clients).
+* StubBackend  — a deterministic local stand-in with no network or API key:
+                 configurable latency distribution, streaming rate and
+                 injected 429 / error rates, for offline load tests and
+                 benchmarks of the retry and rate-limit behaviour.
+
+Every backend exposes the same three calls (blocking, async, async stream)
+and reports upstream throttling as BackendRateLimited, so llm.py never
+touches a provider SDK directly.
+
+Selection (environment)
+-----------------------
+LLM_BACKEND                 groq (default) | stub
+LLM_STUB_LATENCY_MS         median time-to-first-token        (default 400)
+LLM_STUB_LATENCY_SIGMA      log-normal spread of that latency (default 0.5)
+LLM_STUB_TOKENS_PER_SECOND  streaming/generation rate         (default 250)
+LLM_STUB_429_RATE           fraction of calls answered with 429 (default 0)
+LLM_STUB_ERROR_RATE         fraction of calls failing outright  (default 0)
+LLM_STUB_SEED               RNG seed for reproducible runs      (default 0)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+from groq import AsyncGroq, Groq, RateLimitError as GroqRateLimitError
+
+logger = logging.getLogger(__name__)
+
+
+class BackendRateLimited(Exception):
+    """The upstream refused the call with a rate-limit (HTTP 429) response."""
+
+
+class BackendError(Exception):
+    """Injected or transport-level failure that is not a rate limit."""
+
+
+@dataclass
+class Completion:
+    text: str
+    total_tokens: int | None = None     # prompt + completion, when reported
+
+
+class LLMBackend(ABC):
+    """Chat-completion transport used by llm.py."""
+
+    name: str = "abstract"
+
+    @property
+    def available(self) -> bool:
+        """False when the backend can't serve calls (e.g. missing API key)."""
+        return True
+
+    @abstractmethod
+    def complete(self, messages: list[dict], temperature: float, max_tokens: int) -> Completion:
+        ...
+
+    @abstractmethod
+    async def acomplete(self, messages: list[dict], temperature: float, max_tokens: int) -> Completion:
+        ...
+
+    @abstractmethod
+    async def astream(
+        self, messages: list[dict], temperature: float, max_tokens: int
+    ) -> AsyncIterator[str]:
+        """
+        Yield completion text fragments.  Throttling must surface as
+        BackendRateLimited before the first fragment, so callers can retry.
+        """
+        ...
+
+
+# ─────────────────────────────────────────────────────────────
+# Groq
+# ─────────────────────────────────────────────────────────────
+
+class GroqBackend(LLMBackend):
+    name = "groq"
+
+    def __init__(self, model: str, api_key: str):
+        self.model = model
+        self._client: Groq | None = None
+        self._async_client: AsyncGroq | None = None
+        if not api_key:
+            logger.warning("GROQ_API_KEY is not set. /ask will return a config error.")
+            return
+        self._client = Groq(api_key=api_key)
+        self._async_client = AsyncGroq(api_key=api_key)
+        logger.info("Groq client initialised (model=%s)", model)
+
+    @property
+    def available(self) -> bool:
+        return self._client is not None
+
+    def _require(self, client):
+        if client is None:
+            raise RuntimeError("Groq client is not initialised (missing GROQ_API_KEY).")
+        return client
+
+    def complete(self, messages, temperature, max_tokens) -> Completion:
+        try:
+            response = self._require(self._client).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        except GroqRateLimitError as exc:
+            raise BackendRateLimited(str(exc)) from exc
+        return _groq_completion(response)
+
+    async def acomplete(self, messages, temperature, max_tokens) -> Completion:
+        try:
+            response = await self._require(self._async_client).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        except GroqRateLimitError as exc:
+            raise BackendRateLimited(str(exc)) from exc
+        return _groq_completion(response)
+
+    async def astream(self, messages, temperature, max_tokens) -> AsyncIterator[str]:
+        try:
+            stream = await self._require(self._async_client).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+        except GroqRateLimitError as exc:
+            raise BackendRateLimited(str(exc)) from exc
+
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+
+def _groq_completion(response) -> Completion:
+    usage = getattr(response, "usage", None)
+    return Completion(
+        text=response.choices[0].message.content.strip(),
+        total_tokens=getattr(usage, "total_tokens", None),
+    )
+
+
+# ─────────────────────────────────────────────────────────────
+# Local stand-in
+# ─────────────────────────────────────────────────────────────
+
+_PASSAGE_RE = re.compile(r"\[Passage \d+ \| ([^\]]+)\]\n(.+?)(?:\n\n|\nQuestion:|$)", re.S)
+_WORD_RE = re.compile(r"\S+\s*")
+
+
+class StubBackend(LLMBackend):
+    """
+    Offline stand-in that behaves like a remote LLM.
+
+    Each call draws a log-normal time-to-first-token around *latency_ms*,
+    then "generates" at *tokens_per_second*.  With probability *rate_429*
+    the call is throttled, with probability *error_rate* it fails.  The
+    answer is extractive (first sentences of the top passage plus its page
+    label), so it is deterministic for a given prompt.
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        latency_ms: float = 400.0,
+        latency_sigma: float = 0.5,
+        tokens_per_second: float = 250.0,
+        rate_429: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        answer_words: int = 60,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.rate_429 = rate_429
+        self.error_rate = error_rate
+        self.answer_words = answer_words
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+        self.failed = 0
+
+    @classmethod
+    def from_env(cls) -> "StubBackend":
+        return cls(
+            latency_ms=float(os.getenv("LLM_STUB_LATENCY_MS", "400")),
+            latency_sigma=float(os.getenv("LLM_STUB_LATENCY_SIGMA", "0.5")),
+            tokens_per_second=float(os.getenv("LLM_STUB_TOKENS_PER_SECOND", "250")),
+            rate_429=float(os.getenv("LLM_STUB_429_RATE", "0")),
+            error_rate=float(os.getenv("LLM_STUB_ERROR_RATE", "0")),
+            seed=int(os.getenv("LLM_STUB_SEED", "0")),
+        )
+
+    def _draw(self) -> tuple[float, str | None]:
+        """Latency (s) for this call and the injected outcome, if any."""
+        with self._lock:
+            self.calls += 1
+            latency = self.latency_ms / 1000.0 * self._rng.lognormvariate(0.0, self.latency_sigma)
+            roll = self._rng.random()
+            if roll < self.rate_429:
+                self.throttled += 1
+                return latency, "429"
+            if roll < self.rate_429 + self.error_rate:
+                self.failed += 1
+                return latency, "error"
+            return latency, None
+
+    def _raise_for(self, outcome: str | None) -> None:
+        if outcome == "429":
+            raise BackendRateLimited("stub backend: injected 429 Too Many Requests")
+        if outcome == "error":
+            raise BackendError("stub backend: injected upstream error")
+
+    def _answer_words(self, messages: list[dict], max_tokens: int) -> list[str]:
+        prompt = messages[-1]["content"]
+        match = _PASSAGE_RE.search(prompt)
+        if match:
+            label, passage = match.group(1), match.group(2)
+            text = f"Sure, I can help with that! {passage.strip()} (see {label})"
+        else:
+            text = "I'm sorry, I don't have that information on hand."
+        words = _WORD_RE.findall(text)
+        return words[: min(self.answer_words, max_tokens)]
+
+    def _generation_seconds(self, n_tokens: int) -> float:
+        return n_tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _completion(self, messages, words) -> Completion:
+        prompt_chars = sum(len(m["content"]) for m in messages)
+        return Completion(text="".join(words).strip(), total_tokens=prompt_chars // 4 + len(words))
+
+    def complete(self, messages, temperature, max_tokens) -> Completion:
+        latency, outcome = self._draw()
+        time.sleep(latency)
+        self._raise_for(outcome)
+        words = self._answer_words(messages, max_tokens)
+        time.sleep(self._generation_seconds(len(words)))
+        return self._completion(messages, words)
+
+    async def acomplete(self, messages, temperature, max_tokens) -> Completion:
+        latency, outcome = self._draw()
+        await asyncio.sleep(latency)
+        self._raise_for(outcome)
+        words = self._answer_words(messages, max_tokens)
+        await asyncio.sleep(self._generation_seconds(len(words)))
+        return self._completion(messages, words)
+
+    async def astream(self, messages, temperature, max_tokens) -> AsyncIterator[str]:
+        latency, outcome = self._draw()
+        await asyncio.sleep(latency)
+        self._raise_for(outcome)
+        per_token = self._generation_seconds(1)
+        for word in self._answer_words(messages, max_tokens):
+            yield word
+            if per_token:
+                await asyncio.sleep(per_token)
+
+    def get_stats(self) -> dict:
+        return {"calls": self.calls, "throttled": self.throttled, "failed": self.failed}
+
+
+def backend_from_env(groq_model: str) -> LLMBackend:
+    """Build the backend selected by LLM_BACKEND (see module docstring)."""
+    kind = os.getenv("LLM_BACKEND", "groq").strip().lower()
+    if kind == "stub":
+        backend = StubBackend.from_env()
+        logger.info(
+            "Using stub LLM backend (latency~%.0fms, %.0f tok/s, 429=%.2f, err=%.2f)",
+            backend.latency_ms, backend.tokens_per_second, backend.rate_429, backend.error_rate,
+        )
+        return backend
+    if kind != "groq":
+        raise ValueError(f"Unknown LLM_BACKEND '{kind}' (expected 'groq' or 'stub').")
+    return GroqBackend(model=groq_model, api_key=os.getenv("GROQ_API_KEY", "").strip())
@@ -0,0 +1,192 @@
+"""
+Compute isolation — keeps ingestion from starving interactive queries.
+
+Pools
+-----
+query    QUERY_POOL_THREADS threads running search (query encoding + FAISS)
+         for /ask.  Sized for concurrency; each search is short.
+ingest   INGEST_POOL_THREADS threads (default 1) running PDF extraction,
+         chunking and chunk encoding for /upload.  Uploads beyond that
+         queue here instead of piling more work onto the cores.
+
+CPU thread budgets: EMBED_THREADS bounds the intra-op threads of the
+in-process model (shared by queries and in-process ingest encoding).
+INGEST_ENCODE_WORKERS + INGEST_CPU_THREADS move ingest encoding into its own
+processes with a fixed share of the cores (see app/embedders.py).
+
+Priority and throttling
+-----------------------
+Ingest encoding runs batch by batch and calls INGEST_THROTTLE.pause()
+before each batch:
+
+• While a query is running, the next ingest batch waits for it (up to
+  INGEST_YIELD_SECONDS), so queries get the cores first.
+• Query latencies from the last THROTTLE_WINDOW_SECONDS are tracked.  While
+  their p95 is above QUERY_LATENCY_TARGET_MS, the pause before each batch
+  doubles (up to INGEST_MAX_PAUSE_SECONDS).  Below the target it halves back
+  towards zero.  With no recent queries, ingest runs flat out.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import numpy as np
+
+from .metrics import INGEST_THROTTLED_SECONDS
+
+logger = logging.getLogger(__name__)
+
+QUERY_POOL_THREADS = int(os.getenv("QUERY_POOL_THREADS", str(max(4, os.cpu_count() or 1))))
+INGEST_POOL_THREADS = int(os.getenv("INGEST_POOL_THREADS", "1"))
+
+QUERY_LATENCY_TARGET_MS = float(os.getenv("QUERY_LATENCY_TARGET_MS", "250"))
+INGEST_YIELD_SECONDS = float(os.getenv("INGEST_YIELD_SECONDS", "0.5"))
+INGEST_MAX_PAUSE_SECONDS = float(os.getenv("INGEST_MAX_PAUSE_SECONDS", "2"))
+THROTTLE_WINDOW_SECONDS = 10.0
+_MIN_PAUSE_SECONDS = 0.01
+
+
+class IngestThrottle:
+    """Query-latency feedback brake for ingest batches (see module docstring)."""
+
+    def __init__(
+        self,
+        target_ms: float = QUERY_LATENCY_TARGET_MS,
+        yield_seconds: float = INGEST_YIELD_SECONDS,
+        max_pause_seconds: float = INGEST_MAX_PAUSE_SECONDS,
+        window_seconds: float = THROTTLE_WINDOW_SECONDS,
+    ):
+        self.target_ms = target_ms
+        self.yield_seconds = yield_seconds
+        self.max_pause_seconds = max_pause_seconds
+        self.window_seconds = window_seconds
+        self._cond = threading.Condition()
+        self._active_queries = 0
+        self._samples: deque[tuple[float, float]] = deque(maxlen=2048)   # (finished_at, ms)
+        self._pause = 0.0
+        self.pauses = 0
+        self.throttled_seconds = 0.0
+
+    # ── query side ──────────────────────────────────────────────────────────────
+
+    def query_started(self) -> None:
+        with self._cond:
+            self._active_queries += 1
+
+    def query_finished(self, seconds: float) -> None:
+        with self._cond:
+            self._active_queries -= 1
+            self._samples.append((time.monotonic(), seconds * 1000.0))
+            if not self._active_queries:
+                self._cond.notify_all()
+
+    # ── ingest side ─────────────────────────────────────────────────────────────
+
+    def pause(self) -> None:
+        """Called before each ingest batch; blocks as long as queries need the cores."""
+        start = time.monotonic()
+        with self._cond:
+            if self._active_queries:
+                self._cond.wait_for(lambda: not self._active_queries, timeout=self.yield_seconds)
+            p95 = self._recent_p95_locked()
+            if p95 is not None and p95 > self.target_ms:
+                self._pause = min(max(self._pause * 2, _MIN_PAUSE_SECONDS), self.max_pause_seconds)
+            else:
+                self._pause = self._pause / 2 if self._pause > _MIN_PAUSE_SECONDS else 0.0
+            delay = self._pause
+        if delay:
+            time.sleep(delay)
+        waited = time.monotonic() - start
+        if waited >= _MIN_PAUSE_SECONDS:
+            with self._cond:
+                self.pauses += 1
+                self.throttled_seconds += waited
+            INGEST_THROTTLED_SECONDS.inc(waited)
+
+    def _recent_p95_locked(self) -> float | None:
+        horizon = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < horizon:
+            self._samples.popleft()
+        if not self._samples:
+            return None
+        return float(np.percentile([ms for _, ms in self._samples], 95))
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            p95 = self._recent_p95_locked()
+            return {
+                "query_latency_target_ms": self.target_ms,
+                "query_p95_ms": round(p95, 1) if p95 is not None else None,
+                "active_queries": self._active_queries,
+                "current_pause_seconds": round(self._pause, 3),
+                "pauses": self.pauses,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+            }
+
+
+INGEST_THROTTLE = IngestThrottle()
+
+
+class ComputePools:
+    """The query and ingest executors, plus the throttle that links them."""
+
+    def __init__(
+        self,
+        query_threads: int = QUERY_POOL_THREADS,
+        ingest_threads: int = INGEST_POOL_THREADS,
+        throttle: IngestThrottle | None = None,
+    ):
+        self.throttle = throttle or INGEST_THROTTLE
+        self._query = ThreadPoolExecutor(max_workers=query_threads, thread_name_prefix="query")
+        self._ingest = ThreadPoolExecutor(max_workers=ingest_threads, thread_name_prefix="ingest")
+        self.query_threads = query_threads
+        self.ingest_threads = ingest_threads
+        self._ingest_queued = 0
+        self._lock = threading.Lock()
+
+    async def run_query(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run *fn* on the query pool; its latency feeds the ingest throttle."""
+        def timed():
+            self.throttle.query_started()
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.throttle.query_finished(time.perf_counter() - start)
+
+        return await asyncio.get_running_loop().run_in_executor(self._query, timed)
+
+    async def run_ingest(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run *fn* on the ingest pool (queued behind earlier uploads)."""
+        with self._lock:
+            self._ingest_queued += 1
+
+        def tracked():
+            with self._lock:
+                self._ingest_queued -= 1
+            return fn(*args, **kwargs)
+
+        return await asyncio.get_running_loop().run_in_executor(self._ingest, tracked)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            queued = self._ingest_queued
+        return {
+            "query_threads": self.query_threads,
+            "ingest_threads": self.ingest_threads,
+            "ingest_queued": queued,
+            "ingest_throttle": self.throttle.get_stats(),
+        }
+
+    def shutdown(self) -> None:
+        self._query.shutdown(wait=False, cancel_futures=True)
+        self._ingest.shutdown(wait=True, cancel_futures=True)
+
@@ -0,0 +1,165 @@
+"""
+Context packing — turn ranked search hits into the passages sent to the LLM.
+
+Neighbouring chunks from chunk_text_with_pages() share an overlap window,
+and FAQ-style PDFs often repeat the same sentence in several answers, so
+sending every hit verbatim wastes prompt tokens.  pack_context():
+
+1. Groups hits by document and merges runs of adjacent chunk indices
+   (which overlap by construction) into one passage.
+2. Rebuilds each passage sentence by sentence, dropping any sentence that
+   was already emitted — within the passage or in a higher-ranked one.
+3. Adds passages in score order until the token budget is spent; the
+   last passage is cut at a sentence boundary to fit.
+
+The result records how many tokens were used and how many were saved
+compared with sending each hit separately trimmed to MAX_CHARS_PER_CHUNK.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+
+from .tokens import estimate_tokens
+from .utils import _split_sentences
+
+logger = logging.getLogger(__name__)
+
+# Fewer tokens than this left in the budget isn't worth a truncated passage.
+MIN_PASSAGE_TOKENS = 40
+
+
+@dataclass
+class Passage:
+    doc_id: str
+    filename: str
+    pages: list[int]            # distinct pages, in reading order
+    chunk_indices: list[int]
+    score: float                # best score among the merged hits
+    text: str
+    tokens: int
+
+    @property
+    def page_label(self) -> str:
+        if len(self.pages) == 1:
+            return f"Page {self.pages[0]}"
+        return "Pages " + ", ".join(str(p) for p in self.pages)
+
+
+@dataclass
+class PackedContext:
+    passages: list[Passage] = field(default_factory=list)
+    tokens_used: int = 0
+    tokens_naive: int = 0       # cost of one trimmed passage per hit
+    hits_merged: int = 0        # hits folded into a neighbour's passage
+    sentences_dropped: int = 0  # duplicate sentences removed
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_naive - self.tokens_used)
+
+
+def _sentence_key(sentence: str) -> str:
+    return " ".join(sentence.lower().split())
+
+
+def _group_adjacent(hits: list[tuple]) -> list[list[tuple]]:
+    """Split hits into runs of consecutive chunk indices within one document."""
+    by_doc: dict[str, list[tuple]] = {}
+    for meta, score in hits:
+        by_doc.setdefault(meta.doc_id, []).append((meta, float(score)))
+
+    groups: list[list[tuple]] = []
+    for doc_hits in by_doc.values():
+        doc_hits.sort(key=lambda h: h[0].chunk_index)
+        run = [doc_hits[0]]
+        for hit in doc_hits[1:]:
+            if hit[0].chunk_index == run[-1][0].chunk_index + 1:
+                run.append(hit)
+            else:
+                groups.append(run)
+                run = [hit]
+        groups.append(run)
+
+    groups.sort(key=lambda g: max(score for _, score in g), reverse=True)
+    return groups
+
+
+def pack_context(
+    hits: list[tuple],
+    token_budget: int,
+    naive_cost=None,
+) -> PackedContext:
+    """
+    Pack ranked (ChunkMeta, score) *hits* into at most *token_budget* tokens.
+
+    *naive_cost* maps a ChunkMeta to the tokens it would have cost unpacked
+    (used only for reporting); defaults to the token count of its full text.
+    """
+    packed = PackedContext()
+    if not hits:
+        return packed
+
+    naive_cost = naive_cost or (lambda meta: estimate_tokens(meta.text))
+    packed.tokens_naive = sum(naive_cost(meta) for meta, _ in hits)
+
+    seen: set[str] = set()
+    remaining = token_budget
+
+    for group in _group_adjacent(hits):
+        if remaining < MIN_PASSAGE_TOKENS:
+            break
+        packed.hits_merged += len(group) - 1
+
+        kept: list[str] = []
+        used = 0
+        truncated = False
+        for meta, _ in group:
+            for sentence in _split_sentences(meta.text):
+                key = _sentence_key(sentence)
+                if key in seen:
+                    packed.sentences_dropped += 1
+                    continue
+                cost = estimate_tokens(sentence) + 1
+                if used + cost > remaining:
+                    truncated = True
+                    break
+                seen.add(key)
+                kept.append(sentence)
+                used += cost
+            if truncated:
+                break
+
+        if not kept:
+            continue
+
+        pages: list[int] = []
+        for meta, _ in group:
+            if meta.page_number not in pages:
+                pages.append(meta.page_number)
+
+        text = " ".join(kept)
+        tokens = estimate_tokens(text)
+        packed.passages.append(
+            Passage(
+                doc_id=group[0][0].doc_id,
+                filename=group[0][0].filename,
+                pages=pages,
+                chunk_indices=[meta.chunk_index for meta, _ in group],
+                score=max(score for _, score in group),
+                text=text,
+                tokens=tokens,
+            )
+        )
+        packed.tokens_used += tokens
+        remaining -= tokens
+        if truncated:
+            break
+
+    logger.info(
+        "Packed %d hit(s) into %d passage(s): %d tokens (saved %d; %d merged, %d duplicate sentences dropped)",
+        len(hits), len(packed.passages), packed.tokens_used, packed.tokens_saved,
+        packed.hits_merged, packed.sentences_dropped,
+    )
+    return packed
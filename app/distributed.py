@@ -0,0 +1,355 @@
+"""
+Distributed QA engine — a coordinator that keeps no vectors itself and
+spreads documents over index shard nodes (app/shard_server.py).
+
+Routing
+───────
+• A document lives on exactly one shard, chosen by crc32(doc_id) mod the
+  number of shards, so every coordinator routes the same way without
+  shared state.  Changing SHARD_URLS therefore re-homes documents; re-ingest
+  (or re-import the bundle into empty shards) after resizing.
+• The coordinator encodes text (chunks on upload, the question on search)
+  and ships vectors, so shard nodes need no embedding model.
+• A doc-scoped search, upload or delete talks to the owning shard only.  A
+  global search goes to every shard in parallel, and the per-shard top-k
+  lists are merged with a heap.
+
+Failures
+────────
+Every shard call has a timeout (SHARD_TIMEOUT_SECONDS for searches and
+reads, SHARD_WRITE_TIMEOUT_SECONDS for uploads).  A global search returns
+whatever the reachable shards answered in time — logged, counted in
+pdfqa_searches_partial_total, and listed under shards in /health — and
+fails only when no shard answers.  Operations that need one specific
+shard raise ShardUnavailableError (HTTP 503 in main.py) when it is down.
+
+The document registry and generation come from a cluster view (every
+shard's /shard/stats) cached for SHARD_STATUS_TTL_SECONDS; a stale view is
+served while it refreshes in the background, and writes through this
+coordinator invalidate it.
+
+Configuration
+─────────────
+SHARD_URLS                      comma-separated shard base URLs (enables this mode)
+SHARD_TIMEOUT_SECONDS           2      per-shard search / read timeout
+SHARD_WRITE_TIMEOUT_SECONDS     30     per-shard upload / delete timeout
+SHARD_STATUS_TTL_SECONDS        2      cluster-view cache lifetime
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Optional
+from urllib.parse import quote
+
+import httpx
+import numpy as np
+
+from .engine import EMBEDDING_DIM, ChunkMeta, QAEngine, UnsupportedInEngine
+from .metrics import SEARCHES_PARTIAL, SHARD_CALLS, STAGE_SECONDS
+from .shard_server import encode_vectors
+
+logger = logging.getLogger(__name__)
+
+SHARD_TIMEOUT_SECONDS = float(os.getenv("SHARD_TIMEOUT_SECONDS", "2"))
+SHARD_WRITE_TIMEOUT_SECONDS = float(os.getenv("SHARD_WRITE_TIMEOUT_SECONDS", "30"))
+SHARD_STATUS_TTL_SECONDS = float(os.getenv("SHARD_STATUS_TTL_SECONDS", "2"))
+
+
+class ShardUnavailableError(RuntimeError):
+    """The shard an operation needs did not answer (or no shard did)."""
+
+
+def shard_urls_from_env() -> list[str]:
+    return [u.strip().rstrip("/") for u in os.getenv("SHARD_URLS", "").split(",") if u.strip()]
+
+
+@dataclass
+class _ShardStatus:
+    url: str
+    ok: bool = False
+    generation: int = 0
+    total_chunks: int = 0
+    documents: list[dict] = field(default_factory=list)
+    error: str | None = None
+
+
+@dataclass
+class DistributedQAEngine(QAEngine):
+    """QAEngine front end whose index lives on remote shard nodes."""
+
+    shard_urls: list[str] = field(default_factory=shard_urls_from_env)
+    timeout: float = SHARD_TIMEOUT_SECONDS
+    write_timeout: float = SHARD_WRITE_TIMEOUT_SECONDS
+    status_ttl: float = SHARD_STATUS_TTL_SECONDS
+    _client: httpx.Client = field(init=False, repr=False)
+    _pool: ThreadPoolExecutor = field(init=False, repr=False)
+    _view: list[_ShardStatus] | None = field(default=None, init=False, repr=False)
+    _view_at: float = field(default=0.0, init=False, repr=False)
+    _view_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _refreshing: bool = field(default=False, init=False, repr=False)
+
+    def __post_init__(self):
+        if not self.shard_urls:
+            raise ValueError("DistributedQAEngine needs at least one shard URL (SHARD_URLS).")
+        super().__post_init__()
+        if self._uses_lexical:
+            logger.warning("DistributedQAEngine searches vectors only; "
+                           "SEARCH_MODE / LEXICAL_FAST_PATH are ignored.")
+        if self._residency.enabled:
+            logger.warning("DistributedQAEngine does not evict documents; MEMORY_BUDGET_MB is ignored.")
+        self._client = httpx.Client(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=8 * len(self.shard_urls)),
+        )
+        self._pool = ThreadPoolExecutor(
+            max_workers=4 * len(self.shard_urls), thread_name_prefix="shard-rpc",
+        )
+        logger.info("Distributed index over %d shards: %s",
+                    len(self.shard_urls), ", ".join(self.shard_urls))
+
+    # ── transport ──────────────────────────────────────────────────────────────
+
+    def shard_for(self, doc_id: str) -> int:
+        return zlib.crc32(doc_id.encode("utf-8")) % len(self.shard_urls)
+
+    def _call(self, shard: int, op: str, method: str, path: str,
+              timeout: float | None = None, **kwargs) -> httpx.Response:
+        """One request to one shard; 4xx responses are returned, not raised."""
+        url = self.shard_urls[shard]
+        try:
+            response = self._client.request(method, url + path, timeout=timeout or self.timeout, **kwargs)
+        except httpx.TimeoutException as exc:
+            SHARD_CALLS.inc(1, url, op, "timeout")
+            raise ShardUnavailableError(f"Shard {url} timed out ({op}).") from exc
+        except httpx.HTTPError as exc:
+            SHARD_CALLS.inc(1, url, op, "error")
+            raise ShardUnavailableError(f"Shard {url} unreachable ({op}): {exc}") from exc
+        if response.status_code >= 500:
+            SHARD_CALLS.inc(1, url, op, "error")
+            raise ShardUnavailableError(f"Shard {url} failed ({op}): HTTP {response.status_code}")
+        SHARD_CALLS.inc(1, url, op, "ok")
+        return response
+
+    def _fan_out(self, op: str, method: str, path: str, **kwargs) -> list[httpx.Response | Exception]:
+        """Call every shard in parallel; one result (or the exception) per shard, in order.
+        Shards that haven't answered within the timeout count as ShardUnavailableError."""
+        futures = [
+            self._pool.submit(self._call, i, op, method, path, **kwargs)
+            for i in range(len(self.shard_urls))
+        ]
+        wait(futures, timeout=self.timeout + 0.5)
+        results: list[httpx.Response | Exception] = []
+        for url, future in zip(self.shard_urls, futures):
+            if not future.done():
+                SHARD_CALLS.inc(1, url, op, "timeout")
+                results.append(ShardUnavailableError(f"Shard {url} timed out ({op})."))
+            elif future.exception() is not None:
+                results.append(future.exception())
+            else:
+                results.append(future.result())
+        return results
+
+    # ── cluster view ───────────────────────────────────────────────────────────
+
+    def _refresh_view(self) -> list[_ShardStatus]:
+        try:
+            previous = self._view or [_ShardStatus(url) for url in self.shard_urls]
+            view = []
+            for old, result in zip(previous, self._fan_out("stats", "GET", "/shard/stats")):
+                if isinstance(result, Exception) or result.status_code != 200:
+                    # Keep the last known registry so documents don't vanish during a blip
+                    error = str(result) if isinstance(result, Exception) else f"HTTP {result.status_code}"
+                    view.append(_ShardStatus(old.url, False, old.generation,
+                                             old.total_chunks, old.documents, error))
+                    continue
+                body = result.json()
+                view.append(_ShardStatus(old.url, True, body["generation"],
+                                         body["total_chunks"], body["documents"]))
+            with self._view_lock:
+                self._view, self._view_at = view, time.monotonic()
+            return view
+        finally:
+            with self._view_lock:
+                self._refreshing = False
+
+    def _cluster(self) -> list[_ShardStatus]:
+        """Cached cluster view; stale views are served while one refresh runs."""
+        with self._view_lock:
+            view, fresh = self._view, time.monotonic() - self._view_at < self.status_ttl
+            if view is not None and not fresh and not self._refreshing:
+                self._refreshing = True
+                self._pool.submit(self._refresh_view)
+        return view if view is not None else self._refresh_view()
+
+    def _invalidate(self) -> None:
+        with self._view_lock:
+            self._view_at = 0.0
+
+    # ── writes ─────────────────────────────────────────────────────────────────
+
+    def index_document(
+        self,
+        doc_id: str,
+        filename: str,
+        chunks: list[str],
+        page_numbers: list[int] | None = None,
+        embeddings: np.ndarray | None = None,
+    ) -> None:
+        logger.info("Indexing doc_id=%s (%s) — %d chunks", doc_id, filename, len(chunks))
+        page_numbers, vecs = self._prepare_chunks(chunks, page_numbers, embeddings)
+        self._send_document(doc_id, filename, chunks, page_numbers, vecs)
+        self._invalidate()
+
+    def _send_document(
+        self,
+        doc_id: str,
+        filename: str,
+        chunks: list[str],
+        page_numbers: list[int],
+        vecs: np.ndarray,
+    ) -> None:
+        shard = self.shard_for(doc_id)
+        response = self._call(
+            shard, "index", "POST", "/shard/documents", timeout=self.write_timeout,
+            json={
+                "doc_id": doc_id,
+                "filename": filename,
+                "chunks": [{"text": c, "page_number": p} for c, p in zip(chunks, page_numbers)],
+                "vectors": encode_vectors(vecs),
+            },
+        )
+        if response.status_code == 409:
+            raise ValueError(f"Document '{doc_id}' is already indexed.")
+        response.raise_for_status()
+        logger.info("doc_id=%s stored on %s", doc_id, self.shard_urls[shard])
+
+    def delete_document(self, doc_id: str) -> None:
+        response = self._call(self.shard_for(doc_id), "delete", "DELETE",
+                              f"/shard/documents/{quote(doc_id, safe='')}",
+                              timeout=self.write_timeout)
+        if response.status_code == 404:
+            raise ValueError(f"Document '{doc_id}' not found.")
+        response.raise_for_status()
+        self._invalidate()
+        logger.info("Deleted doc_id=%s", doc_id)
+
+    # ── reads ──────────────────────────────────────────────────────────────────
+
+    def search(
+        self,
+        query: str,
+        doc_id: Optional[str] = None,
+        top_k: int = 5,
+        lexical_query: Optional[str] = None,
+    ) -> list[tuple[ChunkMeta, float]]:
+        q_vec = self._embed([query])
+        body = {"vector": encode_vectors(q_vec), "top_k": top_k, "doc_id": doc_id,
+                "route_top_docs": self.route_top_docs}
+
+        with STAGE_SECONDS.time("faiss_search"):
+            if doc_id:
+                response = self._call(self.shard_for(doc_id), "search", "POST",
+                                      "/shard/search", json=body)
+                response.raise_for_status()
+                return self._hits(response.json())
+
+            results = self._fan_out("search", "POST", "/shard/search", json=body)
+            answered = [r for r in results if not isinstance(r, Exception) and r.status_code == 200]
+            if not answered:
+                raise ShardUnavailableError(
+                    f"No index shard answered the search ({len(results)} tried)."
+                )
+            if len(answered) < len(results):
+                SEARCHES_PARTIAL.inc()
+                logger.warning(
+                    "Partial search: %d/%d shards answered (%s)", len(answered), len(results),
+                    "; ".join(str(r) for r in results if isinstance(r, Exception)),
+                )
+            partials = (self._hits(r.json()) for r in answered)
+            return heapq.nlargest(top_k, chain.from_iterable(partials), key=lambda hit: hit[1])
+
+    @staticmethod
+    def _hits(body: dict) -> list[tuple[ChunkMeta, float]]:
+        return [
+            (ChunkMeta(**{k: v for k, v in hit.items() if k != "score"}), float(hit["score"]))
+            for hit in body["hits"]
+        ]
+
+    def list_documents(self) -> list[dict]:
+        return [dict(d) for status in self._cluster() for d in status.documents]
+
+    def total_chunks(self) -> int:
+        return sum(status.total_chunks for status in self._cluster())
+
+    def memory_bytes(self) -> int:
+        """Vector bytes only, as an estimate for collection quotas."""
+        return self.total_chunks() * EMBEDDING_DIM * 4
+
+    def spawn(self) -> QAEngine:
+        raise UnsupportedInEngine("Collections are not supported with the distributed index.")
+
+    def retrieve(self, query: str, **filters) -> tuple[list[tuple[ChunkMeta, float]], int]:
+        raise UnsupportedInEngine("Retrieval-only search is not supported with the distributed index.")
+
+    @property
+    def generation(self) -> int:
+        """Sum of shard generations as of the cached cluster view."""
+        return sum(status.generation for status in self._cluster())
+
+    def get_stats(self) -> dict:
+        view = self._cluster()
+        return {
+            "total_documents": sum(len(s.documents) for s in view),
+            "total_chunks": sum(s.total_chunks for s in view),
+            "embedding_model": self.model_name,
+            "embedding_backend": self._embedder.name,
+            "embedding_dim": EMBEDDING_DIM,
+            "generation": sum(s.generation for s in view),
+            "route_top_docs": self.route_top_docs,
+            "shards": [
+                {"url": s.url, "ok": s.ok, "documents": len(s.documents),
+                 "chunks": s.total_chunks, **({"error": s.error} if s.error else {})}
+                for s in view
+            ],
+        }
+
+    # ── bundles ────────────────────────────────────────────────────────────────
+
+    def _export(self) -> tuple[np.ndarray, list[ChunkMeta], dict[str, dict]]:
+        raise UnsupportedInEngine(
+            "Vectors live on the shard nodes; build bundles with app.ingest instead."
+        )
+
+    def _import(self, vectors: np.ndarray | None, meta: list[ChunkMeta], docs: dict[str, dict]) -> None:
+        """Route each bundled document to its shard; documents already there are kept."""
+        rows_by_doc: dict[str, list[int]] = {did: [] for did in docs}
+        for row, m in enumerate(meta):
+            rows_by_doc[m.doc_id].append(row)
+
+        def send(doc_id: str) -> bool:
+            rows = rows_by_doc[doc_id]
+            if not rows:
+                return False
+            try:
+                self._send_document(
+                    doc_id, docs[doc_id]["filename"],
+                    [meta[r].text for r in rows], [meta[r].page_number for r in rows],
+                    vectors[rows],
+                )
+            except ValueError:
+                return False        # already on its shard (another coordinator imported it)
+            return True
+
+        imported = sum(self._pool.map(send, docs))
+        self._invalidate()
+        logger.info("Bundle import: %d documents sent to shards, %d already present",
+                    imported, len(docs) - imported)
@@ -0,0 +1,503 @@
+"""
+Embedding backends — how QAEngine turns text into L2-normalised vectors.
+
+Backends
+--------
+* TorchEmbedder  — sentence-transformers on PyTorch, float32 (the default).
+* OnnxEmbedder   — the same model exported to an ONNX graph and run with
+                   ONNX Runtime on the CPU, optionally with dynamic int8
+                   quantization of the weights.  Tokenisation uses the
+                   model's own fast tokenizer (tokenizer.json); pooling is
+                   the model's mean pooling + L2 norm, done in numpy.
+
+Both return the same shape and normalisation, so indexes built with one
+can be searched with the other — check the agreement with `verify` before
+switching a production index (int8 vectors differ slightly).
+
+Selection (environment)
+-----------------------
+EMBED_BACKEND     torch (default) | onnx | onnx-int8
+EMBED_THREADS     intra-op threads for the backend (default: all cores)
+EMBED_ONNX_DIR    where exported graphs live (default: app/onnx_models/)
+
+The ONNX graph is exported on first use (needs torch + sentence-transformers
+once, plus onnxruntime at run time) and reused afterwards:
+
+    python -m app.embedders export --quantize            # fp32 + int8 graphs
+    python -m app.embedders verify --backend onnx-int8   # cosine vs. PyTorch
+
+Ingest encoding
+---------------
+Queries are encoded one at a time; document chunks go through
+encode_bucketed(), which sorts them by estimated token length and cuts the
+sorted run into batches holding about INGEST_TOKENS_PER_BATCH tokens each.
+Short chunks then ride in large batches and long ones in small batches, and
+no batch pads a 20-token chunk out to 256.  With INGEST_ENCODE_WORKERS > 1,
+large ingests spread those batches over an EncodePool: that many worker
+processes, each with its own model copy and cpu_count / workers threads.
+Vectors always come back in the input order.
+
+INGEST_TOKENS_PER_BATCH   padded tokens per ingest batch (default 16384;
+                          0 = one encode() call, no bucketing)
+INGEST_ENCODE_WORKERS     encode processes for ingest (default 0 = in-process)
+INGEST_CPU_THREADS        threads shared by those processes (default: all
+                          cores); leave the rest to queries via EMBED_THREADS
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_ONNX_DIR = Path(__file__).parent / "onnx_models"
+ONNX_META_FILE = "export.json"
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+ONNX_OPSET = 14
+
+DEFAULT_BATCH_SIZE = 32
+
+# Ingest batching: token estimate ≈ chars / 4 (+ [CLS]/[SEP]), capped at the
+# model's max_seq_length; batches stop at INGEST_TOKENS_PER_BATCH padded tokens.
+INGEST_TOKENS_PER_BATCH = int(os.getenv("INGEST_TOKENS_PER_BATCH", "16384"))
+INGEST_MAX_BATCH = 512
+CHARS_PER_TOKEN = 4
+MAX_SEQ_TOKENS = 256
+# Below this many chunks, shipping texts to worker processes costs more than it saves
+POOL_MIN_CHUNKS = 256
+
+# verify: the PyTorch vector and the backend's vector for the same text
+DEFAULT_MIN_COSINE = 0.99
+
+
+def _threads_from_env() -> int | None:
+    configured = os.getenv("EMBED_THREADS", "").strip()
+    return int(configured) if configured else None
+
+
+class Embedder(ABC):
+    """Text → L2-normalised float32 vectors (N × dim)."""
+
+    name: str = "abstract"
+
+    @abstractmethod
+    def encode(self, texts: list[str], batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+        ...
+
+    def get_stats(self) -> dict:
+        return {"backend": self.name}
+
+
+class TorchEmbedder(Embedder):
+    """sentence-transformers (PyTorch, float32)."""
+
+    name = "torch"
+
+    def __init__(self, model_name: str, threads: int | None = None):
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+        self.model_name = model_name
+        self.threads = threads
+        self._model = SentenceTransformer(model_name)
+
+    def encode(self, texts: list[str], batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+        return self._model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+            normalize_embeddings=True,   # cosine via inner product
+        ).astype("float32")
+
+    def get_stats(self) -> dict:
+        return {"backend": self.name, "threads": self.threads}
+
+
+class OnnxEmbedder(Embedder):
+    """The exported sentence-transformer graph on ONNX Runtime (CPU)."""
+
+    def __init__(
+        self,
+        model_name: str,
+        quantized: bool = False,
+        threads: int | None = None,
+        onnx_dir: str | Path | None = None,
+    ):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as exc:
+            raise RuntimeError(
+                f"EMBED_BACKEND={'onnx-int8' if quantized else 'onnx'} needs "
+                "`pip install onnxruntime tokenizers`."
+            ) from exc
+
+        self.model_name = model_name
+        self.quantized = quantized
+        self.name = "onnx-int8" if quantized else "onnx"
+        self.threads = threads or os.cpu_count() or 1
+
+        export_dir = onnx_export_dir(model_name, onnx_dir)
+        graph = export_dir / (ONNX_INT8_FILE if quantized else ONNX_FP32_FILE)
+        if not graph.exists():
+            export_onnx(model_name, export_dir, quantize=quantized)
+        meta = json.loads((export_dir / ONNX_META_FILE).read_text(encoding="utf-8"))
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            str(graph), sess_options=options, providers=["CPUExecutionProvider"],
+        )
+        self._inputs = {i.name for i in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(str(export_dir / "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=meta["max_seq_length"])
+        self._tokenizer.enable_padding(
+            pad_id=meta["pad_token_id"], pad_token=meta["pad_token"],
+        )
+        logger.info("ONNX embedder: %s (%d intra-op threads)", graph, self.threads)
+
+    def encode(self, texts: list[str], batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+        parts = [
+            self._encode_batch(texts[i : i + batch_size])
+            for i in range(0, len(texts), batch_size)
+        ]
+        return np.vstack(parts) if parts else np.empty((0, 0), dtype="float32")
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self._session.run(None, {k: v for k, v in feeds.items() if k in self._inputs})[0]
+
+        # Mean pooling over real tokens, then L2 norm (the model's own head)
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype("float32")
+
+    def get_stats(self) -> dict:
+        return {"backend": self.name, "threads": self.threads}
+
+
+# ─────────────────────────────────────────────────────────────
+# Export
+# ─────────────────────────────────────────────────────────────
+
+def onnx_export_dir(model_name: str, onnx_dir: str | Path | None = None) -> Path:
+    root = Path(onnx_dir or os.getenv("EMBED_ONNX_DIR", "").strip() or DEFAULT_ONNX_DIR)
+    return root / model_name.replace("/", "__")
+
+
+def export_onnx(model_name: str, out: str | Path, quantize: bool = True) -> Path:
+    """
+    Export *model_name*'s transformer to ``out/model.onnx`` (+ tokenizer and
+    pooling settings); with *quantize*, also write a dynamic-int8 copy.
+    Needs torch and sentence-transformers; the result runs without them.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    st = SentenceTransformer(model_name, device="cpu")
+    transformer, pooling = st[0], st[1]
+    if not getattr(pooling, "pooling_mode_mean_tokens", False):
+        raise ValueError(f"{model_name} does not use mean pooling; the ONNX backend can't mirror it.")
+
+    tokenizer = transformer.tokenizer
+    sample = tokenizer(["export sample"], padding=True, return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs)))[0]   # last_hidden_state
+
+    fp32 = out / ONNX_FP32_FILE
+    if not fp32.exists():
+        dynamic = {"batch": 0, "seq": 1}
+        torch.onnx.export(
+            _Encoder(transformer.auto_model.eval()),
+            tuple(sample[n] for n in input_names),
+            str(fp32),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={n: {v: k for k, v in dynamic.items()}
+                          for n in [*input_names, "last_hidden_state"]},
+            opset_version=ONNX_OPSET,
+        )
+        tokenizer.save_pretrained(str(out))
+        (out / ONNX_META_FILE).write_text(json.dumps({
+            "model_name": model_name,
+            "max_seq_length": st.max_seq_length,
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id,
+            "inputs": input_names,
+        }, indent=2), encoding="utf-8")
+        logger.info("Exported %s to %s", model_name, fp32)
+
+    if quantize and not (out / ONNX_INT8_FILE).exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(fp32), str(out / ONNX_INT8_FILE), weight_type=QuantType.QInt8)
+        logger.info("Wrote dynamic-int8 graph %s", out / ONNX_INT8_FILE)
+    return out
+
+
+def embedder_from_env(model_name: str, backend: str | None = None) -> Embedder:
+    """Build the backend selected by EMBED_BACKEND (see module docstring)."""
+    kind = (backend or os.getenv("EMBED_BACKEND", "torch")).strip().lower()
+    threads = _threads_from_env()
+    if kind == "torch":
+        return TorchEmbedder(model_name, threads=threads)
+    if kind in ("onnx", "onnx-int8"):
+        return OnnxEmbedder(model_name, quantized=kind == "onnx-int8", threads=threads)
+    raise ValueError(f"Unknown EMBED_BACKEND '{kind}' (expected one of {', '.join(BACKENDS)}).")
+
+
+def ingest_workers_from_env() -> int:
+    return max(0, int(os.getenv("INGEST_ENCODE_WORKERS", "0").strip() or 0))
+
+
+def ingest_cpu_threads_from_env() -> int:
+    configured = os.getenv("INGEST_CPU_THREADS", "").strip()
+    return int(configured) if configured else os.cpu_count() or 1
+
+
+# ─────────────────────────────────────────────────────────────
+# Ingest encoding
+# ─────────────────────────────────────────────────────────────
+
+def estimate_tokens(text: str) -> int:
+    return min(len(text) // CHARS_PER_TOKEN + 2, MAX_SEQ_TOKENS)
+
+
+def length_buckets(
+    texts: list[str],
+    token_budget: int = INGEST_TOKENS_PER_BATCH,
+    max_batch: int = INGEST_MAX_BATCH,
+) -> list[np.ndarray]:
+    """
+    Row indices of *texts* grouped into batches of similar length, shortest
+    first.  A batch grows until (rows × its longest row's tokens) would pass
+    *token_budget* or it holds *max_batch* rows.
+    """
+    lengths = np.fromiter((estimate_tokens(t) for t in texts), dtype=np.int64, count=len(texts))
+    order = np.argsort(lengths, kind="stable")
+    batches: list[np.ndarray] = []
+    start = 0
+    for end in range(1, len(order) + 1):
+        if end == len(order):
+            batches.append(order[start:end])
+            break
+        rows = end + 1 - start
+        # sorted ascending, so the next row is the longest the batch would hold
+        if rows > max_batch or rows * lengths[order[end]] > token_budget:
+            batches.append(order[start:end])
+            start = end
+    return batches
+
+
+def encode_bucketed(
+    embedder: Embedder,
+    texts: list[str],
+    token_budget: int = INGEST_TOKENS_PER_BATCH,
+    max_batch: int = INGEST_MAX_BATCH,
+    pool: "EncodePool | None" = None,
+    before_batch: Callable[[], None] | None = None,
+) -> np.ndarray:
+    """Encode *texts* in length-bucketed batches (on *pool* if given); rows
+    come back in input order.  *before_batch* runs before each batch (each
+    round of pool.workers batches on a pool) — the ingest throttle hook."""
+    if token_budget <= 0:
+        if before_batch:
+            before_batch()
+        return embedder.encode(texts)
+    batches = length_buckets(texts, token_budget, max_batch)
+    if pool is not None and len(texts) >= POOL_MIN_CHUNKS:
+        batches.reverse()                       # longest first: fewer stragglers at the end
+        parts = _pooled(pool, [[texts[i] for i in idx] for idx in batches], before_batch)
+    else:
+        parts = _in_process(embedder, [[texts[i] for i in idx] for idx in batches], before_batch)
+
+    out: np.ndarray | None = None
+    for idx, vecs in zip(batches, parts):
+        if out is None:
+            out = np.empty((len(texts), vecs.shape[1]), dtype="float32")
+        out[idx] = vecs
+    return out if out is not None else np.empty((0, 0), dtype="float32")
+
+
+def _in_process(embedder: Embedder, batches: list[list[str]], before_batch) -> Iterator[np.ndarray]:
+    for batch in batches:
+        if before_batch:
+            before_batch()
+        yield embedder.encode(batch, batch_size=len(batch))
+
+
+def _pooled(pool: "EncodePool", batches: list[list[str]], before_batch) -> Iterator[np.ndarray]:
+    if before_batch is None:
+        yield from pool.map(batches)
+        return
+    for i in range(0, len(batches), pool.workers):
+        before_batch()
+        yield from pool.map(batches[i : i + pool.workers])
+
+
+_worker_embedder: Embedder | None = None
+
+
+def _init_worker(model_name: str, backend: str, threads: int) -> None:
+    global _worker_embedder
+    os.environ["EMBED_THREADS"] = str(threads)
+    _worker_embedder = embedder_from_env(model_name, backend=backend)
+
+
+def _encode_in_worker(texts: list[str]) -> np.ndarray:
+    return _worker_embedder.encode(texts, batch_size=len(texts))
+
+
+class EncodePool:
+    """
+    *workers* processes, each with its own copy of the model, encoding
+    ingest batches in parallel.  Workers are spawned (not forked) so no
+    torch / ONNX Runtime thread pool is inherited mid-flight, and split
+    INGEST_CPU_THREADS between them so they don't oversubscribe.
+    """
+
+    def __init__(self, model_name: str, backend: str, workers: int, threads: int | None = None):
+        self.workers = workers
+        self.threads = threads or max(1, ingest_cpu_threads_from_env() // workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, backend, self.threads),
+        )
+        logger.info("Encode pool: %d workers × %d threads (%s)", workers, self.threads, backend)
+
+    def map(self, batches: list[list[str]]) -> Iterator[np.ndarray]:
+        """Encode each batch on some worker; results in submission order."""
+        return self._executor.map(_encode_in_worker, batches)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+# ─────────────────────────────────────────────────────────────
+# Verification
+# ─────────────────────────────────────────────────────────────
+
+SAMPLE_TEXTS = [
+    "How do I reset my router to factory settings?",
+    "The warranty covers manufacturing defects for 24 months from the date of purchase.",
+    "Press and hold the power button for ten seconds until the LED blinks amber.",
+    "Refunds are issued to the original payment method within 5–7 business days.",
+    "Q: Can I use the charger abroad? A: Yes, it accepts 100–240 V, 50/60 Hz input.",
+    "Clean the filter every three months; replace it once a year or when it is damaged.",
+    "Error E42 means the water inlet is blocked. Check the hose for kinks.",
+    "page 12",
+]
+
+
+def agreement(reference: np.ndarray, candidate: np.ndarray, top_k: int = 5) -> dict:
+    """Per-text cosine between two backends' vectors, and top-k retrieval overlap
+    when each text in turn is used as a query against all the others."""
+    cosines = np.sum(reference * candidate, axis=1)
+    k = min(top_k, len(reference) - 1)
+    overlap = []
+    if k > 0:
+        for i in range(len(reference)):
+            ref = np.argsort(-(reference @ reference[i]))[1 : k + 1]
+            cand = np.argsort(-(candidate @ candidate[i]))[1 : k + 1]
+            overlap.append(len(set(ref) & set(cand)) / k)
+    return {
+        "texts": len(reference),
+        "cosine_min": float(cosines.min()),
+        "cosine_mean": float(cosines.mean()),
+        "cosine_p1": float(np.percentile(cosines, 1)),
+        "topk_overlap": float(np.mean(overlap)) if overlap else None,
+    }
+
+
+def _texts_from(path: str | None, limit: int) -> list[str]:
+    """Sample texts: chunk texts from an index bundle's meta.json, lines of a
+    text file, or the built-in samples."""
+    if not path:
+        return SAMPLE_TEXTS
+    src = Path(path)
+    if src.is_dir():
+        payload = json.loads((src / "meta.json").read_text(encoding="utf-8"))
+        texts = [c["text"] for c in payload["chunks"]]
+    else:
+        texts = [line.strip() for line in src.read_text(encoding="utf-8").splitlines() if line.strip()]
+    return texts[:limit]
+
+
+def main(argv: list[str] | None = None) -> int:
+    from .engine import MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Export / verify embedding backends.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Export the model to ONNX (optionally int8).")
+    export.add_argument("--model", default=MODEL_NAME)
+    export.add_argument("--out", help="Export directory (default: EMBED_ONNX_DIR/<model>).")
+    export.add_argument("--quantize", action="store_true", help="Also write the int8 graph.")
+
+    verify = sub.add_parser("verify", help="Compare a backend's vectors with PyTorch's.")
+    verify.add_argument("--backend", default="onnx-int8", choices=BACKENDS[1:])
+    verify.add_argument("--model", default=MODEL_NAME)
+    verify.add_argument("--texts", help="Index bundle directory or a text file (one text per line).")
+    verify.add_argument("--limit", type=int, default=2000)
+    verify.add_argument("--min-cosine", type=float, default=DEFAULT_MIN_COSINE)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.command == "export":
+        out = export_onnx(args.model, args.out or onnx_export_dir(args.model), quantize=args.quantize)
+        print(out)
+        return 0
+
+    texts = _texts_from(args.texts, args.limit)
+    reference = TorchEmbedder(args.model).encode(texts)
+    candidate = embedder_from_env(args.model, backend=args.backend).encode(texts)
+    report = {"backend": args.backend, **agreement(reference, candidate)}
+    print(json.dumps(report, indent=2))
+    if report["cosine_min"] < args.min_cosine:
+        print(f"FAIL: minimum cosine {report['cosine_min']:.4f} < {args.min_cosine}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
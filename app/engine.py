@@ -3,29 +3,137 @@ QA Engine — FAISS vector store + sentence-transformer embeddings.
 
 Design
 ──────
-• One *global* FAISS index (IndexFlatIP — inner-product / cosine after L2-norm).
-• Each chunk is stored as a row; a parallel metadata list mirrors the index.
-• Documents can be added or removed at runtime.  Deletion rebuilds the index
-  from the surviving metadata (FAISS doesn't support in-place removal).
+• One *global* exhaustive inner-product index (cosine after L2-norm), searched
+  with faiss.knn over a float32 matrix of chunk vectors.
+• Each chunk is a row; a parallel metadata list mirrors the rows.  A
+  document's chunks occupy one contiguous row range, so doc-scoped search
+  scans only that slice.
+• Documents can be added or removed at runtime.  Deletion copies the
+  surviving rows' vectors (nothing is re-encoded).
 • ChunkMeta carries page_number so callers (e.g. the LLM layer) can cite pages.
+• The whole store can be written to / read from an *index bundle* directory
+  (faiss index + JSON metadata) so offline ingests can be loaded at startup.
+
+Concurrency (copy-on-write generations)
+───────────────────────────────────────
+Readers never lock.  Everything a search needs — vectors, metadata, the
+document registry, the generation number — lives in one immutable
+IndexSnapshot, read with a single attribute load.  Writers (serialised by a
+lock, with encoding done *before* taking it) build the next snapshot and
+publish it by rebinding that attribute, so a search sees either the old
+corpus or the new one, never a mix, and never waits behind an ingest.
+
+Appends avoid copying the corpus: vectors and metadata live in append-only
+storage with spare capacity, a snapshot only covers rows [0, ntotal), and
+rows past that are written only by the next generation.  When capacity runs
+out (or on delete) the writer moves to fresh storage; older snapshots keep
+the old arrays alive until their searches finish.
+
+VectorStore implements this; QAEngine owns one, and ShardedQAEngine
+(app/sharded.py) owns one per shard.
+
+Document routing (optional)
+───────────────────────────
+Each snapshot also carries a small summary index: DOC_REPRESENTATIVES unit
+vectors per document (spherical k-means centroids of its chunks), maintained
+on add / remove like the rows themselves.  With ROUTING_TOP_DOCS = M > 0, a
+global search first scores the query against the representatives, keeps
+the M best documents and scans only their chunks.  Cost drops from all
+rows to (representatives + M documents' rows); a relevant chunk whose
+document summary ranks below M is missed — benchmarks/bench_routing.py
+measures that recall.  Doc-scoped search is unaffected.
+
+Lexical search (optional)
+─────────────────────────
+With SEARCH_MODE=hybrid or LEXICAL_FAST_PATH=1, each snapshot also carries
+a BM25 LexicalIndex (app/lexical.py) over the same chunks, built from the
+chunk texts in add() before the write lock and dropped with the document on
+remove.  Hybrid search fuses the vector and lexical candidate lists; the
+fast path answers short keyword queries from BM25 alone, without encoding
+the query.  _search_snapshots() implements the modes for QAEngine and
+ShardedQAEngine.
+
+Retrieval-only search
+─────────────────────
+QAEngine.retrieve() backs POST /search: cosine ranking with optional
+filters and a score threshold, no LLM.  Filters are applied to rows before
+they are ranked — a doc_id set selects its documents' row ranges, and a
+page range masks rows through the snapshot's per-row page array — so a
+filtered search scans only the rows that pass.  With a threshold it is a
+range search: every row scoring at least min_score qualifies and is
+counted, but only the requested page of results is sorted.
+
+Memory budget (optional)
+────────────────────────
+With MEMORY_BUDGET_MB set, the least recently queried documents are spilled
+to disk (VectorStore.remove) whenever resident chunks exceed the budget, and
+reloaded (VectorStore.add) by the next doc-scoped query that needs them —
+see app/residency.py.
 """
 
 from __future__ import annotations
 
+import copy
+import heapq
+import json
 import logging
-from dataclasses import dataclass, field
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from itertools import chain
+from pathlib import Path
 from textwrap import shorten
-from typing import Optional
+from types import MappingProxyType
+from typing import Callable, Collection, Mapping, Optional
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from .compute import INGEST_THROTTLE
+from .embedders import (
+    EncodePool,
+    Embedder,
+    embedder_from_env,
+    encode_bucketed,
+    ingest_workers_from_env,
+)
+from .lexical import (
+    HYBRID_ALPHA,
+    HYBRID_DEPTH,
+    LEXICAL_FAST_PATH,
+    SEARCH_MODE,
+    SEARCH_MODES,
+    DocPostings,
+    LexicalIndex,
+    fast_path_confident,
+    fuse,
+    tokenize,
+)
+from .metrics import CHUNKS_EMBEDDED, SEARCHES, STAGE_SECONDS
+from .residency import Residency, memory_budget_from_env
 
 logger = logging.getLogger(__name__)
 
 MODEL_NAME = "all-MiniLM-L6-v2"   # Fast & accurate; 384-dim embeddings
 EMBEDDING_DIM = 384
 
+# Index bundle layout (see save_bundle / load_bundle)
+BUNDLE_INDEX_FILE = "index.faiss"
+BUNDLE_META_FILE  = "meta.json"
+BUNDLE_VERSION    = 1
+
+# Append-only vector storage: initial rows and growth factor when full
+_INITIAL_CAPACITY = 1024
+_GROWTH_FACTOR = 1.25
+
+# Two-stage routing for global search (see "Document routing"); 0 = scan every row
+ROUTING_TOP_DOCS = int(os.getenv("ROUTING_TOP_DOCS", "0"))
+DOC_REPRESENTATIVES = int(os.getenv("DOC_REPRESENTATIVES", "4"))
+_KMEANS_ITERATIONS = 8
+
+
+class UnsupportedInEngine(RuntimeError):
+    """The operation exists on QAEngine but this engine mode can't perform it."""
+
 
 @dataclass
 class ChunkMeta:
@@ -36,39 +144,718 @@ class ChunkMeta:
     page_number: int = 1        # ← NEW: 1-based page number from the source PDF
 
 
+def chunk_bytes(texts: list[str]) -> int:
+    """Resident size of indexed chunks: their float32 vectors plus UTF-8 text."""
+    return len(texts) * EMBEDDING_DIM * 4 + sum(len(t.encode("utf-8")) for t in texts)
+
+
+def doc_representatives(vecs: np.ndarray, n: int = DOC_REPRESENTATIVES) -> np.ndarray:
+    """
+    Up to *n* unit vectors summarising one document's chunk vectors: the
+    normalised centroid for n == 1, spherical k-means centroids otherwise
+    (deterministic seeding, so re-imports reproduce them).
+    """
+    if len(vecs) <= n:
+        return np.array(vecs, dtype="float32")
+    if n == 1:
+        centroids = vecs.mean(axis=0, keepdims=True)
+    else:
+        centroids = vecs[np.linspace(0, len(vecs) - 1, n).astype(int)].copy()
+        for _ in range(_KMEANS_ITERATIONS):
+            assign = np.argmax(vecs @ centroids.T, axis=1)
+            for j in range(n):
+                members = vecs[assign == j]
+                if len(members):
+                    centroids[j] = members.mean(axis=0)
+            centroids /= np.clip(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12, None)
+    centroids /= np.clip(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12, None)
+    return centroids.astype("float32")
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """
+    One immutable generation of the index.
+
+    ``vectors`` and ``meta`` may be views of / shared with storage that later
+    generations append to; only rows [0, ntotal) belong to this snapshot.
+    """
+
+    vectors: np.ndarray                     # ntotal × dim, L2-normalised
+    meta: list[ChunkMeta]                   # shared append-only list; read [0, ntotal)
+    ntotal: int
+    docs: Mapping[str, dict]                # doc_id → {filename, num_chunks, bytes}
+    ranges: Mapping[str, tuple[int, int]]   # doc_id → [start, stop) rows
+    generation: int
+    # Document summary index: representative vectors, and for each the
+    # position of its document in rep_docs
+    reps: np.ndarray = field(default_factory=lambda: np.zeros((0, EMBEDDING_DIM), dtype="float32"))
+    rep_owner: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    rep_docs: tuple[str, ...] = ()
+    # BM25 postings of the same documents (empty unless the store keeps them)
+    lexical: LexicalIndex = field(default_factory=LexicalIndex.empty)
+    # Page number of each row, for page-range filters
+    pages: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int32))
+
+    @classmethod
+    def empty(cls) -> "IndexSnapshot":
+        return cls(
+            vectors=np.zeros((0, EMBEDDING_DIM), dtype="float32"),
+            meta=[],
+            ntotal=0,
+            docs=MappingProxyType({}),
+            ranges=MappingProxyType({}),
+            generation=0,
+        )
+
+    def route(self, q_vec: np.ndarray, top_docs: int) -> list[str]:
+        """The *top_docs* documents whose best representative scores highest."""
+        scores = self.reps @ q_vec[0]
+        best = np.full(len(self.rep_docs), -np.inf, dtype="float32")
+        np.maximum.at(best, self.rep_owner, scores)
+        top = np.argpartition(-best, top_docs - 1)[:top_docs]
+        return [self.rep_docs[i] for i in top]
+
+    def knn(
+        self,
+        q_vec: np.ndarray,
+        top_k: int,
+        doc_id: Optional[str] = None,
+        route_top_docs: int = 0,
+    ) -> list[tuple[ChunkMeta, float]]:
+        """
+        Exhaustive inner-product search over this generation (or one
+        document's rows).  With *route_top_docs* = M and more than M
+        documents, a global search scans only the M routed documents.
+        """
+        rows, scores = self._knn_rows(q_vec, top_k, doc_id, route_top_docs)
+        return [(self.meta[int(row)], float(score)) for row, score in zip(rows, scores)]
+
+    def _knn_rows(
+        self,
+        q_vec: np.ndarray,
+        top_k: int,
+        doc_id: Optional[str],
+        route_top_docs: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """knn() as (rows, scores) arrays, best first."""
+        if doc_id:
+            if doc_id not in self.ranges:
+                return _NO_ROWS
+            start, stop = self.ranges[doc_id]
+        else:
+            if 0 < route_top_docs < len(self.rep_docs):
+                return self._knn_routed(q_vec, top_k, route_top_docs)
+            start, stop = 0, self.ntotal
+        if stop == start:
+            return _NO_ROWS
+
+        scores, indices = faiss.knn(
+            q_vec, self.vectors[start:stop], min(top_k, stop - start),
+            metric=faiss.METRIC_INNER_PRODUCT,
+        )
+        found = indices[0] != -1
+        return start + indices[0][found], scores[0][found]
+
+    def _knn_routed(self, q_vec: np.ndarray, top_k: int, top_docs: int) -> tuple[np.ndarray, np.ndarray]:
+        spans = sorted(self.ranges[d] for d in self.route(q_vec, top_docs))
+        rows = np.concatenate([np.arange(a, b) for a, b in spans])
+        scores = np.concatenate([self.vectors[a:b] @ q_vec[0] for a, b in spans])
+        k = min(top_k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return rows[best], scores[best]
+
+    def retrieve(
+        self,
+        q_vec: np.ndarray,
+        limit: int,
+        min_score: Optional[float] = None,
+        doc_ids: Optional[Collection[str]] = None,
+        pages: Optional[tuple[int, int]] = None,
+    ) -> tuple[list[tuple[ChunkMeta, float]], int]:
+        """
+        The best *limit* chunks among the rows of *doc_ids* (all documents
+        when None) whose page lies in the inclusive *pages* range, scoring at
+        least *min_score* if given; and how many rows qualify in total.
+        """
+        if doc_ids is None:
+            spans = [(0, self.ntotal)] if self.ntotal else []
+        else:
+            spans = sorted(self.ranges[d] for d in set(doc_ids) if d in self.ranges)
+        if not spans or limit <= 0:
+            return [], 0
+        if len(spans) == 1 and pages is None and min_score is None:
+            # One contiguous block, nothing to filter: plain faiss.knn
+            start, stop = spans[0]
+            scores, indices = faiss.knn(
+                q_vec, self.vectors[start:stop], min(limit, stop - start),
+                metric=faiss.METRIC_INNER_PRODUCT,
+            )
+            return [
+                (self.meta[start + int(i)], float(v))
+                for i, v in zip(indices[0], scores[0]) if i != -1
+            ], stop - start
+
+        rows = np.concatenate([np.arange(a, b) for a, b in spans])
+        keep = None
+        if pages is not None:
+            page = self.pages[rows]
+            keep = (page >= pages[0]) & (page <= pages[1])
+        if keep is not None and 2 * np.count_nonzero(keep) < len(rows):
+            # Selective filter: gather only the surviving rows before scoring
+            rows = rows[keep]
+            scores = self.vectors[rows] @ q_vec[0]
+        else:
+            # Score the spans in place (no copy), then drop the filtered rows
+            scores = np.concatenate([self.vectors[a:b] @ q_vec[0] for a, b in spans])
+            if keep is not None:
+                rows, scores = rows[keep], scores[keep]
+        if min_score is not None:
+            hit = np.flatnonzero(scores >= min_score)
+            rows, scores = rows[hit], scores[hit]
+
+        total = len(rows)
+        k = min(limit, total)
+        if k == 0:
+            return [], total
+        best = np.argpartition(-scores, k - 1)[:k] if k < total else np.arange(total)
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self.meta[int(rows[i])], float(scores[i])) for i in best], total
+
+    def lexical_knn(
+        self,
+        terms: list[str],
+        top_k: int,
+        doc_id: Optional[str] = None,
+    ) -> list[tuple[ChunkMeta, float]]:
+        """Best *top_k* chunks by BM25 (raw scores, not normalised)."""
+        return [
+            (self.meta[self.ranges[did][0] + pos], score)
+            for did, pos, score in self.lexical.search(terms, top_k, doc_id)
+        ]
+
+    def hybrid_candidates(
+        self,
+        q_vec: np.ndarray,
+        terms: list[str],
+        depth: int,
+        doc_id: Optional[str] = None,
+        route_top_docs: int = 0,
+    ) -> list[tuple[ChunkMeta, float, float]]:
+        """
+        The union of the *depth* best chunks by cosine and by BM25, each as
+        (ChunkMeta, cosine, BM25) with both scores computed exactly, for
+        lexical.fuse().
+        """
+        rows, _ = self._knn_rows(q_vec, depth, doc_id, route_top_docs)
+        bm25 = {
+            self.ranges[did][0] + pos: score
+            for did, pos, score in self.lexical.search(terms, depth, doc_id)
+        }
+        candidates = np.union1d(rows, np.fromiter(bm25, dtype=np.int64, count=len(bm25)))
+        cosine = self.vectors[candidates] @ q_vec[0]
+        out = []
+        for row, cos in zip(candidates.tolist(), cosine.tolist()):
+            meta = self.meta[row]
+            score = bm25.get(row)
+            if score is None:
+                score = self.lexical.score(terms, meta.doc_id, row - self.ranges[meta.doc_id][0])
+            out.append((meta, cos, score))
+        return out
+
+
+_NO_ROWS = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype="float32"))
+
+
+def _search_snapshots(
+    snaps: list[IndexSnapshot],
+    embed,
+    query: str,
+    doc_id: Optional[str],
+    top_k: int,
+    mode: str = "vector",
+    alpha: float = HYBRID_ALPHA,
+    fast_path: bool = False,
+    route_top_docs: int = 0,
+    fan_out=map,
+    lexical_query: Optional[str] = None,
+) -> list[tuple[ChunkMeta, float]]:
+    """
+    Search one or more snapshots (shards) in *mode* and merge their hits.
+    *embed* encodes *query* (skipped when the lexical fast path answers);
+    BM25 matches the terms of *lexical_query* (default: *query*).  *fan_out*
+    maps a function over the snapshots (a thread pool's map for parallel
+    shards).
+    """
+    terms = tokenize(query if lexical_query is None else lexical_query) \
+        if mode == "hybrid" or fast_path else []
+
+    if fast_path and terms:
+        with STAGE_SECONDS.time("lexical_search"):
+            hits = heapq.nlargest(
+                top_k,
+                chain.from_iterable(fan_out(lambda s: s.lexical_knn(terms, top_k, doc_id), snaps)),
+                key=lambda hit: hit[1],
+            )
+        if hits and fast_path_confident(terms, hits[0][0].text, [s.lexical for s in snaps]):
+            SEARCHES.inc(1, "lexical")
+            # Absolute scale, so a weak match still scores low (see LexicalIndex.max_score)
+            bound = max(s.lexical.max_score(terms) for s in snaps)
+            return [(meta, score / bound) for meta, score in hits]
+
+    q_vec = embed([query])
+    if mode == "hybrid" and terms:
+        SEARCHES.inc(1, "hybrid")
+        with STAGE_SECONDS.time("faiss_search"):
+            depth = top_k * HYBRID_DEPTH
+            candidates = chain.from_iterable(fan_out(
+                lambda s: s.hybrid_candidates(q_vec, terms, depth, doc_id, route_top_docs), snaps,
+            ))
+            return fuse(candidates, top_k, alpha)
+
+    SEARCHES.inc(1, "vector")
+    with STAGE_SECONDS.time("faiss_search"):
+        if len(snaps) == 1:
+            return snaps[0].knn(q_vec, top_k, doc_id, route_top_docs=route_top_docs)
+        # Routing is per shard: each scans its own M best documents
+        partials = fan_out(lambda s: s.knn(q_vec, top_k, doc_id, route_top_docs=route_top_docs), snaps)
+        return heapq.nlargest(top_k, chain.from_iterable(partials), key=lambda hit: hit[1])
+
+
+@dataclass
+class VectorStore:
+    """
+    Copy-on-write vector storage for a set of documents.
+
+    Readers use ``snapshot`` (one attribute load, no lock); add / remove /
+    replace serialise on a lock and publish the next IndexSnapshot.
+    """
+
+    # The published generation; replaced (never mutated) by writers.
+    snapshot: IndexSnapshot = field(default_factory=IndexSnapshot.empty)
+    # Summary vectors kept per document for routing
+    representatives: int = DOC_REPRESENTATIVES
+    # Maintain a BM25 index of the chunk texts in every generation
+    lexical: bool = False
+    # Writer-side storage the next generation appends to.
+    _buffer: np.ndarray = field(
+        default_factory=lambda: np.zeros((_INITIAL_CAPACITY, EMBEDDING_DIM), dtype="float32"),
+        repr=False,
+    )
+    _meta_log: list[ChunkMeta] = field(default_factory=list, repr=False)
+    # Page number per row, parallel to _buffer
+    _pages: np.ndarray = field(default_factory=lambda: np.zeros(_INITIAL_CAPACITY, dtype=np.int32), repr=False)
+    # doc_id → its representative vectors (see doc_representatives)
+    _doc_reps: dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+    _write_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, doc_id: str, filename: str, vecs: np.ndarray, meta: list[ChunkMeta]) -> int:
+        """Append one document's rows; returns the new row count."""
+        reps = doc_representatives(vecs, self.representatives)
+        postings = DocPostings.from_texts(m.text for m in meta) if self.lexical else None
+        info = {"filename": filename, "num_chunks": len(meta), "bytes": chunk_bytes([m.text for m in meta])}
+        with self._write_lock:
+            snap = self.snapshot
+            if doc_id in snap.docs:
+                raise ValueError(f"Document '{doc_id}' is already indexed.")
+            start, stop = snap.ntotal, snap.ntotal + len(meta)
+            self._ensure_capacity(stop)
+            self._buffer[start:stop] = vecs
+            self._pages[start:stop] = [m.page_number for m in meta]
+            self._meta_log[start:] = meta
+            self._doc_reps[doc_id] = reps
+            self._publish(
+                ntotal=stop,
+                docs={**snap.docs, doc_id: info},
+                ranges={**snap.ranges, doc_id: (start, stop)},
+                lexical=snap.lexical.with_doc(doc_id, postings) if postings else snap.lexical,
+            )
+        return stop
+
+    def remove(self, doc_id: str) -> int:
+        """Drop one document's rows (surviving vectors are copied); returns the new row count."""
+        return self.remove_many([doc_id])
+
+    def remove_many(self, doc_ids: Collection[str]) -> int:
+        """Drop several documents' rows with one copy of the survivors; returns the new row count."""
+        with self._write_lock:
+            snap = self.snapshot
+            gone = set(doc_ids)
+            for doc_id in gone:
+                if doc_id not in snap.docs:
+                    raise ValueError(f"Document '{doc_id}' not found.")
+
+            # Surviving row spans, and how far each surviving document moves up
+            spans, shift, offsets, end = [], 0, {}, 0
+            for doc_id, (start, stop) in sorted(snap.ranges.items(), key=lambda item: item[1]):
+                if doc_id in gone:
+                    if start > end:
+                        spans.append((end, start))
+                    end = stop
+                    shift += stop - start
+                else:
+                    offsets[doc_id] = shift
+            if snap.ntotal > end:
+                spans.append((end, snap.ntotal))
+
+            ntotal = snap.ntotal - shift
+            capacity = max(int(ntotal * _GROWTH_FACTOR), _INITIAL_CAPACITY)
+            buffer = np.zeros((capacity, EMBEDDING_DIM), dtype="float32")
+            pages = np.zeros(capacity, dtype=np.int32)
+            meta: list[ChunkMeta] = []
+            for start, stop in spans:
+                at = len(meta)
+                buffer[at:at + stop - start] = snap.vectors[start:stop]
+                pages[at:at + stop - start] = snap.pages[start:stop]
+                meta.extend(snap.meta[start:stop])
+            self._buffer, self._pages, self._meta_log = buffer, pages, meta
+
+            lexical = snap.lexical
+            for doc_id in gone:
+                self._doc_reps.pop(doc_id, None)
+                lexical = lexical.without_doc(doc_id)
+            docs = {d: info for d, info in snap.docs.items() if d not in gone}
+            ranges = {
+                d: (a - offsets[d], b - offsets[d])
+                for d, (a, b) in snap.ranges.items()
+                if d not in gone
+            }
+            self._publish(ntotal=ntotal, docs=docs, ranges=ranges, lexical=lexical)
+        return ntotal
+
+    def replace(self, vectors: np.ndarray, meta: list[ChunkMeta], docs: dict[str, dict]) -> None:
+        """Swap in a whole corpus; rows are regrouped so each document is contiguous."""
+        doc_order = {doc_id: i for i, doc_id in enumerate(docs)}
+        rows = sorted(range(len(meta)), key=lambda r: doc_order[meta[r].doc_id])
+
+        ranges: dict[str, tuple[int, int]] = {}
+        for pos, row in enumerate(rows):
+            doc_id = meta[row].doc_id
+            first, _ = ranges.get(doc_id, (pos, pos))
+            ranges[doc_id] = (first, pos + 1)
+        reps = {
+            doc_id: doc_representatives(vectors[[rows[i] for i in range(a, b)]], self.representatives)
+            for doc_id, (a, b) in ranges.items()
+        }
+        sizes = {
+            doc_id: chunk_bytes([meta[rows[i]].text for i in range(a, b)])
+            for doc_id, (a, b) in ranges.items()
+        }
+        docs = {doc_id: {**info, "bytes": sizes.get(doc_id, 0)} for doc_id, info in docs.items()}
+        lexical = LexicalIndex.empty()
+        if self.lexical:
+            lexical = LexicalIndex.build({
+                doc_id: DocPostings.from_texts(meta[rows[i]].text for i in range(a, b))
+                for doc_id, (a, b) in ranges.items()
+            })
+
+        with self._write_lock:
+            ntotal = len(rows)
+            self._buffer = np.zeros(
+                (max(int(ntotal * _GROWTH_FACTOR), _INITIAL_CAPACITY), EMBEDDING_DIM),
+                dtype="float32",
+            )
+            if ntotal:
+                self._buffer[:ntotal] = vectors[rows]
+            self._pages = np.zeros(len(self._buffer), dtype=np.int32)
+            self._pages[:ntotal] = [meta[r].page_number for r in rows]
+            self._meta_log = [meta[r] for r in rows]
+            self._doc_reps = reps
+            self._publish(ntotal=ntotal, docs=docs, ranges=ranges, lexical=lexical)
+
+    def _ensure_capacity(self, rows: int) -> None:
+        """Grow writer storage to hold *rows*; copies into fresh arrays so
+        published snapshots keep their own."""
+        if rows <= len(self._buffer) and len(self._meta_log) == self.snapshot.ntotal:
+            return
+        n = self.snapshot.ntotal
+        capacity = max(rows, int(len(self._buffer) * _GROWTH_FACTOR), _INITIAL_CAPACITY)
+        if rows > len(self._buffer):
+            buffer = np.zeros((capacity, EMBEDDING_DIM), dtype="float32")
+            buffer[:n] = self._buffer[:n]
+            self._buffer = buffer
+            pages = np.zeros(capacity, dtype=np.int32)
+            pages[:n] = self._pages[:n]
+            self._pages = pages
+        self._meta_log = self._meta_log[:n]
+
+    def _publish(self, ntotal: int, docs: dict, ranges: dict, lexical: LexicalIndex) -> None:
+        """Swap in the next generation (caller holds _write_lock)."""
+        rep_docs = tuple(self._doc_reps)
+        counts = [len(self._doc_reps[d]) for d in rep_docs]
+        self.snapshot = IndexSnapshot(
+            vectors=self._buffer[:ntotal],
+            meta=self._meta_log,
+            ntotal=ntotal,
+            docs=MappingProxyType(docs),
+            ranges=MappingProxyType(ranges),
+            generation=self.snapshot.generation + 1,
+            reps=(np.concatenate([self._doc_reps[d] for d in rep_docs]) if rep_docs
+                  else np.zeros((0, EMBEDDING_DIM), dtype="float32")),
+            rep_owner=np.repeat(np.arange(len(rep_docs)), counts),
+            rep_docs=rep_docs,
+            lexical=lexical,
+            pages=self._pages[:ntotal],
+        )
+
+
 @dataclass
 class QAEngine:
-    """Thin wrapper around a FAISS flat index with document management."""
+    """Exhaustive-search vector store with document management."""
 
     model_name: str = MODEL_NAME
-    _model: SentenceTransformer = field(init=False, repr=False)
-    _index: faiss.IndexFlatIP = field(init=False, repr=False)
-    _meta: list[ChunkMeta] = field(default_factory=list)
-    # doc_id → {filename, num_chunks}
-    _docs: dict[str, dict] = field(default_factory=dict)
+    # >1: encode large uploads on an EncodePool of this many processes
+    encode_workers: int = field(default_factory=ingest_workers_from_env)
+    # >0: global searches scan only the chunks of this many routed documents
+    route_top_docs: int = ROUTING_TOP_DOCS
+    # "vector" or "hybrid" (BM25 + cosine), see app/lexical.py
+    search_mode: str = SEARCH_MODE
+    hybrid_alpha: float = HYBRID_ALPHA
+    # Answer confident keyword queries from BM25 without encoding them
+    lexical_fast_path: bool = LEXICAL_FAST_PATH
+    # Resident vectors + chunk text before cold documents are spilled (0 = no limit)
+    memory_budget_bytes: int = field(default_factory=memory_budget_from_env)
+    _embedder: Embedder = field(init=False, repr=False)
+    _store: VectorStore = field(default_factory=VectorStore, init=False, repr=False)
+    _encode_pool: Optional[EncodePool] = field(default=None, init=False, repr=False)
+    _encode_pool_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    # Engine this one was spawn()ed from; its model and encode pool are shared
+    _parent: Optional["QAEngine"] = field(default=None, init=False, repr=False)
+    _residency: Residency = field(init=False, repr=False)
+    # Corpus version: bumped by uploads, deletes and bundle loads, not by
+    # eviction or reload (which republish the store but change no content)
+    _generation: int = field(default=0, init=False, repr=False)
+    _generation_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
 
     def __post_init__(self):
+        if self.search_mode not in SEARCH_MODES:
+            raise ValueError(
+                f"Unknown search mode {self.search_mode!r}; expected one of {', '.join(SEARCH_MODES)}."
+            )
+        self._store.lexical = self._uses_lexical
+        self._residency = Residency(self.memory_budget_bytes)
         logger.info("Loading sentence-transformer model: %s", self.model_name)
-        self._model = SentenceTransformer(self.model_name)
-        self._index = faiss.IndexFlatIP(EMBEDDING_DIM)
-        logger.info("FAISS IndexFlatIP initialised (dim=%d)", EMBEDDING_DIM)
+        self._embedder = embedder_from_env(self.model_name)
+        logger.info("Embedding backend: %s", self._embedder.name)
+        logger.info("Exhaustive inner-product index initialised (dim=%d)", EMBEDDING_DIM)
+
+    @property
+    def _uses_lexical(self) -> bool:
+        """Whether stores must keep a BM25 index (hybrid mode or the fast path)."""
+        return self.search_mode == "hybrid" or self.lexical_fast_path
 
     def _embed(self, texts: list[str]) -> np.ndarray:
         """Return L2-normalised embeddings (shape: N × dim, dtype float32)."""
-        vecs = self._model.encode(
-            texts,
-            convert_to_numpy=True,
-            show_progress_bar=False,
-            normalize_embeddings=True,   # cosine via inner product
-        ).astype("float32")
+        with STAGE_SECONDS.time("embed"):
+            vecs = self._embedder.encode(texts)
+        CHUNKS_EMBEDDED.inc(len(texts))
+        return vecs
+
+    def _embed_chunks(self, texts: list[str], max_batch: int | None = None) -> np.ndarray:
+        """Encode document chunks for indexing: length-bucketed batches, on the
+        encode pool when encode_workers > 1, yielding to queries between
+        batches (app/compute.py).  Same output as _embed()."""
+        kwargs = {"max_batch": max_batch} if max_batch else {}
+        with STAGE_SECONDS.time("embed"):
+            vecs = encode_bucketed(
+                self._embedder, texts, pool=self._ingest_pool(),
+                before_batch=INGEST_THROTTLE.pause, **kwargs,
+            )
+        CHUNKS_EMBEDDED.inc(len(texts))
         return vecs
 
+    def _ingest_pool(self) -> Optional[EncodePool]:
+        if self._parent is not None:
+            return self._parent._ingest_pool()
+        if self.encode_workers <= 1:
+            return None
+        with self._encode_pool_lock:
+            if self._encode_pool is None:        # started on first ingest, not at import
+                self._encode_pool = EncodePool(self.model_name, self._embedder.name, self.encode_workers)
+            return self._encode_pool
+
+    def spawn(self) -> "QAEngine":
+        """
+        A new, empty engine with this one's settings that shares its embedding
+        model and ingest encode pool — one index per collection
+        (app/tenancy.py) without loading the model again.
+        """
+        child = copy.copy(self)
+        child._store = VectorStore(lexical=self._uses_lexical)
+        child._encode_pool = None
+        child._encode_pool_lock = threading.Lock()
+        child._parent = self._parent or self
+        child._residency = Residency(self.memory_budget_bytes)
+        child._generation = 0
+        child._generation_lock = threading.Lock()
+        return child
+
+    def close(self) -> None:
+        """Stop the encode pool's worker processes, if any were started, and
+        remove spilled documents."""
+        with self._encode_pool_lock:
+            if self._encode_pool is not None:
+                self._encode_pool.shutdown()
+                self._encode_pool = None
+        self._residency.close()
+
+    # ── residency (app/residency.py) ────────────────────────────────────────────
+
+    def _store_for(self, doc_id: str) -> Optional[VectorStore]:
+        """The store that holds *doc_id* (or will, once reloaded)."""
+        return self._store
+
+    def _resident_docs(self) -> dict[str, dict]:
+        return dict(self._store.snapshot.docs)
+
+    def _evicted_documents(self, resident: Mapping[str, dict]) -> list[dict]:
+        return [
+            {"doc_id": did, "filename": doc.info["filename"], "num_chunks": doc.info["num_chunks"]}
+            for did, doc in list(self._residency.evicted.items())
+            if did not in resident
+        ]
+
+    def _evicted_chunks(self) -> int:
+        return sum(doc.info["num_chunks"] for doc in list(self._residency.evicted.values()))
+
+    def _ensure_resident(self, doc_ids: Collection[str]) -> None:
+        """Before a doc-scoped search: count hot-set hits, and reload the evicted
+        documents together so reloading one can't evict another."""
+        evicted = [d for d in doc_ids if d in self._residency.evicted]
+        for doc_id in doc_ids:
+            if doc_id in evicted:
+                self._residency.record_lookup(hit=False)
+            elif self._residency.enabled:
+                store = self._store_for(doc_id)
+                if store is not None and doc_id in store.snapshot.ranges:
+                    self._residency.record_lookup(hit=True)
+                    self._residency.touch([doc_id])
+        if evicted:
+            with self._residency.lock:
+                self._reload(evicted, keep=doc_ids)
+
+    def _resident_snapshots(
+        self, doc_ids: Collection[str], take: Callable[[], list[IndexSnapshot]],
+    ) -> list[IndexSnapshot]:
+        """
+        take() the snapshots to search once every one of *doc_ids* is resident.
+        Lock-free when they are; if a concurrent reload evicted one after
+        _ensure_resident, reload again and take() under the residency lock.
+        """
+        self._ensure_resident(doc_ids)
+        snaps = take()
+        if not any(self._missing_from(doc_id, snaps) for doc_id in doc_ids):
+            return snaps
+        with self._residency.lock:
+            self._reload([d for d in doc_ids if d in self._residency.evicted], keep=doc_ids)
+            return take()
+
+    def _missing_from(self, doc_id: str, snaps: list[IndexSnapshot]) -> bool:
+        """Whether indexed *doc_id* is absent from all of *snaps*."""
+        if any(doc_id in snap.ranges for snap in snaps):
+            return False
+        store = self._store_for(doc_id)
+        return doc_id in self._residency.evicted or (
+            store is not None and doc_id in store.snapshot.ranges
+        )
+
+    def _reload(self, doc_ids: list[str], keep: Collection[str]) -> None:
+        """Load evicted *doc_ids* back, then enforce the budget without evicting
+        any of *keep* (caller holds the lock)."""
+        reloaded = False
+        for doc_id in doc_ids:
+            if doc_id not in self._residency.evicted:
+                continue                              # another search reloaded it first
+            info, vecs, meta = self._residency.load(doc_id)
+            self._store_for(doc_id).add(doc_id, info["filename"], vecs, [ChunkMeta(**m) for m in meta])
+            self._residency.discard(doc_id)
+            self._residency.reloads += 1
+            self._residency.touch([doc_id])
+            logger.info("Reloaded evicted doc_id=%s (%d chunks)", doc_id, len(meta))
+            reloaded = True
+        if reloaded:
+            self._enforce_budget(keep=keep)
+
+    def _evict(self, doc_ids: list[str]) -> None:
+        """Spill resident documents, then drop them from each store in one
+        rebuild (caller holds the lock)."""
+        by_store: dict[int, tuple[VectorStore, list[str]]] = {}
+        for doc_id in doc_ids:
+            store = self._store_for(doc_id)
+            snap = store.snapshot
+            start, stop = snap.ranges[doc_id]
+            self._residency.spill(
+                doc_id, snap.docs[doc_id], snap.vectors[start:stop],
+                [asdict(m) for m in snap.meta[start:stop]],
+            )
+            by_store.setdefault(id(store), (store, []))[1].append(doc_id)
+            logger.info("Evicted doc_id=%s (%d bytes) to stay within the memory budget",
+                        doc_id, snap.docs[doc_id]["bytes"])
+        for store, victims in by_store.values():
+            store.remove_many(victims)
+
+    def _enforce_budget(self, keep: Collection[str] = ()) -> None:
+        """Evict least recently used documents, except *keep*, until resident bytes fit the budget."""
+        if not self._residency.enabled:
+            return
+        with self._residency.lock:
+            resident = self._resident_docs()
+            used = sum(info["bytes"] for info in resident.values())
+            victims = []
+            for doc_id in self._residency.coldest(resident, keep):
+                if used <= self._residency.budget_bytes:
+                    break
+                victims.append(doc_id)
+                used -= resident[doc_id]["bytes"]
+            if victims:
+                self._evict(victims)
+
+    def _corpus_changed(self) -> None:
+        with self._generation_lock:
+            self._generation += 1
+
+    def _indexed(self, doc_id: str) -> None:
+        """After an upload: bump the generation; the new document is the most recently used one."""
+        self._corpus_changed()
+        if self._residency.enabled:
+            self._residency.touch([doc_id])
+            self._enforce_budget(keep={doc_id})
+
+    def _prepare_chunks(
+        self,
+        chunks: list[str],
+        page_numbers: list[int] | None,
+        embeddings: np.ndarray | None,
+    ) -> tuple[list[int], np.ndarray]:
+        """Validate an index_document() call; return (page_numbers, vectors)."""
+        if not chunks:
+            raise ValueError("chunks list is empty — nothing to index.")
+
+        if page_numbers is None:
+            page_numbers = [1] * len(chunks)
+
+        if len(page_numbers) != len(chunks):
+            raise ValueError("page_numbers must have the same length as chunks.")
+
+        if embeddings is None:
+            return page_numbers, self._embed_chunks(chunks)
+
+        vecs = np.ascontiguousarray(embeddings, dtype="float32")
+        if vecs.shape != (len(chunks), EMBEDDING_DIM):
+            raise ValueError(
+                f"embeddings must have shape ({len(chunks)}, {EMBEDDING_DIM}), "
+                f"got {vecs.shape}."
+            )
+        return page_numbers, vecs
+
     def index_document(
         self,
         doc_id: str,
         filename: str,
         chunks: list[str],
         page_numbers: list[int] | None = None,   # ← NEW: parallel list of page numbers
+        embeddings: np.ndarray | None = None,
     ) -> None:
         """
         Embed and index all chunks for a document.
@@ -78,20 +865,13 @@ class QAEngine:
         chunks       : list of text chunks
         page_numbers : optional parallel list mapping each chunk to its PDF page.
                        Falls back to 1 for every chunk when omitted.
+        embeddings   : optional pre-computed L2-normalised vectors (N × dim),
+                       e.g. from a batched offline ingest. Skips encoding.
         """
-        if not chunks:
-            raise ValueError("chunks list is empty — nothing to index.")
-
-        if page_numbers is None:
-            page_numbers = [1] * len(chunks)
-
-        if len(page_numbers) != len(chunks):
-            raise ValueError("page_numbers must have the same length as chunks.")
-
         logger.info(
             "Indexing doc_id=%s (%s) — %d chunks", doc_id, filename, len(chunks)
         )
-        vecs = self._embed(chunks)
+        page_numbers, vecs = self._prepare_chunks(chunks, page_numbers, embeddings)
 
         new_meta = [
             ChunkMeta(
@@ -104,42 +884,104 @@ class QAEngine:
             for i, chunk in enumerate(chunks)
         ]
 
-        self._index.add(vecs)
-        self._meta.extend(new_meta)
-        self._docs[doc_id] = {"filename": filename, "num_chunks": len(chunks)}
-        logger.info("Total vectors in index: %d", self._index.ntotal)
+        if doc_id in self._residency.evicted:
+            raise ValueError(f"Document '{doc_id}' is already indexed.")
+        ntotal = self._store.add(doc_id, filename, vecs, new_meta)
+        logger.info("Total vectors in index: %d", ntotal)
+        self._indexed(doc_id)
 
     def search(
         self,
         query: str,
         doc_id: Optional[str] = None,
         top_k: int = 5,
+        lexical_query: Optional[str] = None,
     ) -> list[tuple[ChunkMeta, float]]:
         """
         Return up to *top_k* (ChunkMeta, score) pairs, sorted by relevance.
         When *doc_id* is given, only chunks from that document are returned.
+        *lexical_query* (default: *query*) is what BM25 and the keyword fast
+        path match — /ask passes the question itself and encodes its
+        expansion, so filler words added for the embedding don't become
+        required terms.
         """
-        if self._index.ntotal == 0:
+        if doc_id:
+            snap, = self._resident_snapshots([doc_id], lambda: [self._store.snapshot])
+        else:
+            snap = self._store.snapshot
+        if snap.ntotal == 0 or (doc_id and doc_id not in snap.ranges):
             return []
+        return self._search_in([snap], query, doc_id, top_k, lexical_query=lexical_query)
 
-        q_vec = self._embed([query])
-
-        # Over-fetch when filtering so we still get top_k after the filter
-        fetch_k = self._index.ntotal if doc_id else top_k
-        scores, indices = self._index.search(q_vec, k=min(fetch_k, self._index.ntotal))
+    def _search_in(
+        self,
+        snaps: list[IndexSnapshot],
+        query: str,
+        doc_id: Optional[str],
+        top_k: int,
+        fan_out=map,
+        lexical_query: Optional[str] = None,
+    ) -> list[tuple[ChunkMeta, float]]:
+        hits = _search_snapshots(
+            snaps, self._embed, query, doc_id, top_k, lexical_query=lexical_query,
+            mode=self.search_mode, alpha=self.hybrid_alpha,
+            fast_path=self.lexical_fast_path, route_top_docs=self.route_top_docs,
+            fan_out=fan_out,
+        )
+        if self._residency.enabled:
+            self._residency.touch(meta.doc_id for meta, _ in hits)
+        return hits
 
-        results: list[tuple[ChunkMeta, float]] = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx == -1:
-                continue
-            meta = self._meta[idx]
-            if doc_id and meta.doc_id != doc_id:
-                continue
-            results.append((meta, float(score)))
-            if len(results) >= top_k:
-                break
+    def retrieve(
+        self,
+        query: str,
+        doc_ids: Optional[Collection[str]] = None,
+        pages: Optional[tuple[int, int]] = None,
+        top_k: Optional[int] = None,
+        min_score: Optional[float] = None,
+        offset: int = 0,
+        limit: int = 10,
+    ) -> tuple[list[tuple[ChunkMeta, float]], int]:
+        """
+        Retrieval without the LLM (POST /search).  Chunks are ranked by cosine
+        among the *top_k* best, or all chunks scoring at least *min_score*
+        (both may be given), limited to *doc_ids* and the inclusive page
+        range *pages*.  Returns ranks [offset, offset + limit) as
+        (ChunkMeta, score) pairs, and the number of ranked chunks.
+        """
+        if doc_ids is not None:
+            snap, = self._resident_snapshots(doc_ids, lambda: [self._store.snapshot])
+        else:
+            snap = self._store.snapshot
+        if snap.ntotal == 0:
+            return [], 0
+        return self._retrieve_in([snap], query, doc_ids, pages, top_k, min_score, offset, limit)
 
-        return results
+    def _retrieve_in(
+        self,
+        snaps: list[IndexSnapshot],
+        query: str,
+        doc_ids: Optional[Collection[str]],
+        pages: Optional[tuple[int, int]],
+        top_k: Optional[int],
+        min_score: Optional[float],
+        offset: int,
+        limit: int,
+        fan_out=map,
+    ) -> tuple[list[tuple[ChunkMeta, float]], int]:
+        want = offset + limit if top_k is None else min(offset + limit, top_k)
+        q_vec = self._embed([query])
+        SEARCHES.inc(1, "retrieval")
+        with STAGE_SECONDS.time("faiss_search"):
+            parts = list(fan_out(lambda s: s.retrieve(q_vec, want, min_score, doc_ids, pages), snaps))
+        total = sum(count for _, count in parts)
+        if top_k is not None:
+            total = min(total, top_k)
+        ranked = heapq.nlargest(want, chain.from_iterable(hits for hits, _ in parts), key=lambda hit: hit[1])
+        hits = ranked[offset:]
+        if self._residency.enabled:
+            self._residency.touch(meta.doc_id for meta, _ in hits)
+        return hits, total
 
     def answer_question(
         self,
@@ -155,7 +997,7 @@ class QAEngine:
         answer  : str   — synthesised response
         sources : list  — metadata for each chunk used
         """
-        if doc_id and doc_id not in self._docs:
+        if doc_id and doc_id not in {d["doc_id"] for d in self.list_documents()}:
             raise ValueError(f"No document with doc_id='{doc_id}' found in the index.")
 
         hits = self.search(question, doc_id=doc_id, top_k=top_k)
@@ -193,40 +1035,138 @@ class QAEngine:
         return answer, sources
 
     def delete_document(self, doc_id: str) -> None:
-        """Remove all chunks for *doc_id* and rebuild the FAISS index."""
-        if doc_id not in self._docs:
-            raise ValueError(f"Document '{doc_id}' not found.")
-
-        # Filter surviving metadata
-        surviving = [m for m in self._meta if m.doc_id != doc_id]
-
-        # Rebuild FAISS from surviving chunks
-        new_index = faiss.IndexFlatIP(EMBEDDING_DIM)
-        if surviving:
-            texts = [m.text for m in surviving]
-            vecs = self._embed(texts)
-            new_index.add(vecs)
-
-        self._index = new_index
-        self._meta = surviving
-        del self._docs[doc_id]
-        logger.info(
-            "Deleted doc_id=%s. Vectors remaining: %d", doc_id, self._index.ntotal
-        )
+        """Remove all chunks for *doc_id*; the surviving vectors are copied, not re-encoded."""
+        with self._residency.lock:
+            self._residency.forget(doc_id)
+            if self._residency.discard(doc_id):
+                self._corpus_changed()
+                logger.info("Deleted evicted doc_id=%s", doc_id)
+                return
+            ntotal = self._store.remove(doc_id)
+            self._corpus_changed()
+        logger.info("Deleted doc_id=%s. Vectors remaining: %d", doc_id, ntotal)
 
     def list_documents(self) -> list[dict]:
+        docs = self._store.snapshot.docs
         return [
             {"doc_id": did, "filename": info["filename"], "num_chunks": info["num_chunks"]}
-            for did, info in self._docs.items()
-        ]
+            for did, info in docs.items()
+        ] + self._evicted_documents(docs)
 
     def total_chunks(self) -> int:
-        return self._index.ntotal
+        """Chunks of every indexed document, evicted ones included."""
+        return self._store.snapshot.ntotal + self._evicted_chunks()
+
+    def memory_bytes(self) -> int:
+        """Size of the resident chunks (see chunk_bytes); evicted ones are on disk."""
+        return sum(info["bytes"] for info in self._store.snapshot.docs.values())
+
+    def indexed_bytes(self) -> int:
+        """Size of every indexed chunk, resident or evicted — what collection limits count."""
+        return self.memory_bytes() + sum(doc.info["bytes"] for doc in list(self._residency.evicted.values()))
+
+    @property
+    def generation(self) -> int:
+        """Corpus version; changes whenever documents are added or removed."""
+        return self._generation
 
     def get_stats(self) -> dict:
+        snap = self._store.snapshot
         return {
-            "total_documents": len(self._docs),
-            "total_chunks": self._index.ntotal,
+            "total_documents": len(self.list_documents()),
+            "total_chunks": self.total_chunks(),
             "embedding_model": self.model_name,
+            "embedding_backend": self._embedder.name,
             "embedding_dim": EMBEDDING_DIM,
-        }
\ No newline at end of file
+            "generation": self.generation,
+            "memory_bytes": self.memory_bytes(),
+            "route_top_docs": self.route_top_docs,
+            "search_mode": self.search_mode,
+            "lexical_fast_path": self.lexical_fast_path,
+            "residency": self._residency.get_stats(len(snap.docs), self.memory_bytes()),
+        }
+
+    def save_bundle(self, path: str | Path) -> None:
+        """
+        Write the index, chunk metadata and document registry to *path*.
+
+        The bundle is a directory holding ``index.faiss`` and ``meta.json``;
+        it can be opened by another process with :meth:`load_bundle`.
+        """
+        vectors, meta, docs = self._export()
+        out = Path(path)
+        out.mkdir(parents=True, exist_ok=True)
+        index = faiss.IndexFlatIP(EMBEDDING_DIM)
+        index.add(np.ascontiguousarray(vectors))
+        faiss.write_index(index, str(out / BUNDLE_INDEX_FILE))
+        payload = {
+            "version": BUNDLE_VERSION,
+            "embedding_model": self.model_name,
+            "embedding_backend": self._embedder.name,
+            "embedding_dim": EMBEDDING_DIM,
+            "docs": docs,
+            "chunks": [asdict(m) for m in meta],
+        }
+        with open(out / BUNDLE_META_FILE, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, ensure_ascii=False)
+        logger.info("Saved index bundle to %s (%d vectors)", out, len(meta))
+
+    def load_bundle(self, path: str | Path) -> None:
+        """Replace the current index contents with a bundle written by save_bundle."""
+        src = Path(path)
+        with open(src / BUNDLE_META_FILE, encoding="utf-8") as fh:
+            payload = json.load(fh)
+
+        if payload.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported bundle version: {payload.get('version')!r}")
+        if payload.get("embedding_model") != self.model_name:
+            raise ValueError(
+                f"Bundle was built with '{payload.get('embedding_model')}', "
+                f"engine uses '{self.model_name}'."
+            )
+        if payload.get("embedding_backend", "torch") != self._embedder.name:
+            logger.warning(
+                "Bundle vectors came from the %s embedding backend, queries use %s; "
+                "check agreement with `python -m app.embedders verify`.",
+                payload.get("embedding_backend", "torch"), self._embedder.name,
+            )
+
+        index = faiss.read_index(str(src / BUNDLE_INDEX_FILE))
+        meta = [ChunkMeta(**m) for m in payload["chunks"]]
+        if index.ntotal != len(meta):
+            raise ValueError(
+                f"Corrupt bundle: {index.ntotal} vectors but {len(meta)} chunk records."
+            )
+
+        vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else None
+        self._import(vectors, meta, payload["docs"])
+        logger.info(
+            "Loaded index bundle from %s — %d documents, %d vectors",
+            src, len(payload["docs"]), len(meta),
+        )
+
+    def _export(self) -> tuple[np.ndarray, list[ChunkMeta], dict[str, dict]]:
+        """Current corpus as (vectors, chunk metadata, doc registry), rows aligned."""
+        with self._residency.lock:
+            snap = self._store.snapshot
+            return self._with_evicted(snap.vectors, snap.meta[:snap.ntotal], dict(snap.docs))
+
+    def _with_evicted(
+        self, vectors: np.ndarray, meta: list[ChunkMeta], docs: dict[str, dict],
+    ) -> tuple[np.ndarray, list[ChunkMeta], dict[str, dict]]:
+        """Append evicted documents, read back from disk, to an export (caller holds the lock)."""
+        parts = [vectors]
+        for doc_id in list(self._residency.evicted):
+            if doc_id not in docs:
+                info, vecs, chunks = self._residency.load(doc_id)
+                parts.append(vecs)
+                meta = meta + [ChunkMeta(**m) for m in chunks]
+                docs[doc_id] = info
+        return (np.concatenate(parts) if len(parts) > 1 else vectors), meta, docs
+
+    def _import(self, vectors: np.ndarray | None, meta: list[ChunkMeta], docs: dict[str, dict]) -> None:
+        """Replace the corpus with rows-aligned (vectors, meta) and a doc registry."""
+        self._residency.clear()
+        self._store.replace(vectors, meta, docs)
+        self._corpus_changed()
+        self._enforce_budget()
@@ -0,0 +1,243 @@
+"""
+Offline bulk ingest — build a ready-to-load index bundle from many PDFs.
+
+Usage
+-----
+    python -m app.ingest ./pdfs --out ./bundle
+    python -m app.ingest manifest.txt --out ./bundle --workers 8 --batch-size 512
+    python -m app.ingest ./pdfs --out ./bundle --encode-workers 4
+
+Pipeline
+--------
+1. Collect PDFs from a directory (recursive) or a manifest file
+   (one path per line, relative to the manifest, '#' starts a comment).
+2. Extract pages + chunk them in a process pool — pdfplumber is pure Python
+   and CPU-bound, so each worker handles whole PDFs on its own core.
+3. Embed all chunks in length-bucketed batches — in this process, or on
+   --encode-workers processes with a model copy each (see app/embedders.py).
+4. Index every document into a fresh QAEngine and write it with
+   QAEngine.save_bundle().  Start the server with INDEX_BUNDLE=<dir> to load it.
+
+Throughput (pages/s, chunks/s) and peak RSS are reported at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import resource
+import shutil
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .engine import QAEngine
+from .utils import chunk_text_with_pages, extract_pages_from_pdf
+
+logger = logging.getLogger(__name__)
+
+# Same layout and UPLOAD_DIR override as main.UPLOAD_DIR so /topics can find ingested PDFs.
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "").strip() or Path(__file__).parent / "uploads")
+
+DEFAULT_EMBED_BATCH_SIZE = 512
+
+
+@dataclass
+class ExtractedDoc:
+    path: Path
+    num_pages: int
+    chunks: list[str]
+    page_numbers: list[int]
+
+
+def _extract_worker(path: str) -> tuple[str, int, list[tuple[str, int]]]:
+    """Process-pool entry point: PDF -> (path, page_count, chunk/page pairs)."""
+    pages = extract_pages_from_pdf(path)
+    return path, len(pages), chunk_text_with_pages(pages)
+
+
+def collect_pdfs(source: str | Path) -> list[Path]:
+    """Resolve a directory or manifest file into a list of PDF paths."""
+    src = Path(source)
+    if src.is_dir():
+        return sorted(p for p in src.rglob("*") if p.suffix.lower() == ".pdf")
+
+    if not src.exists():
+        raise FileNotFoundError(f"Source not found: {src}")
+
+    paths: list[Path] = []
+    for raw in src.read_text(encoding="utf-8").splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        p = Path(line)
+        paths.append(p if p.is_absolute() else src.parent / p)
+    return paths
+
+
+def extract_all(paths: list[Path], workers: int | None = None) -> list[ExtractedDoc]:
+    """Extract and chunk *paths* in a process pool; failures are logged and skipped."""
+    docs: list[ExtractedDoc] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_extract_worker, str(p)): p for p in paths}
+        for fut in as_completed(futures):
+            path = futures[fut]
+            try:
+                _, num_pages, pairs = fut.result()
+            except Exception as exc:
+                logger.error("Skipping %s: %s", path, exc)
+                continue
+            if not pairs:
+                logger.warning("Skipping %s: no extractable text.", path)
+                continue
+            docs.append(
+                ExtractedDoc(
+                    path=path,
+                    num_pages=num_pages,
+                    chunks=[c for c, _ in pairs],
+                    page_numbers=[p for _, p in pairs],
+                )
+            )
+    # as_completed order is non-deterministic; keep the bundle stable.
+    docs.sort(key=lambda d: str(d.path))
+    return docs
+
+
+def embed_all(engine: QAEngine, docs: list[ExtractedDoc], batch_size: int) -> np.ndarray:
+    """Embed every chunk of every document, at most *batch_size* per batch,
+    in document order."""
+    texts = [c for d in docs for c in d.chunks]
+    if not texts:
+        return np.empty((0, 0), dtype="float32")
+    return engine._embed_chunks(texts, max_batch=batch_size)
+
+
+def _peak_rss_mb() -> tuple[float, float]:
+    """Peak RSS of this process and of the (largest) reaped worker, in MiB."""
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return own, children
+
+
+def build_bundle(
+    source: str | Path,
+    out: str | Path,
+    workers: int | None = None,
+    batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+    copy_uploads: bool = True,
+    encode_workers: int | None = None,
+    upload_dir: str | Path | None = None,
+) -> dict:
+    """
+    Run the full offline pipeline and return a stats dict.  With
+    *copy_uploads*, the PDFs are copied into *upload_dir* (default
+    UPLOAD_DIR) — point it at the serving process's UPLOAD_DIR.
+    """
+    upload_dir = Path(upload_dir) if upload_dir is not None else UPLOAD_DIR
+    t0 = time.perf_counter()
+    paths = collect_pdfs(source)
+    logger.info("Found %d PDF(s) in %s", len(paths), source)
+
+    docs = extract_all(paths, workers=workers)
+    t_extract = time.perf_counter()
+
+    # The offline build holds the whole corpus; MEMORY_BUDGET_MB is for serving.
+    options = {"memory_budget_bytes": 0}
+    if encode_workers is not None:
+        options["encode_workers"] = encode_workers
+    engine = QAEngine(**options)
+    t_model = time.perf_counter()
+    try:
+        vecs = embed_all(engine, docs, batch_size)
+        t_embed = time.perf_counter()
+
+        offset = 0
+        for doc in docs:
+            doc_id = str(uuid.uuid4())
+            n = len(doc.chunks)
+            engine.index_document(
+                doc_id=doc_id,
+                filename=doc.path.name,
+                chunks=doc.chunks,
+                page_numbers=doc.page_numbers,
+                embeddings=vecs[offset : offset + n],
+            )
+            offset += n
+            if copy_uploads:
+                upload_dir.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(doc.path, upload_dir / f"{doc_id}_{doc.path.name}")
+
+        engine.save_bundle(out)
+    finally:
+        engine.close()
+    t_end = time.perf_counter()
+
+    num_pages = sum(d.num_pages for d in docs)
+    num_chunks = sum(len(d.chunks) for d in docs)
+    extract_s = t_extract - t0
+    embed_s = t_embed - t_model
+    rss_self, rss_workers = _peak_rss_mb()
+    return {
+        "documents": len(docs),
+        "skipped": len(paths) - len(docs),
+        "pages": num_pages,
+        "chunks": num_chunks,
+        "extract_seconds": round(extract_s, 3),
+        "embed_seconds": round(embed_s, 3),
+        "total_seconds": round(t_end - t0, 3),
+        "pages_per_second": round(num_pages / extract_s, 1) if extract_s else 0.0,
+        "chunks_per_second": round(num_chunks / embed_s, 1) if embed_s else 0.0,
+        "peak_rss_mb": round(rss_self, 1),
+        "peak_worker_rss_mb": round(rss_workers, 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.ingest",
+        description="Bulk-ingest PDFs into an index bundle the server can load at startup.",
+    )
+    parser.add_argument("source", help="Directory of PDFs or a manifest file (one path per line).")
+    parser.add_argument("--out", required=True, help="Output bundle directory.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Extraction processes (default: all cores).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_EMBED_BATCH_SIZE,
+                        help="Maximum chunks per embedding batch.")
+    parser.add_argument("--encode-workers", type=int, default=None,
+                        help="Embedding processes (default: INGEST_ENCODE_WORKERS, 0 = in-process).")
+    parser.add_argument("--no-copy", action="store_true",
+                        help="Don't copy PDFs into the upload dir (disables /topics for them).")
+    parser.add_argument("--upload-dir", default=None,
+                        help="Where to copy the PDFs (default: UPLOAD_DIR, else app/uploads).")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    stats = build_bundle(
+        args.source,
+        args.out,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        copy_uploads=not args.no_copy,
+        encode_workers=args.encode_workers,
+        upload_dir=args.upload_dir,
+    )
+
+    print(f"Bundle written to {args.out}")
+    print(f"  documents : {stats['documents']} ({stats['skipped']} skipped)")
+    print(f"  pages     : {stats['pages']}  ({stats['pages_per_second']} pages/s)")
+    print(f"  chunks    : {stats['chunks']}  ({stats['chunks_per_second']} chunks/s)")
+    print(f"  total     : {stats['total_seconds']} s")
+    print(f"  peak RSS  : {stats['peak_rss_mb']} MiB (largest worker {stats['peak_worker_rss_mb']} MiB)")
+    return 0 if stats["documents"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Lexical (BM25) index — exact-term retrieval next to the vector index.
+
+Questions that hinge on a product name, a model number or a rare word
+("astigmatism") are matched best by the words themselves; a sentence
+embedding blurs them.  Each IndexSnapshot (engine.py) carries a
+LexicalIndex built from the same chunks, published in the same generation,
+so lexical and vector hits always describe the same corpus.
+
+Structure
+─────────
+• DocPostings — one document's inverted lists in CSR form: an interned
+  term → slot dict, and flat arrays of chunk positions (within the
+  document) and term frequencies sliced by per-slot offsets, plus each
+  chunk's token count.  Built once when the document is indexed, never
+  modified; about 100 bytes per distinct term per document.
+• LexicalIndex — immutable map doc_id → DocPostings plus corpus statistics
+  (chunk frequency per term, chunk count, total tokens).  with_doc() /
+  without_doc() return a new index sharing every other document's
+  postings, so a write costs one document's postings plus a copy of the
+  term-frequency table.
+
+Scoring is Okapi BM25 (k1 = 1.2, b = 0.75) over chunks.  Tokens are
+lower-cased runs of letters / digits, minus a short stop-word list.
+
+Search modes (engine.py)
+────────────────────────
+vector   cosine only (default)
+hybrid   candidates from both indexes, fused as
+         HYBRID_ALPHA · cosine + (1 − HYBRID_ALPHA) · BM25 / best BM25
+         so scores stay on the 0–1 scale the LLM layer thresholds on
+fast path (LEXICAL_FAST_PATH=1) — before encoding the query, if it has at
+         most LEXICAL_FAST_PATH_MAX_TERMS terms, the best lexical hit
+         contains all of them and at least one is rare (in at most
+         LEXICAL_RARE_FRACTION of chunks), the lexical hits are returned
+         without running the model.  Their scores are BM25 divided by the
+         query's BM25 ceiling (LexicalIndex.max_score): about 0.45 for an
+         average-length chunk holding each term once, lower for longer
+         chunks and partial matches — never a constant 1.0, so the LLM
+         layer's low-confidence threshold still applies.
+
+Terms come from the text the caller asks to match: /ask passes the
+question itself, not its expansion for the embedding, so words such as
+"details and explanation" are neither required by the fast path nor
+scored by BM25.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import re
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SEARCH_MODES = ("vector", "hybrid")
+SEARCH_MODE = os.getenv("SEARCH_MODE", "vector").strip().lower()
+HYBRID_ALPHA = float(os.getenv("HYBRID_ALPHA", "0.5"))
+# Candidates taken from each index before fusing, per requested hit
+HYBRID_DEPTH = 4
+
+LEXICAL_FAST_PATH = os.getenv("LEXICAL_FAST_PATH", "0").strip().lower() in ("1", "true", "yes")
+LEXICAL_FAST_PATH_MAX_TERMS = int(os.getenv("LEXICAL_FAST_PATH_MAX_TERMS", "4"))
+LEXICAL_RARE_FRACTION = float(os.getenv("LEXICAL_RARE_FRACTION", "0.01"))
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in is it its
+me my no not of on or our should so that the their then there these this to was
+we what when where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+@dataclass(frozen=True)
+class DocPostings:
+    """One document's inverted lists (positions are chunk offsets in the document)."""
+
+    slots: Mapping[str, int]        # term → slot
+    offsets: np.ndarray             # slot → [offsets[slot], offsets[slot + 1]) in the arrays below
+    positions: np.ndarray           # chunk positions, ascending within a slot
+    tf: np.ndarray                  # term frequency at each position
+    lengths: np.ndarray             # tokens per chunk
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str]) -> "DocPostings":
+        postings: dict[str, list[tuple[int, int]]] = {}
+        lengths = []
+        for i, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((i, tf))
+        slots = {sys.intern(term): slot for slot, term in enumerate(postings)}
+        flat = [p for term in postings for p in postings[term]]
+        offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in postings])
+        return cls(
+            slots=slots,
+            offsets=offsets,
+            positions=np.array([p for p, _ in flat], dtype=np.int32),
+            tf=np.array([f for _, f in flat], dtype=np.float32),
+            lengths=np.array(lengths, dtype=np.float32),
+        )
+
+    def posting(self, term: str) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """(positions, tf) for *term*, or None."""
+        slot = self.slots.get(term)
+        if slot is None:
+            return None
+        a, b = self.offsets[slot], self.offsets[slot + 1]
+        return self.positions[a:b], self.tf[a:b]
+
+    def chunk_frequencies(self) -> Iterable[tuple[str, int]]:
+        """(term, chunks containing it) for every term of the document."""
+        counts = np.diff(self.offsets)
+        return ((term, int(counts[slot])) for term, slot in self.slots.items())
+
+
+@dataclass(frozen=True)
+class LexicalIndex:
+    """BM25 statistics and postings for one index generation."""
+
+    docs: Mapping[str, DocPostings]
+    df: Mapping[str, int]          # term → chunks containing it
+    n_chunks: int
+    total_length: float
+
+    @classmethod
+    def empty(cls) -> "LexicalIndex":
+        return cls(MappingProxyType({}), MappingProxyType({}), 0, 0.0)
+
+    @classmethod
+    def build(cls, postings: Mapping[str, DocPostings]) -> "LexicalIndex":
+        df: dict[str, int] = {}
+        for doc in postings.values():
+            for term, chunks in doc.chunk_frequencies():
+                df[term] = df.get(term, 0) + chunks
+        return cls(
+            docs=MappingProxyType(dict(postings)),
+            df=MappingProxyType(df),
+            n_chunks=sum(len(doc.lengths) for doc in postings.values()),
+            total_length=sum(float(doc.lengths.sum()) for doc in postings.values()),
+        )
+
+    def with_doc(self, doc_id: str, postings: DocPostings) -> "LexicalIndex":
+        return self._merged(doc_id, postings, +1)
+
+    def without_doc(self, doc_id: str) -> "LexicalIndex":
+        postings = self.docs.get(doc_id)
+        return self._merged(doc_id, postings, -1) if postings is not None else self
+
+    def _merged(self, doc_id: str, postings: DocPostings, sign: int) -> "LexicalIndex":
+        df = dict(self.df)
+        for term, chunks in postings.chunk_frequencies():
+            count = df.get(term, 0) + sign * chunks
+            if count > 0:
+                df[term] = count
+            else:
+                df.pop(term, None)
+        docs = dict(self.docs)
+        if sign > 0:
+            docs[doc_id] = postings
+        else:
+            docs.pop(doc_id, None)
+        return LexicalIndex(
+            docs=MappingProxyType(docs),
+            df=MappingProxyType(df),
+            n_chunks=self.n_chunks + sign * len(postings.lengths),
+            total_length=self.total_length + sign * float(postings.lengths.sum()),
+        )
+
+    # ── scoring ─────────────────────────────────────────────────────────────────
+
+    def idf(self, term: str) -> float:
+        n = self.df.get(term, 0)
+        return math.log(1.0 + (self.n_chunks - n + 0.5) / (n + 0.5))
+
+    def max_score(self, terms: list[str]) -> float:
+        """BM25 ceiling of *terms*: every term with unbounded frequency (Σ idf · (k1 + 1))."""
+        return sum(self.idf(t) for t in set(terms)) * (BM25_K1 + 1.0) or 1.0
+
+    def _doc_scores(self, doc: DocPostings, terms: set[str], avgdl: float) -> Optional[np.ndarray]:
+        scores = None
+        for term in terms:
+            posting = doc.posting(term)
+            if posting is None:
+                continue
+            positions, tf = posting
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc.lengths[positions] / avgdl)
+            if scores is None:
+                scores = np.zeros(len(doc.lengths), dtype=np.float32)
+            scores[positions] += self.idf(term) * tf * (BM25_K1 + 1.0) / (tf + norm)
+        return scores
+
+    def search(
+        self,
+        terms: list[str],
+        top_k: int,
+        doc_id: Optional[str] = None,
+    ) -> list[tuple[str, int, float]]:
+        """Best *top_k* chunks as (doc_id, position in document, BM25 score)."""
+        unique = set(terms)
+        if not unique or not self.n_chunks:
+            return []
+        if doc_id and doc_id not in self.docs:
+            return []
+        avgdl = max(self.total_length / self.n_chunks, 1e-9)
+        docs = [(doc_id, self.docs[doc_id])] if doc_id else self.docs.items()
+
+        candidates: list[tuple[float, str, int]] = []
+        for did, doc in docs:
+            scores = self._doc_scores(doc, unique, avgdl)
+            if scores is None:
+                continue
+            hit = np.flatnonzero(scores)
+            if len(hit) > top_k:
+                hit = hit[np.argpartition(-scores[hit], top_k - 1)[:top_k]]
+            candidates.extend((float(scores[i]), did, int(i)) for i in hit)
+        return [(did, pos, score) for score, did, pos in heapq.nlargest(top_k, candidates)]
+
+    def score(self, terms: list[str], doc_id: str, position: int) -> float:
+        """BM25 of one chunk (0.0 when no term matches)."""
+        doc = self.docs.get(doc_id)
+        if doc is None or not self.n_chunks:
+            return 0.0
+        avgdl = max(self.total_length / self.n_chunks, 1e-9)
+        total = 0.0
+        for term in set(terms):
+            posting = doc.posting(term)
+            if posting is None:
+                continue
+            positions, tf = posting
+            at = np.searchsorted(positions, position)
+            if at < len(positions) and positions[at] == position:
+                f = float(tf[at])
+                norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc.lengths[position] / avgdl)
+                total += self.idf(term) * f * (BM25_K1 + 1.0) / (f + norm)
+        return float(total)
+
+
+def fast_path_confident(terms: list[str], top_text: str, indexes: list[LexicalIndex]) -> bool:
+    """Whether lexical hits can answer the query on their own (see module docstring)."""
+    unique = set(terms)
+    if not unique or len(unique) > LEXICAL_FAST_PATH_MAX_TERMS:
+        return False
+    if not unique <= set(tokenize(top_text)):
+        return False
+    n = sum(ix.n_chunks for ix in indexes)
+    rare = max(1.0, LEXICAL_RARE_FRACTION * n)
+    return any(sum(ix.df.get(t, 0) for ix in indexes) <= rare for t in unique)
+
+
+def fuse(
+    candidates: Iterable[tuple[object, float, float]],
+    top_k: int,
+    alpha: float = HYBRID_ALPHA,
+) -> list[tuple[object, float]]:
+    """
+    Best *top_k* of (item, cosine, bm25) candidates by
+    alpha · cosine + (1 − alpha) · bm25 / best bm25, as (item, fused score).
+    """
+    candidates = list(candidates)
+    best = max((bm25 for _, _, bm25 in candidates), default=0.0)
+    scale = (1.0 - alpha) / best if best > 0 else 0.0
+    fused = [(item, float(alpha * cosine + scale * bm25)) for item, cosine, bm25 in candidates]
+    return heapq.nlargest(top_k, fused, key=lambda hit: hit[1])
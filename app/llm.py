@@ -17,17 +17,74 @@ Improvements over Gemini version
 * Retry with exponential backoff on 429 rate-limit errors.
 * Context trimming per chunk to stay within token limits.
 * Clean user-facing messages for all error types.
+
+Async path
+----------
+answer_with_groq_async() uses the backend's async client and awaits its backoff, so a
+rate-limited /ask waits on the event loop instead of pinning a threadpool
+worker for up to a minute. Backoff delays carry random jitter so a burst of
+429s doesn't retry in lock-step.
+
+Streaming
+---------
+stream_answer_with_groq() yields a "meta" event (sources + confidence) as soon
+as the prompt is built, then "token" events as Groq generates them, then
+"done" — so time-to-first-byte is bounded by retrieval, not generation.
+
+Client-side budgets
+-------------------
+Every Groq request is admitted by a shared LLMRateLimiter (ratelimit.py)
+that tracks the request/token limits above over sliding windows, queues
+interactive calls ahead of batch work, and fails fast with a clear message
+when the projected wait exceeds LLM_MAX_QUEUE_WAIT_SECONDS.
+
+Context packing
+---------------
+Retrieved chunks are packed by context.pack_context(): adjacent/overlapping
+chunks of one document are merged, repeated sentences dropped, and passages
+added in score order up to CONTEXT_TOKEN_BUDGET. Tokens saved versus one
+trimmed passage per hit are logged for every question.
+
+Backends
+--------
+The transport is pluggable (backends.py, LLM_BACKEND=groq|stub). The stub
+is a deterministic local stand-in with configurable latency, streaming rate
+and injected 429/error rates, so the whole /ask path — retries, limiter,
+streaming — can be load-tested offline without an API key.
+
+Deadlines & circuit breaker
+---------------------------
+Async callers pass a resilience.Deadline covering the whole request. If the
+LLM can't answer before it expires — or the shared circuit BREAKER is open
+after repeated upstream failures — the answer degrades to the best retrieved
+passage, quoted with its page (RAGAnswer.degraded=True), so tail latency
+stays bounded while Groq is having an incident.
 """
 
 from __future__ import annotations
 
 import logging
 import os
+import random
 import time
+import asyncio
 from dataclasses import dataclass
+from typing import AsyncIterator
 
 from dotenv import load_dotenv
-from groq import Groq, RateLimitError as GroqRateLimitError
+from .backends import BackendRateLimited, LLMBackend, backend_from_env
+from .context import pack_context
+from .metrics import (
+    ANSWERS_DEGRADED,
+    LLM_CALLS,
+    LLM_CONTEXT_TOKENS_SAVED,
+    LLM_PROMPT_TOKENS,
+    LLM_RETRIES,
+    STAGE_SECONDS,
+)
+from .ratelimit import LimitExceeded, LLMRateLimiter, Priority
+from .resilience import CircuitBreaker, Deadline
+from .tokens import estimate_tokens
 from .utils import _CITED_PAGE_RE
 
 load_dotenv()
@@ -42,11 +99,34 @@ LOW_CONFIDENCE_THRESHOLD = 0.3
 SHORT_QUERY_WORD_LIMIT = 5
 
 # Trim each retrieved chunk to this many characters before sending to Groq.
+# (Only the baseline for savings reporting now — see CONTEXT_TOKEN_BUDGET.)
 MAX_CHARS_PER_CHUNK = 800
 
+# Token budget for the packed context passages in each prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", "1500"))
+
 # Retry settings for 429 rate-limit errors
 MAX_RETRIES = 3
 RETRY_BACKOFF_SECONDS = [5, 15, 30]
+# Each backoff is scaled by a random factor in [1 - j, 1 + j]
+RETRY_JITTER_FRACTION = 0.25
+
+# Client-side budgets (defaults mirror the free-tier limits above)
+REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "6000"))
+TOKENS_PER_MINUTE   = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "6000"))
+REQUESTS_PER_DAY    = int(os.getenv("GROQ_REQUESTS_PER_DAY", "14400"))
+TOKENS_PER_DAY      = int(os.getenv("GROQ_TOKENS_PER_DAY", "500000"))
+# Fail fast instead of queueing longer than this for budget
+MAX_QUEUE_WAIT_SECONDS = float(os.getenv("LLM_MAX_QUEUE_WAIT_SECONDS", "20"))
+# Completion size reserved up front; corrected with real usage afterwards
+EXPECTED_COMPLETION_TOKENS = 400
+
+# Circuit breaker: skip the LLM for a cool-down after repeated failures
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN_SECONDS  = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+# A deadline timeout counts as an upstream failure when the LLM call itself
+# had been running for at least this share of the request's deadline
+UPSTREAM_TIMEOUT_SHARE = 0.5
 
 SYSTEM_PROMPT = (
     "You are a friendly and knowledgeable call center assistant for an ACUVUE contact lens support line. "
@@ -67,17 +147,21 @@ SYSTEM_PROMPT = (
 
 
 
-def _init_client() -> Groq | None:
-    api_key = os.getenv("GROQ_API_KEY", "").strip()
-    if not api_key:
-        logger.warning("GROQ_API_KEY is not set. /ask will return a config error.")
-        return None
-    client = Groq(api_key=api_key)
-    logger.info("Groq client initialised (model=%s)", GROQ_MODEL)
-    return client
+BACKEND: LLMBackend = backend_from_env(GROQ_MODEL)
 
+LIMITER = LLMRateLimiter(
+    requests_per_minute=REQUESTS_PER_MINUTE,
+    tokens_per_minute=TOKENS_PER_MINUTE,
+    requests_per_day=REQUESTS_PER_DAY,
+    tokens_per_day=TOKENS_PER_DAY,
+    max_wait_seconds=MAX_QUEUE_WAIT_SECONDS,
+)
 
-_client: Groq | None = _init_client()
+BREAKER = CircuitBreaker(
+    "llm",
+    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    cooldown_seconds=BREAKER_COOLDOWN_SECONDS,
+)
 
 
 
@@ -85,42 +169,203 @@ class RateLimitError(Exception):
     """Raised when all retries are exhausted due to 429 responses."""
 
 
-def _call_groq_with_retry(prompt: str) -> str:
+class _UpstreamClock:
+    """Start and end of the latest upstream call, for the circuit breaker."""
+
+    def __init__(self):
+        self.started: float | None = None
+        self.finished: float | None = None
+
+    def start(self) -> None:
+        self.started, self.finished = time.monotonic(), None
+
+    def stop(self) -> None:
+        self.finished = time.monotonic()
+
+    def used_up(self, deadline: Deadline) -> bool:
+        """Whether the latest upstream call took most of *deadline* (the
+        rest went to retrieval, the limiter queue or backoff)."""
+        if self.started is None:
+            return False
+        end = self.finished if self.finished is not None else time.monotonic()
+        return end - self.started >= UPSTREAM_TIMEOUT_SHARE * deadline.seconds
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Backoff for *attempt* (0-based) with +/- RETRY_JITTER_FRACTION jitter."""
+    base = RETRY_BACKOFF_SECONDS[min(attempt, len(RETRY_BACKOFF_SECONDS) - 1)]
+    return base * random.uniform(1 - RETRY_JITTER_FRACTION, 1 + RETRY_JITTER_FRACTION)
+
+
+def _estimate_request_tokens(prompt: str) -> int:
+    """Prompt (system + user) plus the expected completion, for budgeting."""
+    return (
+        estimate_tokens(SYSTEM_PROMPT)
+        + estimate_tokens(prompt)
+        + EXPECTED_COMPLETION_TOKENS
+    )
+
+
+def _chat_messages(prompt: str) -> list[dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user",   "content": prompt},
+    ]
+
+
+def _on_rate_limited(attempt: int, exc: Exception) -> float:
+    """Return the jittered backoff before the next retry, or give up."""
+    LLM_CALLS.inc(1, "rate_limited")
+    if attempt >= MAX_RETRIES:
+        logger.error("All %d retries exhausted due to rate limiting.", MAX_RETRIES)
+        raise RateLimitError(str(exc)) from exc
+    LLM_RETRIES.inc()
+    wait = _backoff_delay(attempt)
+    logger.warning(
+        "Rate limit hit (attempt %d/%d). Retrying in %.1fs...",
+        attempt + 1, MAX_RETRIES, wait,
+    )
+    # Other callers get a short pause; this one sleeps its own jittered
+    # backoff, so retries don't all land on the same instant.
+    LIMITER.note_throttled(wait)
+    return wait
+
+
+def _call_groq_with_retry(
+    prompt: str,
+    priority: Priority = Priority.INTERACTIVE,
+) -> str:
     """
-    Call Groq and retry up to MAX_RETRIES times on 429 errors.
+    Call the LLM backend and retry up to MAX_RETRIES times on 429 errors.
     Raises RateLimitError if all retries are exhausted.
+    Raises LimitExceeded if the client-side budget can't admit the call in time.
     Raises the original exception for any other error type.
     """
-    if _client is None:
+    if not BACKEND.available:
         raise RuntimeError("Groq client is not initialised (missing GROQ_API_KEY).")
 
+    estimate = _estimate_request_tokens(prompt)
     for attempt in range(MAX_RETRIES + 1):
+        reservation = LIMITER.acquire_sync(estimate, priority)
+        LLM_PROMPT_TOKENS.inc(estimate - EXPECTED_COMPLETION_TOKENS)
+        used = 0                        # a failed call consumed no tokens
         try:
-            response = _client.chat.completions.create(
-                model=GROQ_MODEL,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user",   "content": prompt},
-                ],
-                temperature=0.2,
-                max_tokens=1024,
-            )
-            return response.choices[0].message.content.strip()
-
-        except GroqRateLimitError as exc:
-            if attempt < MAX_RETRIES:
-                wait = RETRY_BACKOFF_SECONDS[attempt]
-                logger.warning(
-                    "Rate limit hit (attempt %d/%d). Retrying in %ds...",
-                    attempt + 1, MAX_RETRIES, wait,
+            with STAGE_SECONDS.time("llm_call"):
+                completion = BACKEND.complete(
+                    _chat_messages(prompt), temperature=0.2, max_tokens=1024
                 )
-                time.sleep(wait)
-            else:
-                logger.error("All %d retries exhausted due to rate limiting.", MAX_RETRIES)
-                raise RateLimitError(str(exc)) from exc
+            used = completion.total_tokens
+        except BackendRateLimited as exc:
+            wait = _on_rate_limited(attempt, exc)
+        except Exception:
+            LLM_CALLS.inc(1, "error")
+            raise
+        else:
+            LLM_CALLS.inc(1, "ok")
+            return completion.text
+        finally:
+            LIMITER.settle(reservation, used)
+        time.sleep(wait)
+
+
+async def _acall_groq_with_retry(
+    prompt: str,
+    priority: Priority = Priority.INTERACTIVE,
+    clock: _UpstreamClock | None = None,
+) -> str:
+    """
+    Async twin of _call_groq_with_retry().
+    Budget waits and backoff use asyncio.sleep, so waiting callers hold no threads.
+    *clock* records when each upstream call starts, for the circuit breaker.
+    """
+    clock = clock or _UpstreamClock()
+    if not BACKEND.available:
+        raise RuntimeError("Groq client is not initialised (missing GROQ_API_KEY).")
 
+    estimate = _estimate_request_tokens(prompt)
+    for attempt in range(MAX_RETRIES + 1):
+        reservation = await LIMITER.acquire(estimate, priority)
+        LLM_PROMPT_TOKENS.inc(estimate - EXPECTED_COMPLETION_TOKENS)
+        used = 0                        # a failed call consumed no tokens
+        clock.start()
+        try:
+            with STAGE_SECONDS.time("llm_call"):
+                completion = await BACKEND.acomplete(
+                    _chat_messages(prompt), temperature=0.2, max_tokens=1024
+                )
+            used = completion.total_tokens
+        except BackendRateLimited as exc:
+            wait = _on_rate_limited(attempt, exc)
         except Exception:
-            raise   # non-rate-limit errors bubble up immediately
+            LLM_CALLS.inc(1, "error")
+            raise
+        else:
+            LLM_CALLS.inc(1, "ok")
+            return completion.text
+        finally:
+            clock.stop()
+            LIMITER.settle(reservation, used)
+        await asyncio.sleep(wait)
+
+
+async def _astream_groq_with_retry(
+    prompt: str,
+    priority: Priority = Priority.INTERACTIVE,
+    clock: _UpstreamClock | None = None,
+) -> AsyncIterator[str]:
+    """
+    Stream completion tokens from the LLM backend.
+
+    429s are only retried while opening the stream (before any token was
+    produced); a failure mid-stream propagates to the caller.  *clock* runs
+    from opening the stream until it ends.
+    """
+    clock = clock or _UpstreamClock()
+    if not BACKEND.available:
+        raise RuntimeError("Groq client is not initialised (missing GROQ_API_KEY).")
+
+    estimate = _estimate_request_tokens(prompt)
+    for attempt in range(MAX_RETRIES + 1):
+        reservation = await LIMITER.acquire(estimate, priority)
+        LLM_PROMPT_TOKENS.inc(estimate - EXPECTED_COMPLETION_TOKENS)
+        stream = BACKEND.astream(_chat_messages(prompt), temperature=0.2, max_tokens=1024)
+        clock.start()
+        try:
+            with STAGE_SECONDS.time("llm_first_token"):
+                first = await stream.__anext__()
+        except StopAsyncIteration:
+            clock.stop()
+            LIMITER.settle(reservation, estimate - EXPECTED_COMPLETION_TOKENS)
+            return
+        except BackendRateLimited as exc:
+            clock.stop()
+            LIMITER.settle(reservation, 0)
+            await stream.aclose()
+            wait = _on_rate_limited(attempt, exc)
+        except BaseException as exc:
+            clock.stop()
+            LIMITER.settle(reservation, 0)
+            if isinstance(exc, Exception):
+                LLM_CALLS.inc(1, "error")
+            raise
+        else:
+            LLM_CALLS.inc(1, "ok")
+            break
+        await asyncio.sleep(wait)
+
+    completion_tokens = estimate_tokens(first)
+    try:
+        yield first
+        async for delta in stream:
+            completion_tokens += estimate_tokens(delta)
+            yield delta
+    finally:
+        clock.stop()
+        # Also on a mid-stream error or disconnect: bill what was produced.
+        LIMITER.settle(
+            reservation,
+            estimate - EXPECTED_COMPLETION_TOKENS + completion_tokens,
+        )
 
 
 def _trim_chunk(text: str, max_chars: int = MAX_CHARS_PER_CHUNK) -> str:
@@ -164,7 +409,8 @@ def expand_query(question: str) -> str:
 
 def get_expanded_query(question: str) -> str:
     """Public helper for main.py to get the expanded query for FAISS search."""
-    return expand_query(question)
+    with STAGE_SECONDS.time("query_expansion"):
+        return expand_query(question)
 
 
 
@@ -174,19 +420,23 @@ class RAGAnswer:
     sources: list[str]          # e.g. ["Page 23", "Page 28"]
     confidence: float
     expanded_query: str | None
+    degraded: bool = False      # True when answered extractively without the LLM
 
 
-def answer_with_groq(
-    question: str,
-    hits: list[tuple],          # list of (ChunkMeta, score) from engine.search()
-) -> RAGAnswer:
-    """
-    Run the full RAG pipeline for one question using Groq + Llama 3.3 70B.
+@dataclass
+class _RAGPrompt:
+    """A grounded prompt ready to send, plus what the answer will carry."""
+    prompt: str
+    sources: list[str]
+    confidence: float
+    expanded_query: str
+    top_hit: tuple              # (ChunkMeta, score) used for extractive fallback
 
-    Parameters
-    ----------
-    question : original user question (used in the prompt as-is)
-    hits     : ranked (ChunkMeta, score) tuples — retrieve with expanded query
+
+def _prepare_rag(question: str, hits: list[tuple]) -> RAGAnswer | _RAGPrompt:
+    """
+    Build the grounded prompt for *question*, or return a final RAGAnswer
+    when no LLM call is needed (no hits / low confidence / no client).
     """
     expanded = expand_query(question)
 
@@ -220,15 +470,11 @@ def answer_with_groq(
     #    the top score so low-relevance hits don't pollute the sources list.
     SOURCE_SCORE_MARGIN = 0.15
 
-    context_blocks: list[str] = []
     source_labels:  list[str] = []
     seen_pages:     set[int]  = set()
 
-    for rank, (meta, score) in enumerate(hits, start=1):
-        page_label   = f"Page {meta.page_number}"
-        trimmed_text = _trim_chunk(meta.text)
-        # Always pass chunk to LLM as context regardless of citation status
-        context_blocks.append(f"[Passage {rank} | {page_label}]\n{trimmed_text}")
+    for meta, score in hits:
+        page_label = f"Page {meta.page_number}"
         # Only surface as a cited source if BOTH conditions are met:
         # a) chunk has an explicit inline page citation (not a physical fallback)
         # b) chunk score is close to the top score
@@ -239,10 +485,23 @@ def answer_with_groq(
                 source_labels.append(page_label)
                 seen_pages.add(meta.page_number)
 
-    context = "\n\n".join(context_blocks)
-    prompt  = f"Context:\n{context}\n\nQuestion:\n{question}"
-
-    if _client is None:
+    # Every hit is eligible as context regardless of citation status;
+    # the packer merges neighbours, drops repeats and enforces the budget.
+    with STAGE_SECONDS.time("prompt_build"):
+        packed = pack_context(
+            hits,
+            token_budget=CONTEXT_TOKEN_BUDGET,
+            naive_cost=lambda meta: estimate_tokens(_trim_chunk(meta.text)),
+        )
+        context_blocks = [
+            f"[Passage {rank} | {p.page_label}]\n{p.text}"
+            for rank, p in enumerate(packed.passages, start=1)
+        ]
+        context = "\n\n".join(context_blocks)
+        prompt  = f"Context:\n{context}\n\nQuestion:\n{question}"
+    LLM_CONTEXT_TOKENS_SAVED.inc(packed.tokens_saved)
+
+    if not BACKEND.available:
         return RAGAnswer(
             answer=(
                 "The LLM is not configured. "
@@ -253,33 +512,240 @@ def answer_with_groq(
             expanded_query=expanded,
         )
 
-    try:
-        logger.debug("Sending prompt to Groq (%d chars).", len(prompt))
-        answer_text = _call_groq_with_retry(prompt)
+    return _RAGPrompt(
+        prompt=prompt,
+        sources=source_labels,
+        confidence=round(top_score, 4),
+        expanded_query=expanded,
+        top_hit=hits[0],
+    )
 
-    except RateLimitError:
-        return RAGAnswer(
-            answer=(
-                "The API rate limit has been reached. "
-                "Please wait a moment and try again."
-            ),
-            sources=source_labels,
-            confidence=round(top_score, 4),
-            expanded_query=expanded,
+
+def _error_answer(plan: _RAGPrompt, exc: Exception) -> RAGAnswer:
+    """Map an LLM failure to a user-facing RAGAnswer."""
+    if isinstance(exc, RateLimitError):
+        message = (
+            "The API rate limit has been reached. "
+            "Please wait a moment and try again."
         )
-    except Exception as exc:
-        logger.error("Groq API error: %s", exc)
-        return RAGAnswer(
-            answer=f"The language model returned an error: {exc}",
-            sources=source_labels,
-            confidence=round(top_score, 4),
-            expanded_query=expanded,
+    elif isinstance(exc, LimitExceeded):
+        LLM_CALLS.inc(1, "rejected")
+        logger.warning("LLM call rejected by client-side limiter: %s", exc)
+        message = (
+            "The assistant is handling too many questions right now. "
+            f"Please try again in about {max(1, round(exc.retry_after))} seconds."
         )
+    else:
+        logger.error("LLM backend (%s) error: %s", BACKEND.name, exc)
+        message = f"The language model returned an error: {exc}"
+    return RAGAnswer(
+        answer=message,
+        sources=plan.sources,
+        confidence=plan.confidence,
+        expanded_query=plan.expanded_query,
+    )
+
+
+def _extractive_answer(plan: _RAGPrompt, reason: str) -> RAGAnswer:
+    """Answer with the best retrieved passage, quoted with its page.
+
+    *reason* is "deadline" or "circuit_open" (also the metrics label).
+    """
+    meta, _ = plan.top_hit
+    page_label = f"Page {meta.page_number}"
+    logger.info("Answering extractively (%s).", reason)
+    ANSWERS_DEGRADED.inc(1, reason)
+    return RAGAnswer(
+        answer=(
+            f"Here's what our guide says on {page_label}:\n\n"
+            f"{_trim_chunk(meta.text)}"
+        ),
+        sources=[page_label],
+        confidence=plan.confidence,
+        expanded_query=plan.expanded_query,
+        degraded=True,
+    )
+
+
+def _record_failure(
+    exc: BaseException,
+    deadline: Deadline | None = None,
+    clock: _UpstreamClock | None = None,
+) -> None:
+    """Feed an LLM-call failure to the breaker (local rejections don't count)."""
+    if isinstance(exc, asyncio.TimeoutError) and deadline is not None and deadline.expired:
+        # A slow or hung upstream call is a failure; time lost to retrieval,
+        # the limiter queue or backoff says nothing about upstream health.
+        if clock is not None and clock.used_up(deadline):
+            BREAKER.record_failure()
+        else:
+            BREAKER.release_probe()
+    elif isinstance(exc, LimitExceeded) or not isinstance(exc, Exception):
+        # Limiter rejection, cancellation or client disconnect: no verdict.
+        BREAKER.release_probe()
+    else:
+        BREAKER.record_failure()
+
+
+def answer_with_groq(
+    question: str,
+    hits: list[tuple],          # list of (ChunkMeta, score) from engine.search()
+    priority: Priority = Priority.INTERACTIVE,
+) -> RAGAnswer:
+    """
+    Run the full RAG pipeline for one question using Groq + Llama 3.3 70B.
+
+    Parameters
+    ----------
+    question : original user question (used in the prompt as-is)
+    hits     : ranked (ChunkMeta, score) tuples — retrieve with expanded query
+    priority : limiter queue priority; use Priority.BATCH for background jobs
+    """
+    plan = _prepare_rag(question, hits)
+    if isinstance(plan, RAGAnswer):
+        return plan
+    if not BREAKER.allow():
+        return _extractive_answer(plan, "circuit_open")
+
+    try:
+        logger.debug("Sending prompt to Groq (%d chars).", len(plan.prompt))
+        answer_text = _call_groq_with_retry(plan.prompt, priority)
+    except Exception as exc:
+        _record_failure(exc)
+        return _error_answer(plan, exc)
 
-    logger.info("Groq responded successfully (top_score=%.4f).", top_score)
+    BREAKER.record_success()
+    logger.info("Groq responded successfully (top_score=%.4f).", plan.confidence)
     return RAGAnswer(
         answer=answer_text,
-        sources=source_labels,
-        confidence=round(top_score, 4),
-        expanded_query=expanded,
-    )
\ No newline at end of file
+        sources=plan.sources,
+        confidence=plan.confidence,
+        expanded_query=plan.expanded_query,
+    )
+
+
+async def answer_with_groq_async(
+    question: str,
+    hits: list[tuple],
+    priority: Priority = Priority.INTERACTIVE,
+    deadline: Deadline | None = None,
+) -> RAGAnswer:
+    """
+    Non-blocking answer_with_groq() for async endpoints (same pipeline).
+    If *deadline* expires before the LLM answers, returns an extractive answer.
+    """
+    plan = _prepare_rag(question, hits)
+    if isinstance(plan, RAGAnswer):
+        return plan
+    if deadline is not None and deadline.expired:
+        return _extractive_answer(plan, "deadline")
+    if not BREAKER.allow():
+        return _extractive_answer(plan, "circuit_open")
+
+    clock = _UpstreamClock()
+    try:
+        logger.debug("Sending prompt to Groq (%d chars).", len(plan.prompt))
+        call = _acall_groq_with_retry(plan.prompt, priority, clock)
+        if deadline is not None:
+            answer_text = await asyncio.wait_for(call, timeout=deadline.remaining())
+        else:
+            answer_text = await call
+    except asyncio.TimeoutError as exc:
+        _record_failure(exc, deadline, clock)
+        return _extractive_answer(plan, "deadline")
+    except BaseException as exc:
+        _record_failure(exc)
+        if not isinstance(exc, Exception):
+            raise
+        return _error_answer(plan, exc)
+
+    BREAKER.record_success()
+    logger.info("Groq responded successfully (top_score=%.4f).", plan.confidence)
+    return RAGAnswer(
+        answer=answer_text,
+        sources=plan.sources,
+        confidence=plan.confidence,
+        expanded_query=plan.expanded_query,
+    )
+
+
+async def stream_answer_with_groq(
+    question: str,
+    hits: list[tuple],
+    priority: Priority = Priority.INTERACTIVE,
+    deadline: Deadline | None = None,
+) -> AsyncIterator[dict]:
+    """
+    Streaming variant of answer_with_groq_async().
+
+    Yields event dicts, in order:
+      {"event": "meta",  "sources": [...], "confidence": float, "expanded_query": str}
+      {"event": "token", "text": str}            (zero or more)
+      {"event": "done", "degraded": bool}  or  {"event": "error", "message": str}
+    When no LLM call is needed (or the extractive fallback is used) the whole
+    answer arrives as a single token.
+    """
+    plan = _prepare_rag(question, hits)
+
+    fallback: RAGAnswer | None = None
+    if isinstance(plan, RAGAnswer):
+        fallback = plan
+    elif deadline is not None and deadline.expired:
+        fallback = _extractive_answer(plan, "deadline")
+    elif not BREAKER.allow():
+        fallback = _extractive_answer(plan, "circuit_open")
+
+    meta_source = fallback or plan
+    yield {
+        "event": "meta",
+        "sources": meta_source.sources,
+        "confidence": meta_source.confidence,
+        "expanded_query": meta_source.expanded_query,
+    }
+
+    if fallback is not None:
+        yield {"event": "token", "text": fallback.answer}
+        yield {"event": "done", "degraded": fallback.degraded}
+        return
+
+    produced = False
+    clock = _UpstreamClock()
+    tokens = _astream_groq_with_retry(plan.prompt, priority, clock)
+    try:
+        logger.debug("Streaming prompt to Groq (%d chars).", len(plan.prompt))
+        while True:
+            try:
+                if deadline is not None:
+                    text = await asyncio.wait_for(tokens.__anext__(), timeout=deadline.remaining())
+                else:
+                    text = await tokens.__anext__()
+            except StopAsyncIteration:
+                break
+            produced = True
+            yield {"event": "token", "text": text}
+    except asyncio.TimeoutError as exc:
+        _record_failure(exc, deadline, clock)
+        if produced:
+            yield {"event": "error", "message": "The answer took too long and was cut short."}
+        else:
+            extractive = _extractive_answer(plan, "deadline")
+            yield {"event": "token", "text": extractive.answer}
+            yield {"event": "done", "degraded": True}
+        return
+    except BaseException as exc:
+        _record_failure(exc)
+        if not isinstance(exc, Exception):
+            raise
+        message = _error_answer(plan, exc).answer
+        if produced:
+            yield {"event": "error", "message": message}
+        else:
+            yield {"event": "token", "text": message}
+            yield {"event": "done", "degraded": False}
+        return
+    finally:
+        await tokens.aclose()
+
+    BREAKER.record_success()
+    logger.info("Groq stream finished (top_score=%.4f).", plan.confidence)
+    yield {"event": "done", "degraded": False}
@@ -2,24 +2,83 @@
 PDF Question-Answering System -- FastAPI Application (RAG edition)
 """
 
+import asyncio
+import json
+import os
+import time
 import uuid
 from pathlib import Path
 from typing import Optional
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-
-from .engine import QAEngine
-from .llm import answer_with_groq, get_expanded_query
+from starlette.concurrency import run_in_threadpool
+
+from .compute import ComputePools
+from .distributed import DistributedQAEngine, ShardUnavailableError, shard_urls_from_env
+from .engine import QAEngine, UnsupportedInEngine
+from .llm import BREAKER, LIMITER, RAGAnswer, answer_with_groq_async, get_expanded_query, stream_answer_with_groq
+from .metrics import (
+    ASK_COALESCED,
+    INDEX_DOCUMENTS,
+    INDEX_VECTORS,
+    REGISTRY,
+    REQUEST_SECONDS,
+)
+from .profiling import (
+    PROFILE_HEADER,
+    PROFILE_QUERY_PARAM,
+    PROFILER,
+    PROFILES,
+    token_matches,
+)
+from .request_log import recorder_from_env
+from .resilience import Deadline
+from .shared_index import SharedIndexEngine
+from .sharded import ShardedQAEngine, shards_from_env
+from .singleflight import SingleFlight
+from .tenancy import (
+    DEFAULT_COLLECTION,
+    Collection,
+    CollectionExistsError,
+    CollectionLimits,
+    CollectionRegistry,
+    QuotaExceededError,
+)
 from .utils import extract_and_chunk_with_pages, extract_headings
 
 
-UPLOAD_DIR = Path(__file__).parent / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
+# Uploaded PDFs (kept for /topics); UPLOAD_DIR overrides the in-tree default
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "").strip() or Path(__file__).parent / "uploads")
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 RAG_TOP_K = 3   # number of chunks to retrieve for RAG
 
+# POST /search page size: default and maximum hits per response
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "100"))
+_LAST_PAGE = 2 ** 31 - 1
+
+# Overall time budget for one /ask (retrieval + LLM); past it we answer extractively
+ASK_DEADLINE_SECONDS = float(os.getenv("ASK_DEADLINE_SECONDS", "15"))
+
+# Endpoints an admin may profile on demand (see app/profiling.py)
+PROFILED_PATHS = {"/upload", "/ask", "/search"}
+
+# Optional index bundle (built offline with `python -m app.ingest`) to load at startup
+INDEX_BUNDLE = os.getenv("INDEX_BUNDLE", "").strip()
+
+# Multi-worker mode: all uvicorn workers share one memory-mapped index store
+SHARED_INDEX_DIR = os.getenv("SHARED_INDEX_DIR", "").strip()
+
+# In-process sharding: global searches scan N shards in parallel (see app/sharded.py)
+INDEX_SHARDS = shards_from_env()
+
+# Distributed mode: the index lives on shard nodes (see app/distributed.py)
+SHARD_URLS = shard_urls_from_env()
+
 
 app = FastAPI(
     title="PDF Question-Answering System",
@@ -37,13 +96,85 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-engine = QAEngine()
+if SHARD_URLS:
+    engine = DistributedQAEngine(shard_urls=SHARD_URLS)
+elif SHARED_INDEX_DIR:
+    engine = SharedIndexEngine(store_dir=SHARED_INDEX_DIR)
+elif INDEX_SHARDS > 1:
+    engine = ShardedQAEngine(num_shards=INDEX_SHARDS)
+else:
+    engine = QAEngine()
+if INDEX_BUNDLE:
+    engine.load_bundle(INDEX_BUNDLE)
+
+# Named per-tenant indexes; the engine above is the "default" collection
+collections = CollectionRegistry(engine)
+app.router.add_event_handler("shutdown", collections.close)   # stops the ingest encode pool
+
+# Uploads and queries run on separate, sized pools; ingest yields to queries
+compute = ComputePools()
+app.router.add_event_handler("shutdown", compute.shutdown)
+
+# Concurrent identical /ask calls share one retrieval + LLM call
+ask_flights = SingleFlight("ask")
+
+# Traffic recording for load-test replay (REQUEST_LOG_PATH; off by default)
+recorder = recorder_from_env()
+
+INDEX_VECTORS.set_function(lambda: collections.total_chunks())
+INDEX_DOCUMENTS.set_function(lambda: collections.total_documents())
+ASK_COALESCED.set_function(lambda: ask_flights.coalesced)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Time every request, labelled by route template (not raw path)."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    if route is not None and route.path != "/metrics":
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route.path)
+    return response
+
+
+@app.middleware("http")
+async def profile_on_request(request: Request, call_next):
+    """Profile a single /upload, /ask or /search when the admin token asks for it."""
+    if request.url.path not in PROFILED_PATHS:
+        return await call_next(request)
+    supplied = request.headers.get(PROFILE_HEADER) or request.query_params.get(PROFILE_QUERY_PARAM)
+    if not token_matches(supplied):
+        return await call_next(request)
+    session = PROFILER.begin(request.method, request.url.path)
+    if session is None:
+        return await call_next(request)
+
+    status_code = None
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        report = await run_in_threadpool(PROFILER.finish, session, status_code)
+    response.headers["X-Profile-Id"] = report.profile_id
+    return response
+
+
+@app.exception_handler(ShardUnavailableError)
+async def shard_unavailable(request: Request, exc: ShardUnavailableError):
+    """Distributed mode: the index shard this request needs is down."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+def _require_admin(request: Request) -> None:
+    if not token_matches(request.headers.get(PROFILE_HEADER)):
+        raise HTTPException(status_code=403, detail="Admin token required.")
 
 
 class QuestionRequest(BaseModel):
     question: str
     doc_id: Optional[str] = None   # None -> search all indexed documents
     top_k: int = RAG_TOP_K
+    collection: str = DEFAULT_COLLECTION
 
 
 class RAGAnswerResponse(BaseModel):
@@ -52,6 +183,8 @@ class RAGAnswerResponse(BaseModel):
     sources: list[str]          # e.g. ["Page 23", "Page 28"]
     confidence: float
     doc_id: Optional[str]
+    degraded: bool = False      # answered extractively (deadline / circuit open)
+    collection: str = DEFAULT_COLLECTION
 
 
 class UploadResponse(BaseModel):
@@ -59,6 +192,7 @@ class UploadResponse(BaseModel):
     filename: str
     num_chunks: int
     message: str
+    collection: str = DEFAULT_COLLECTION
 
 
 class DocumentInfo(BaseModel):
@@ -67,6 +201,51 @@ class DocumentInfo(BaseModel):
     num_chunks: int
 
 
+class SearchRequest(BaseModel):
+    query: str
+    collection: str = DEFAULT_COLLECTION
+    doc_ids: Optional[list[str]] = None     # None -> every document; [] -> none (no hits)
+    page_from: Optional[int] = None         # inclusive page-number range
+    page_to: Optional[int] = None
+    top_k: Optional[int] = None             # rank among the k best chunks ...
+    min_score: Optional[float] = None       # ... and / or all chunks with cosine >= min_score
+    offset: int = 0
+    limit: int = SEARCH_DEFAULT_LIMIT
+
+
+class SearchHit(BaseModel):
+    doc_id: str
+    filename: str
+    page_number: int
+    chunk_index: int
+    text: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    collection: str
+    total: int                      # chunks ranked (within top_k / above min_score)
+    offset: int
+    limit: int
+    next_offset: Optional[int]      # None on the last page
+    generation: int                 # index generation the page was read from
+    hits: list[SearchHit]
+
+
+class CollectionCreate(BaseModel):
+    name: str
+    max_documents: Optional[int] = None     # None -> COLLECTION_MAX_DOCUMENTS
+    max_memory_mb: Optional[float] = None   # None -> COLLECTION_MAX_MEMORY_MB
+
+
+def _collection(name: str) -> Collection:
+    try:
+        return collections.get(name)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=exc.args[0])
+
+
 @app.get("/", tags=["Health"])
 def root():
     return {"status": "ok", "message": "PDF QA System (RAG) is running."}
@@ -74,18 +253,63 @@ def root():
 
 @app.get("/health", tags=["Health"])
 def health():
-    return {"status": "ok", **engine.get_stats()}
+    return {
+        "status": "ok",
+        **engine.get_stats(),
+        "llm_limiter": LIMITER.get_stats(),
+        "llm_circuit": BREAKER.get_stats(),
+        "ask_coalescing": ask_flights.get_stats(),
+        "compute": compute.get_stats(),
+        "collections": len(collections),
+    }
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text-format metrics: stage latencies, counters, gauges."""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/admin/profiles", tags=["Admin"])
+def list_profiles(request: Request):
+    """Summaries of retained request profiles, newest first."""
+    _require_admin(request)
+    return {"skipped": PROFILER.skipped, "profiles": PROFILES.list()}
+
+
+@app.get("/admin/profiles/{profile_id}", tags=["Admin"])
+def get_profile(profile_id: str, request: Request, format: str = "json"):
+    """
+    One profile report.  ``format=collapsed`` returns the sampled stacks as
+    flamegraph.pl / speedscope input instead of JSON.
+    """
+    _require_admin(request)
+    report = PROFILES.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found.")
+    if format == "collapsed":
+        return Response(report.collapsed(), media_type="text/plain")
+    return report.to_dict()
 
 
 @app.post("/upload", response_model=UploadResponse, tags=["Documents"])
-async def upload_pdf(file: UploadFile = File(...)):
+async def upload_pdf(file: UploadFile = File(...), collection: str = DEFAULT_COLLECTION):
     """
     Upload a PDF file.
     The file is parsed page-by-page, chunked (with page numbers preserved),
     and indexed into FAISS. Returns a doc_id to scope future questions.
+    ``?collection=`` picks the collection; 409 when it would exceed the
+    collection's document or memory limit.
+
+    Extraction and encoding run on the ingest pool, never on the event loop
+    or the query pool, and encoding backs off while /ask latency is over
+    target (app/compute.py).
     """
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
+    target = _collection(collection)
 
     doc_id = str(uuid.uuid4())
     save_path = UPLOAD_DIR / f"{doc_id}_{file.filename}"
@@ -97,9 +321,12 @@ async def upload_pdf(file: UploadFile = File(...)):
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {exc}")
 
+    if recorder:
+        recorder.record("/upload", filename=file.filename, bytes=len(contents))
+
     # Extract and chunk with page numbers
     try:
-        chunk_page_pairs = extract_and_chunk_with_pages(str(save_path))
+        chunk_page_pairs = await compute.run_ingest(extract_and_chunk_with_pages, str(save_path))
     except Exception as exc:
         save_path.unlink(missing_ok=True)
         raise HTTPException(status_code=422, detail=f"Failed to parse PDF: {exc}")
@@ -116,12 +343,20 @@ async def upload_pdf(file: UploadFile = File(...)):
 
     # Index into FAISS
     try:
-        engine.index_document(
-            doc_id=doc_id,
-            filename=file.filename,
-            chunks=chunks,
-            page_numbers=page_numbers,
-        )
+        with target.admit(chunks):
+            await compute.run_ingest(
+                target.engine.index_document,
+                doc_id=doc_id,
+                filename=file.filename,
+                chunks=chunks,
+                page_numbers=page_numbers,
+            )
+    except QuotaExceededError as exc:
+        save_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=409, detail=str(exc))
+    except ShardUnavailableError as exc:
+        save_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=503, detail=str(exc))
     except Exception as exc:
         save_path.unlink(missing_ok=True)
         raise HTTPException(status_code=500, detail=f"Indexing failed: {exc}")
@@ -131,20 +366,21 @@ async def upload_pdf(file: UploadFile = File(...)):
         filename=file.filename,
         num_chunks=len(chunks),
         message="PDF uploaded and indexed successfully.",
+        collection=collection,
     )
 
 
 @app.get("/documents", response_model=list[DocumentInfo], tags=["Documents"])
-def list_documents():
-    """List all indexed documents."""
-    return engine.list_documents()
+def list_documents(collection: str = DEFAULT_COLLECTION):
+    """List the documents indexed in a collection."""
+    return _collection(collection).engine.list_documents()
 
 
 @app.delete("/documents/{doc_id}", tags=["Documents"])
-def delete_document(doc_id: str):
+def delete_document(doc_id: str, collection: str = DEFAULT_COLLECTION):
     """Remove a document and all its chunks from the index."""
     try:
-        engine.delete_document(doc_id)
+        _collection(collection).engine.delete_document(doc_id)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
 
@@ -155,13 +391,13 @@ def delete_document(doc_id: str):
 
 
 @app.get("/topics/{doc_id}", tags=["Documents"])
-def get_topics(doc_id: str):
+def get_topics(doc_id: str, collection: str = DEFAULT_COLLECTION):
     """
     Extract and return topic headings from an uploaded PDF.
     These are used as clickable navigation chips in the frontend.
     """
     # Verify doc exists in the index
-    known_ids = {d["doc_id"] for d in engine.list_documents()}
+    known_ids = {d["doc_id"] for d in _collection(collection).engine.list_documents()}
     if doc_id not in known_ids:
         raise HTTPException(status_code=404, detail=f"doc_id '{doc_id}' not found.")
 
@@ -178,48 +414,136 @@ def get_topics(doc_id: str):
     return {"doc_id": doc_id, "topics": headings}
 
 
-@app.post("/ask", response_model=RAGAnswerResponse, tags=["QA"])
-def ask_question(request: QuestionRequest):
-    """
-    RAG-based question answering.
+@app.post("/collections", tags=["Collections"])
+def create_collection(request: CollectionCreate):
+    """Create an empty collection with its own index; limits default to the env values."""
+    defaults = CollectionLimits.from_env()
+    limits = CollectionLimits(
+        max_documents=defaults.max_documents if request.max_documents is None else request.max_documents,
+        max_bytes=(defaults.max_bytes if request.max_memory_mb is None
+                   else int(request.max_memory_mb * 1024 * 1024)),
+    )
+    try:
+        return collections.create(request.name, limits).get_stats()
+    except CollectionExistsError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
-    Flow
-    ----
-    1. Expand the query (short questions get enriched for better retrieval).
-    2. Embed the expanded query and retrieve top-k chunks via FAISS.
-    3. If top similarity < 0.3 -> return clarification response (no LLM call).
-    4. Otherwise -> build grounded prompt and call Gemini 1.5 Flash.
-    5. Return structured JSON with answer, page sources, and confidence score.
-    """
+
+@app.get("/collections", tags=["Collections"])
+def list_collections():
+    """Every collection with its size, limits and counters."""
+    return [c.get_stats() for c in collections.list()]
+
+
+@app.get("/collections/{name}", tags=["Collections"])
+def get_collection(name: str):
+    return _collection(name).get_stats()
+
+
+@app.delete("/collections/{name}", tags=["Collections"])
+def delete_collection(name: str):
+    """Drop a collection, its index and its uploaded PDFs (not the default one)."""
+    _collection(name)
+    try:
+        doc_ids = collections.drop(name)
+    except (KeyError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    for doc_id in doc_ids:
+        for path in UPLOAD_DIR.glob(f"{doc_id}_*"):
+            path.unlink(missing_ok=True)
+    return {"message": f"Collection {name} deleted successfully."}
+
+
+def _validate_question(request: QuestionRequest) -> None:
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Question must not be empty.")
 
-    if engine.total_chunks() == 0:
+    target = _collection(request.collection).engine
+    if target.total_chunks() == 0:
         raise HTTPException(
             status_code=404,
             detail="No documents indexed yet. Upload a PDF first.",
         )
 
     if request.doc_id and request.doc_id not in {
-        d["doc_id"] for d in engine.list_documents()
+        d["doc_id"] for d in target.list_documents()
     }:
         raise HTTPException(
             status_code=404,
             detail=f"doc_id '{request.doc_id}' not found.",
         )
 
+
+async def _retrieve(
+    request: QuestionRequest,
+    deadline: Deadline,
+    validate: bool = True,
+) -> list[tuple]:
+    """Validate, expand the query and run the FAISS search on the query pool."""
+    if validate:
+        _validate_question(request)
+
     # Expand query for short questions
     expanded_query = get_expanded_query(request.question)
 
     # Retrieve using the expanded query
-    hits = engine.search(
+    search = compute.run_query(
+        _collection(request.collection).search,
         query=expanded_query,
         doc_id=request.doc_id,
         top_k=request.top_k,
+        lexical_query=request.question,     # BM25 / fast path match the user's own words
     )
+    try:
+        return await asyncio.wait_for(search, timeout=deadline.remaining())
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Search did not finish within the {deadline.seconds:.0f}s deadline.",
+        )
+
+
+@app.post("/ask", response_model=RAGAnswerResponse, tags=["QA"])
+async def ask_question(request: QuestionRequest):
+    """
+    RAG-based question answering.
+
+    Flow
+    ----
+    1. Expand the query (short questions get enriched for better retrieval).
+    2. Embed the expanded query and retrieve top-k chunks via FAISS.
+    3. If top similarity < 0.3 -> return clarification response (no LLM call).
+    4. Otherwise -> build grounded prompt and call Gemini 1.5 Flash.
+    5. Return structured JSON with answer, page sources, and confidence score.
 
-    # Generate
-    rag_result = answer_with_groq(question=request.question, hits=hits)
+    Retrieval (CPU-bound) runs on the query pool; the LLM call and its
+    rate-limit backoff are awaited on the event loop and hold no thread.
+    Identical questions in flight at the same time (same normalised text,
+    doc_id, top_k and corpus generation) share a single retrieval + LLM call.
+    Past ASK_DEADLINE_SECONDS (or while the LLM circuit is open) the best
+    retrieved passage is returned with its page instead (degraded=true).
+    """
+    if recorder:
+        recorder.record("/ask", body=request.model_dump())
+    _validate_question(request)
+    deadline = Deadline(ASK_DEADLINE_SECONDS)
+
+    async def answer() -> RAGAnswer:
+        hits = await _retrieve(request, deadline, validate=False)
+        return await answer_with_groq_async(
+            question=request.question, hits=hits, deadline=deadline
+        )
+
+    key = (
+        " ".join(request.question.lower().split()),
+        request.doc_id,
+        request.top_k,
+        request.collection,
+        _collection(request.collection).engine.generation,
+    )
+    rag_result = await ask_flights.do(key, answer)
 
     return RAGAnswerResponse(
         question=request.question,
@@ -227,4 +551,113 @@ def ask_question(request: QuestionRequest):
         sources=rag_result.sources,
         confidence=rag_result.confidence,
         doc_id=request.doc_id,
-    )
\ No newline at end of file
+        degraded=rag_result.degraded,
+        collection=request.collection,
+    )
+
+
+def _validate_search(request: SearchRequest, target: Collection) -> None:
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty.")
+    if not 1 <= request.limit <= SEARCH_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {SEARCH_MAX_LIMIT}.")
+    if request.offset < 0:
+        raise HTTPException(status_code=400, detail="offset must not be negative.")
+    if request.top_k is not None and request.top_k < 1:
+        raise HTTPException(status_code=400, detail="top_k must be at least 1.")
+    if (request.page_from is not None and request.page_to is not None
+            and request.page_from > request.page_to):
+        raise HTTPException(status_code=400, detail="page_from must not be after page_to.")
+    if request.doc_ids:
+        unknown = set(request.doc_ids) - {d["doc_id"] for d in target.engine.list_documents()}
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"doc_id '{sorted(unknown)[0]}' not found.")
+
+
+@app.post("/search", response_model=SearchResponse, tags=["Search"])
+async def search(request: SearchRequest):
+    """
+    Retrieval only: ranked passages for a query, never calling the LLM.
+
+    Chunks are ranked by cosine similarity among the ``top_k`` best, or —
+    with ``min_score`` — among every chunk scoring at least that much (a
+    range search); both may be combined, and with neither every chunk is
+    ranked.  ``doc_ids`` and ``page_from`` / ``page_to`` restrict the rows
+    scanned.  Results are paged with ``offset`` / ``limit``; ``total`` counts
+    all ranked chunks and ``generation`` tells whether the index changed
+    between pages.  The query is not expanded, and the search runs on the
+    query pool like /ask.
+    """
+    target = _collection(request.collection)
+    _validate_search(request, target)
+    pages = None
+    if request.page_from is not None or request.page_to is not None:
+        pages = (request.page_from or 1, _LAST_PAGE if request.page_to is None else request.page_to)
+
+    generation = target.engine.generation
+    try:
+        hits, total = await compute.run_query(
+            target.retrieve,
+            request.query,
+            doc_ids=request.doc_ids,
+            pages=pages,
+            top_k=request.top_k,
+            min_score=request.min_score,
+            offset=request.offset,
+            limit=request.limit,
+        )
+    except UnsupportedInEngine as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
+
+    end = request.offset + len(hits)
+    return SearchResponse(
+        query=request.query,
+        collection=request.collection,
+        total=total,
+        offset=request.offset,
+        limit=request.limit,
+        next_offset=end if end < total else None,
+        generation=generation,
+        hits=[
+            SearchHit(doc_id=meta.doc_id, filename=meta.filename, page_number=meta.page_number,
+                      chunk_index=meta.chunk_index, text=meta.text, score=round(score, 4))
+            for meta, score in hits
+        ],
+    )
+
+
+def _sse(event: dict) -> str:
+    """Format one event dict as a server-sent-event frame."""
+    name = event.get("event", "message")
+    data = {k: v for k, v in event.items() if k != "event"}
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/ask/stream", tags=["QA"])
+async def ask_question_stream(request: QuestionRequest):
+    """
+    Streaming /ask (text/event-stream).
+
+    Events
+    ------
+    meta  : {"sources", "confidence", "expanded_query"} — sent right after retrieval
+    token : {"text"} — answer fragments as the LLM produces them
+    done  : {"degraded"} — answer complete (degraded = extractive fallback)
+    error : {"message"} — the LLM failed mid-answer
+    """
+    if recorder:
+        recorder.record("/ask/stream", body=request.model_dump())
+    deadline = Deadline(ASK_DEADLINE_SECONDS)
+    hits = await _retrieve(request, deadline)
+
+    async def events():
+        async for event in stream_answer_with_groq(
+            question=request.question, hits=hits, deadline=deadline
+        ):
+            yield _sse(event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,282 @@
+"""
+Built-in metrics — per-stage latency histograms, counters and gauges,
+rendered in the Prometheus text exposition format at GET /metrics.
+
+Kept dependency-free and cheap on the hot path: an observation is one
+perf_counter() pair, a bisect over the bucket bounds and an increment
+under a per-metric lock.  Gauges that describe state owned elsewhere
+(index size, RSS) are computed by callbacks only when /metrics is scraped.
+
+Usage
+-----
+    with STAGE_SECONDS.time("faiss_search"):
+        ...
+    CHUNKS_EMBEDDED.inc(len(chunks))
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# Latency buckets (seconds) spanning sub-ms FAISS searches to minute-long ingests
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=(), fn: Callable[[], float] | None = None):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._fn = fn
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Report a count owned elsewhere (read at scrape time)."""
+        self._fn = fn
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def _samples(self) -> list[str]:
+        if self._fn is not None:
+            try:
+                return [f"{self.name} {_format_value(self._fn())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0)]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """Point-in-time value; either set() directly or computed by *fn* at scrape."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, fn: Callable[[], float] | None = None):
+        super().__init__(name, help_text)
+        self._fn = fn
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._fn = fn
+
+    def _samples(self) -> list[str]:
+        value = self._value
+        if self._fn is not None:
+            try:
+                value = self._fn()
+            except Exception:
+                return []
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket latency histogram, optionally split by labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def snapshot(self, *labels: str) -> tuple[int, float]:
+        """(count, sum) for one label set — handy for logs and benchmarks."""
+        series = self._series.get(labels)
+        return (series[2], series[1]) if series else (0, 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+        lines: list[str] = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            lab = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{lab} {_format_value(total)}")
+            lines.append(f"{self.name}_count{lab} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def resident_memory_bytes() -> float:
+    """Current RSS from /proc (Linux); falls back to peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "pdfqa_stage_seconds",
+    "Latency of each pipeline stage in seconds.",
+    labelnames=("stage",),
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "pdfqa_request_seconds",
+    "End-to-end request latency in seconds.",
+    labelnames=("endpoint",),
+))
+CHUNKS_EMBEDDED = REGISTRY.register(Counter(
+    "pdfqa_chunks_embedded_total", "Texts encoded by the embedding model.",
+))
+PAGES_EXTRACTED = REGISTRY.register(Counter(
+    "pdfqa_pages_extracted_total", "PDF pages extracted (cache hits included).",
+))
+PAGE_CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "pdfqa_page_cache_lookups_total", "Page-text cache lookups by result.",
+    labelnames=("result",),
+))
+LLM_PROMPT_TOKENS = REGISTRY.register(Counter(
+    "pdfqa_llm_prompt_tokens_total", "Estimated prompt tokens sent to the LLM.",
+))
+LLM_CONTEXT_TOKENS_SAVED = REGISTRY.register(Counter(
+    "pdfqa_llm_context_tokens_saved_total", "Prompt tokens saved by context packing.",
+))
+LLM_CALLS = REGISTRY.register(Counter(
+    "pdfqa_llm_calls_total", "LLM call attempts by outcome.",
+    labelnames=("outcome",),
+))
+LLM_RETRIES = REGISTRY.register(Counter(
+    "pdfqa_llm_retries_total", "LLM calls retried after a 429.",
+))
+ANSWERS_DEGRADED = REGISTRY.register(Counter(
+    "pdfqa_answers_degraded_total", "Answers served extractively, by reason.",
+    labelnames=("reason",),
+))
+INDEX_VECTORS = REGISTRY.register(Gauge(
+    "pdfqa_index_vectors", "Vectors in the FAISS index.",
+))
+INDEX_DOCUMENTS = REGISTRY.register(Gauge(
+    "pdfqa_index_documents", "Documents in the index.",
+))
+ASK_COALESCED = REGISTRY.register(Counter(
+    "pdfqa_ask_coalesced_total", "Duplicate /ask requests served by another in-flight call.",
+))
+SHARD_CALLS = REGISTRY.register(Counter(
+    "pdfqa_shard_calls_total", "Coordinator calls to index shard nodes.",
+    labelnames=("shard", "op", "outcome"),
+))
+SEARCHES = REGISTRY.register(Counter(
+    "pdfqa_searches_total", "Index searches by retrieval path (vector, hybrid, lexical fast path).",
+    labelnames=("path",),
+))
+SEARCHES_PARTIAL = REGISTRY.register(Counter(
+    "pdfqa_searches_partial_total", "Distributed searches answered without every shard.",
+))
+INGEST_THROTTLED_SECONDS = REGISTRY.register(Counter(
+    "pdfqa_ingest_throttled_seconds_total", "Time ingest encoding paused to keep query latency on target.",
+))
+DOCUMENT_EVICTIONS = REGISTRY.register(Counter(
+    "pdfqa_documents_evicted_total", "Documents spilled to disk to stay within the memory budget.",
+))
+RESIDENCY_LOOKUPS = REGISTRY.register(Counter(
+    "pdfqa_residency_lookups_total", "Doc-scoped searches by whether the document was resident.",
+    labelnames=("result",),
+))
+RESIDENT_MEMORY = REGISTRY.register(Gauge(
+    "pdfqa_process_resident_memory_bytes", "Resident set size of this process.",
+    fn=resident_memory_bytes,
+))
@@ -0,0 +1,178 @@
+"""
+On-disk cache of extract_pages_from_pdf() output.
+
+Re-chunking with a different DEFAULT_CHUNK_SIZE, rebuilding after a model
+change or regenerating topics all need the same page text; parsing it again
+with pdfplumber is by far the slowest step.  Entries are keyed by
+
+    (sha256 of the PDF bytes, extractor backend, extractor version)
+
+so a renamed/re-uploaded file still hits, while upgrading pdfplumber
+invalidates everything automatically.
+
+Storage
+-------
+One gzip-compressed JSON file per PDF: ``[[page_number, text], ...]``.
+Writes go to a temp file and are renamed into place, so concurrent
+workers (e.g. the ingest process pool) never see a partial entry; a failed
+write removes its temp file.
+
+Size cap
+--------
+Once the entries exceed PAGE_CACHE_MAX_MB, the least recently used ones
+(a hit refreshes an entry's mtime) are deleted until the cache is back
+under 90% of the cap.  Temp files left behind by a killed worker are
+removed by the same sweep.  Deleting the directory by hand is always safe.
+
+Configuration
+-------------
+PAGE_CACHE_DIR     unset      -> app/page_cache/
+                   ""         -> cache disabled
+                   <path>     -> use that directory
+PAGE_CACHE_MAX_MB  size cap (default 1024, 0 = unlimited)
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / "page_cache"
+CACHE_FORMAT_VERSION = 1
+PAGE_CACHE_MAX_MB = float(os.getenv("PAGE_CACHE_MAX_MB", "1024"))
+_HASH_BLOCK_SIZE = 1 << 20
+# A sweep trims the cache to this share of the cap
+_PRUNE_TARGET = 0.9
+# Temp files older than this belong to a dead writer
+_STALE_TMP_SECONDS = 3600.0
+
+
+def file_sha256(path: str | Path) -> str:
+    """Hex SHA-256 of a file, read in 1 MiB blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(_HASH_BLOCK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class PageCache:
+    """Directory of compressed page-text entries for one extractor backend."""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        backend: str,
+        backend_version: str,
+        max_bytes: int = 0,
+    ):
+        self.directory = Path(directory)
+        self.backend = backend
+        self.backend_version = backend_version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Estimated size of the directory; None until the first sweep
+        self._size: int | None = None
+
+    def _entry_path(self, digest: str) -> Path:
+        tag = f"{self.backend}-{self.backend_version}-v{CACHE_FORMAT_VERSION}"
+        return self.directory / digest[:2] / f"{digest}-{tag}.json.gz"
+
+    def get(self, digest: str) -> list[tuple[int, str]] | None:
+        """Return cached pages for *digest*, or None on a miss / unreadable entry."""
+        path = self._entry_path(digest)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                pages = [(int(n), t) for n, t in json.load(fh)]
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring corrupt page-cache entry %s: %s", path.name, exc)
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.max_bytes:
+            try:
+                os.utime(path)                 # recency for the size cap
+            except OSError:
+                pass
+        return pages
+
+    def put(self, digest: str, pages: list[tuple[int, str]]) -> None:
+        """Store *pages* atomically. Failures are logged, never raised."""
+        path = self._entry_path(digest)
+        tmp = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                gz.write(json.dumps(pages, ensure_ascii=False).encode("utf-8"))
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("Could not write page-cache entry %s: %s", path.name, exc)
+            if tmp is not None:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+            return
+        if self.max_bytes:
+            if self._size is not None:
+                self._size += size
+            if self._size is None or self._size > self.max_bytes:
+                self.prune()
+
+    def prune(self) -> None:
+        """Delete least recently used entries (and stale temp files) until the
+        cache fits under _PRUNE_TARGET of max_bytes."""
+        entries = []
+        now = time.time()
+        for path in self.directory.glob("*/*"):
+            try:
+                st = path.stat()
+                if path.suffix == ".tmp":
+                    if now - st.st_mtime > _STALE_TMP_SECONDS:
+                        path.unlink()
+                    continue
+            except OSError:
+                continue                       # removed by another worker meanwhile
+            entries.append((st.st_mtime, st.st_size, path))
+
+        size = sum(n for _, n, _ in entries)
+        if size > self.max_bytes:
+            target = _PRUNE_TARGET * self.max_bytes
+            for _, n, path in sorted(entries, key=lambda e: e[0]):
+                if size <= target:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                size -= n
+                self.evictions += 1
+            logger.info("Page cache trimmed to %.1f MB (%d entries evicted so far)",
+                        size / 2 ** 20, self.evictions)
+        self._size = size
+
+
+def cache_from_env(backend: str, backend_version: str) -> PageCache | None:
+    """Build the process-wide cache from PAGE_CACHE_DIR (see module docstring)."""
+    configured = os.getenv("PAGE_CACHE_DIR")
+    if configured is not None and not configured.strip():
+        logger.info("Page-text cache disabled (PAGE_CACHE_DIR is empty).")
+        return None
+    directory = Path(configured.strip()) if configured else DEFAULT_CACHE_DIR
+    return PageCache(directory, backend=backend, backend_version=backend_version,
+                     max_bytes=int(PAGE_CACHE_MAX_MB * 1024 * 1024))
@@ -0,0 +1,301 @@
+"""
+Opt-in, per-request profiling for the running service.
+
+An admin marks one /upload or /ask call for profiling (header
+``X-Profile-Token: <token>`` or query ``?profile=<token>``).  While that
+request runs:
+
+* a sampling profiler thread snapshots every thread's Python stack each
+  PROFILE_SAMPLE_INTERVAL_MS and keeps the stacks that pass through app
+  code — so work pushed to the threadpool (FAISS search, embedding) is
+  captured as well as the event-loop side;
+* tracemalloc records allocations, reported as peak traced memory and the
+  source lines still holding the most memory when the request finished.
+
+The report is kept in a bounded in-memory store and fetched from
+GET /admin/profiles/{id}; the response carries its id in ``X-Profile-Id``.
+
+Safety bounds
+-------------
+PROFILE_ADMIN_TOKEN         enables profiling; unset = disabled entirely
+PROFILE_MAX_PER_MINUTE      profiled requests admitted per minute   (default 6)
+PROFILE_MAX_REPORTS         reports retained, oldest dropped first  (default 20)
+PROFILE_SAMPLE_INTERVAL_MS  sampling period, floored at 1 ms        (default 5)
+
+Only one request is profiled at a time (tracemalloc is process-wide); a
+marked request arriving while another is profiled, or over the per-minute
+budget, simply runs unprofiled.  Stacks are sampled process-wide, so
+concurrent requests executing app code appear in the same report.
+"""
+
+from __future__ import annotations
+
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "").strip()
+PROFILE_MAX_PER_MINUTE = int(os.getenv("PROFILE_MAX_PER_MINUTE", "6"))
+PROFILE_MAX_REPORTS = int(os.getenv("PROFILE_MAX_REPORTS", "20"))
+PROFILE_SAMPLE_INTERVAL_MS = max(1.0, float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")))
+
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_QUERY_PARAM = "profile"
+
+TOP_FUNCTIONS = 30      # rows in the per-function tables
+TOP_STACKS = 200        # distinct collapsed stacks kept per report
+TOP_ALLOCATIONS = 20    # source lines in the allocation table
+
+_APP_DIR = str(Path(__file__).parent)
+
+
+def token_matches(supplied: str | None) -> bool:
+    """Constant-time check of an admin token; always False when disabled."""
+    if not PROFILE_ADMIN_TOKEN or not supplied:
+        return False
+    return hmac.compare_digest(supplied.encode(), PROFILE_ADMIN_TOKEN.encode())
+
+
+# ─────────────────────────────────────────────────────────────
+# Sampling profiler
+# ─────────────────────────────────────────────────────────────
+
+def _frame_label(code) -> str:
+    module = Path(code.co_filename).stem
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class _StackSampler(threading.Thread):
+    """Background thread that samples every other thread's stack."""
+
+    def __init__(self, interval_seconds: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval_seconds
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.ticks = 0
+        self._halt = threading.Event()
+
+    def run(self) -> None:
+        while not self._halt.wait(self.interval):
+            self.ticks += 1
+            for tid, frame in sys._current_frames().items():
+                if tid == self.ident:
+                    continue
+                # Walk leaf -> root; keep frames up to the outermost app frame
+                # (the server / event-loop frames above it are noise).
+                stack: list[str] = []
+                outermost_app = -1
+                while frame is not None:
+                    code = frame.f_code
+                    if code.co_filename.startswith(_APP_DIR):
+                        outermost_app = len(stack)
+                    stack.append(_frame_label(code))
+                    frame = frame.f_back
+                if outermost_app >= 0:
+                    del stack[outermost_app + 1:]
+                    stack.reverse()
+                    self.stacks[tuple(stack)] += 1
+
+    def stop(self) -> None:
+        self._halt.set()
+        self.join()
+
+
+def _function_table(stacks: Counter) -> list[dict]:
+    self_counts: Counter[str] = Counter()
+    total_counts: Counter[str] = Counter()
+    for stack, n in stacks.items():
+        self_counts[stack[-1]] += n
+        for label in set(stack):
+            total_counts[label] += n
+    return [
+        {"function": label, "total_samples": n, "self_samples": self_counts[label]}
+        for label, n in total_counts.most_common(TOP_FUNCTIONS)
+    ]
+
+
+# ─────────────────────────────────────────────────────────────
+# Reports
+# ─────────────────────────────────────────────────────────────
+
+@dataclass
+class ProfileReport:
+    profile_id: str
+    method: str
+    path: str
+    started_at: float                       # unix time
+    wall_seconds: float = 0.0
+    status_code: int | None = None
+    sample_interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS
+    ticks: int = 0                          # sampler wake-ups during the request
+    samples: int = 0                        # thread stacks recorded (app code only)
+    functions: list[dict] = field(default_factory=list)
+    stacks: list[dict] = field(default_factory=list)
+    peak_traced_bytes: int = 0
+    retained_bytes: int = 0
+    allocations: list[dict] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        return {
+            "profile_id": self.profile_id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "status_code": self.status_code,
+            "samples": self.samples,
+            "peak_traced_bytes": self.peak_traced_bytes,
+        }
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed format (flamegraph.pl / speedscope input)."""
+        return "".join(f"{';'.join(s['stack'])} {s['samples']}\n" for s in self.stacks)
+
+
+class ProfileStore:
+    """Newest-last, size-bounded map of profile id -> report."""
+
+    def __init__(self, max_reports: int):
+        self.max_reports = max_reports
+        self._reports: OrderedDict[str, ProfileReport] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, report: ProfileReport) -> None:
+        with self._lock:
+            self._reports[report.profile_id] = report
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+
+    def get(self, profile_id: str) -> ProfileReport | None:
+        with self._lock:
+            return self._reports.get(profile_id)
+
+    def list(self) -> list[dict]:
+        with self._lock:
+            return [r.summary() for r in reversed(self._reports.values())]
+
+
+class Profiler:
+    """
+    Admission (one at a time, per-minute budget) plus the capture itself.
+
+    Usage
+    -----
+        session = PROFILER.begin("POST", "/ask")
+        if session: ...run the request...; PROFILER.finish(session, status)
+    """
+
+    def __init__(self, max_per_minute: int, store: ProfileStore, interval_ms: float):
+        self.max_per_minute = max_per_minute
+        self.store = store
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._active = False
+        self._recent: deque[float] = deque()
+        self.skipped = 0
+
+    def begin(self, method: str, path: str) -> "_Session | None":
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] >= 60.0:
+                self._recent.popleft()
+            if self._active or len(self._recent) >= self.max_per_minute:
+                self.skipped += 1
+                logger.info("Profiling skipped for %s %s (busy or over budget).", method, path)
+                return None
+            self._active = True
+            self._recent.append(now)
+        return _Session(method, path, self.interval_ms)
+
+    def finish(self, session: "_Session", status_code: int | None) -> ProfileReport:
+        try:
+            report = session.stop(status_code)
+        finally:
+            with self._lock:
+                self._active = False
+        self.store.add(report)
+        logger.info(
+            "Profiled %s %s in %.3fs (%d samples, peak %.1f MiB) -> %s",
+            report.method, report.path, report.wall_seconds, report.samples,
+            report.peak_traced_bytes / 2**20, report.profile_id,
+        )
+        return report
+
+
+class _Session:
+    def __init__(self, method: str, path: str, interval_ms: float):
+        self.report = ProfileReport(
+            profile_id=uuid.uuid4().hex[:12],
+            method=method,
+            path=path,
+            started_at=time.time(),
+            sample_interval_ms=interval_ms,
+        )
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+            self._baseline = None
+        else:
+            self._baseline = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        self._sampler = _StackSampler(interval_ms / 1000.0)
+        self._sampler.start()
+
+    def stop(self, status_code: int | None) -> ProfileReport:
+        report = self.report
+        report.wall_seconds = time.perf_counter() - self._start
+        report.status_code = status_code
+        self._sampler.stop()
+        try:
+            self._collect_memory(report)
+        finally:
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+
+        stacks = self._sampler.stacks
+        report.ticks = self._sampler.ticks
+        report.samples = sum(stacks.values())
+        report.functions = _function_table(stacks)
+        report.stacks = [
+            {"stack": list(stack), "samples": n}
+            for stack, n in stacks.most_common(TOP_STACKS)
+        ]
+        return report
+
+    def _collect_memory(self, report: ProfileReport) -> None:
+        report.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+        ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+        if self._baseline is None:
+            stats = snapshot.statistics("lineno")
+            rows = [(s.traceback, s.size, s.count) for s in stats]
+        else:
+            stats = snapshot.compare_to(self._baseline.filter_traces(ignore), "lineno")
+            rows = [(s.traceback, s.size_diff, s.count_diff) for s in stats]
+        report.retained_bytes = sum(size for _, size, _ in rows)
+        rows.sort(key=lambda r: r[1], reverse=True)
+        report.allocations = [
+            {"where": f"{tb[0].filename}:{tb[0].lineno}", "bytes": size, "blocks": count}
+            for tb, size, count in rows[:TOP_ALLOCATIONS]
+        ]
+
+
+PROFILES = ProfileStore(PROFILE_MAX_REPORTS)
+PROFILER = Profiler(PROFILE_MAX_PER_MINUTE, PROFILES, PROFILE_SAMPLE_INTERVAL_MS)
@@ -0,0 +1,278 @@
+"""
+Client-side rate limiter for LLM calls.
+
+Groq enforces per-minute and per-day budgets on both requests and tokens.
+Hitting them server-side costs a 429 plus a long backoff, so every call is
+admitted here first:
+
+• Budgets are tracked over sliding windows (a log of (time, amount) events
+  per window), one window per (requests|tokens) × (minute|day) limit.
+• A call reserves its *estimated* prompt + completion tokens; the estimate
+  is corrected with the real usage once the response arrives (settle()).
+• Waiting callers queue by priority — INTERACTIVE (/ask) is admitted before
+  BATCH (pre-computation jobs) — and FIFO within a priority.
+• If the projected wait exceeds ``max_wait_seconds`` the call fails fast
+  with LimitExceeded instead of queueing behind a budget it can't get.
+• A 429 from upstream (note_throttled) briefly pauses admission for
+  everyone; the pause is capped well below ``max_wait_seconds`` so queued
+  callers wait it out rather than fail, while the throttled caller sleeps
+  its own (jittered) backoff before retrying.
+
+The limiter is thread-safe and has both an async (acquire) and a blocking
+(acquire_sync) entry point, so the FastAPI event loop and the Streamlit UI
+can share one instance.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+logger = logging.getLogger(__name__)
+
+# Re-check interval for callers that are not at the head of the queue.
+_POLL_SECONDS = 0.05
+
+# Longest admission pause after a 429, as a share of max_wait_seconds.
+_THROTTLE_HOLD_SHARE = 0.25
+
+
+class Priority(IntEnum):
+    """Lower value = admitted first."""
+    INTERACTIVE = 0
+    BATCH = 10
+
+
+class LimitExceeded(Exception):
+    """Raised when a call would have to wait longer than the limiter allows."""
+
+    def __init__(self, retry_after: float, reason: str):
+        super().__init__(f"{reason} (retry in ~{retry_after:.0f}s)")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _Window:
+    """Sliding-window log of (timestamp, amount) events against one limit."""
+
+    def __init__(self, name: str, limit: int, period: float):
+        self.name = name
+        self.limit = limit
+        self.period = period
+        self.events: deque[list[float]] = deque()
+        self.total = 0.0
+
+    def prune(self, now: float) -> None:
+        horizon = now - self.period
+        while self.events and self.events[0][0] <= horizon:
+            self.total -= self.events.popleft()[1]
+
+    def wait_for(self, amount: float, now: float) -> float:
+        """Seconds until *amount* more fits in the window (inf if it never will)."""
+        if amount > self.limit:
+            return math.inf
+        excess = self.total + amount - self.limit
+        if excess <= 0:
+            return 0.0
+        freed = 0.0
+        for ts, amt in self.events:
+            freed += amt
+            if freed >= excess:
+                return max(0.0, ts + self.period - now)
+        return math.inf
+
+    def projected_wait(self, amount: float, now: float) -> float:
+        """Like wait_for(), but for a backlog that may span several periods."""
+        if amount <= self.limit:
+            return self.wait_for(amount, now)
+        periods, rest = divmod(amount, self.limit)
+        return periods * self.period + self.wait_for(rest, now)
+
+    def record(self, amount: float, now: float) -> list[float]:
+        event = [now, amount]
+        self.events.append(event)
+        self.total += amount
+        return event
+
+
+@dataclass
+class Reservation:
+    """Budget held by one admitted call; pass back to settle()."""
+    tokens: int
+    _token_events: list[list[float]] = field(default_factory=list, repr=False)
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+
+
+class LLMRateLimiter:
+    """Sliding-window request/token budgets with a priority admission queue."""
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        requests_per_day: int,
+        tokens_per_day: int,
+        max_wait_seconds: float = 20.0,
+    ):
+        self.max_wait_seconds = max_wait_seconds
+        self._request_windows = [
+            _Window("requests/minute", requests_per_minute, 60.0),
+            _Window("requests/day", requests_per_day, 86_400.0),
+        ]
+        self._token_windows = [
+            _Window("tokens/minute", tokens_per_minute, 60.0),
+            _Window("tokens/day", tokens_per_day, 86_400.0),
+        ]
+        self._lock = threading.Lock()
+        self._queue: list[_Ticket] = []
+        self._seq = itertools.count()
+        self._blocked_until = 0.0
+        self.admitted = 0
+        self.rejected = 0
+
+    # ── budget arithmetic (call with self._lock held) ─────────
+
+    def _wait_locked(
+        self, requests: int, tokens: int, now: float, projected: bool = False
+    ) -> tuple[float, str]:
+        """Longest wait across all windows for *requests* calls of *tokens*, and why."""
+        wait, reason = max(0.0, self._blocked_until - now), "upstream throttling"
+        for windows, amount in ((self._request_windows, requests), (self._token_windows, tokens)):
+            for w in windows:
+                w.prune(now)
+                t = w.projected_wait(amount, now) if projected else w.wait_for(amount, now)
+                if t > wait:
+                    wait, reason = t, f"{w.name} budget exhausted"
+        return wait, reason
+
+    def _projected_wait_locked(self, ticket: _Ticket, now: float) -> tuple[float, str]:
+        """Wait for *ticket* assuming everyone queued ahead of it goes first."""
+        if ticket.tokens > min(w.limit for w in self._token_windows):
+            return math.inf, "request larger than the token budget"
+        ahead = [t for t in self._queue if t < ticket]
+        tokens = ticket.tokens + sum(t.tokens for t in ahead)
+        return self._wait_locked(1 + len(ahead), tokens, now, projected=True)
+
+    def _try_admit(self, ticket: _Ticket) -> tuple[Reservation | None, float]:
+        """Admit *ticket* if it is at the head and fits; else return the wait."""
+        with self._lock:
+            now = time.monotonic()
+            projected, reason = self._projected_wait_locked(ticket, now)
+            if projected > self.max_wait_seconds:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self.rejected += 1
+                raise LimitExceeded(
+                    retry_after=min(projected, 86_400.0), reason=f"LLM {reason}"
+                )
+
+            if self._queue[0] is not ticket:
+                return None, _POLL_SECONDS
+
+            wait, _ = self._wait_locked(1, ticket.tokens, now)
+            if wait > 0:
+                return None, min(wait, 1.0)
+
+            heapq.heappop(self._queue)
+            for w in self._request_windows:
+                w.record(1, now)
+            events = [w.record(ticket.tokens, now) for w in self._token_windows]
+            self.admitted += 1
+            return Reservation(tokens=ticket.tokens, _token_events=events), 0.0
+
+    def _enqueue(self, tokens: int, priority: Priority) -> _Ticket:
+        ticket = _Ticket(int(priority), next(self._seq), tokens)
+        with self._lock:
+            heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _abandon(self, ticket: _Ticket) -> None:
+        with self._lock:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+
+    # ── public API ────────────────────────────────────────────
+
+    async def acquire(
+        self, tokens: int, priority: Priority = Priority.INTERACTIVE
+    ) -> Reservation:
+        """Wait (without holding a thread) until the call fits the budget."""
+        ticket = self._enqueue(tokens, priority)
+        try:
+            while True:
+                reservation, wait = self._try_admit(ticket)
+                if reservation is not None:
+                    return reservation
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    def acquire_sync(
+        self, tokens: int, priority: Priority = Priority.INTERACTIVE
+    ) -> Reservation:
+        """Blocking twin of acquire() for synchronous callers."""
+        ticket = self._enqueue(tokens, priority)
+        try:
+            while True:
+                reservation, wait = self._try_admit(ticket)
+                if reservation is not None:
+                    return reservation
+                time.sleep(wait)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+
+    def settle(self, reservation: Reservation, actual_tokens: int | None) -> None:
+        """Replace the reserved estimate with the real token usage."""
+        if actual_tokens is None:
+            return
+        delta = actual_tokens - reservation.tokens
+        with self._lock:
+            now = time.monotonic()
+            for window, event in zip(self._token_windows, reservation._token_events):
+                window.prune(now)
+                if event[0] <= now - window.period:
+                    continue            # already aged out (and subtracted) by prune()
+                event[1] += delta
+                window.total += delta
+        reservation.tokens = actual_tokens
+
+    def note_throttled(self, seconds: float) -> None:
+        """Upstream returned 429: pause admissions for up to *seconds*.
+
+        The pause is capped at a share of max_wait_seconds, so one 429 slows
+        concurrent callers down instead of failing them all with LimitExceeded.
+        """
+        hold = min(seconds, _THROTTLE_HOLD_SHARE * self.max_wait_seconds)
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + hold)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            windows = {}
+            for w in self._request_windows + self._token_windows:
+                w.prune(now)
+                windows[w.name] = {"used": round(w.total), "limit": w.limit}
+            return {
+                "queued": len(self._queue),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "windows": windows,
+            }
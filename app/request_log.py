@@ -0,0 +1,57 @@
+"""
+Optional recording of /ask and /upload traffic as JSON Lines, for replay
+by the load-test harness (python -m benchmarks.loadtest --replay FILE).
+
+Record format (one object per line)
+-----------------------------------
+    {"ts": 1729.0, "endpoint": "/ask",
+     "body": {"question": "...", "doc_id": null, "top_k": 3}}
+    {"ts": 1730.2, "endpoint": "/upload", "filename": "manual.pdf", "bytes": 48213}
+
+``ts`` is unix time.  Uploaded file contents are not recorded — the replayer
+maps filenames to a directory of PDFs (or synthesises one).
+
+Configuration
+-------------
+REQUEST_LOG_PATH  unset / ""  -> recording off
+                  <path>      -> append records to that file
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class RequestRecorder:
+    """Append-only, thread-safe JSONL writer."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, endpoint: str, **fields) -> None:
+        line = json.dumps({"ts": time.time(), "endpoint": endpoint, **fields}, ensure_ascii=False)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
+                self.recorded += 1
+        except OSError as exc:
+            logger.warning("Could not record request to %s: %s", self.path, exc)
+
+
+def recorder_from_env() -> RequestRecorder | None:
+    """Build the process-wide recorder from REQUEST_LOG_PATH (see module docstring)."""
+    configured = os.getenv("REQUEST_LOG_PATH", "").strip()
+    if not configured:
+        return None
+    logger.info("Recording /ask and /upload requests to %s", configured)
+    return RequestRecorder(configured)
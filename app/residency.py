@@ -0,0 +1,185 @@
+"""
+Document residency — a memory budget for the index, with the least recently
+queried documents spilled to disk.
+
+Every indexed document is either *resident* (its vectors and chunk metadata
+live in the engine's VectorStore and are searched) or *evicted* (written to
+an on-disk spill directory and dropped from the store).  Evicted documents
+are still listed, counted and deletable.  A doc-scoped query for one loads
+it back into the store before searching (a hot-set *miss*), then the budget
+is enforced again.  A global search covers resident documents only, so the
+budget should hold the working set; hot_hit_rate in the stats shows whether
+it does.
+
+Policy
+──────
+• Size of a document = its float32 vectors plus chunk text (engine.chunk_bytes),
+  the same figure collection memory limits use.
+• After an upload or a reload, while resident bytes exceed the budget, the
+  least recently used resident document is evicted.  Uploading a document
+  counts as using it; so does appearing in search hits.  Documents never used
+  since a bundle load are evicted first.  The document just uploaded, and
+  every document a search asked for, is never a victim, so one document
+  larger than the budget stays resident.  A search over several evicted
+  documents reloads them all under one lock.
+• Eviction and reload reuse VectorStore.remove_many / add, so search
+  snapshots, routing summaries and BM25 postings stay consistent.  Removal
+  copies the surviving rows, so all victims of one budget check are
+  removed in a single rebuild per store.  Both leave the engine's corpus
+  generation alone (the corpus itself didn't change).  They serialise on
+  one lock per engine; searches of resident documents never wait on it.
+
+Spill files are a per-process cache (the index itself is in memory), kept
+in EVICTION_DIR or a temporary directory and removed on shutdown.
+
+Configuration
+─────────────
+MEMORY_BUDGET_MB   resident vectors + chunk text per engine, i.e. per
+                   collection (default 0 = no budget, nothing is evicted)
+EVICTION_DIR       spill directory (default: a fresh temporary directory)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Collection, Iterable
+
+import numpy as np
+
+from .metrics import DOCUMENT_EVICTIONS, RESIDENCY_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+MEMORY_BUDGET_MB = float(os.getenv("MEMORY_BUDGET_MB", "0"))
+EVICTION_DIR = os.getenv("EVICTION_DIR", "").strip()
+
+
+def memory_budget_from_env() -> int:
+    """MEMORY_BUDGET_MB in bytes (0 = unlimited)."""
+    return int(MEMORY_BUDGET_MB * 1024 * 1024)
+
+
+@dataclass(frozen=True)
+class EvictedDoc:
+    info: dict          # registry entry: filename, num_chunks, bytes
+    path: Path          # <path>.npy holds the vectors, <path>.json the chunk metadata
+
+
+class Residency:
+    """LRU order, spill files and hit / miss counters for one engine's documents."""
+
+    def __init__(self, budget_bytes: int, spill_dir: str = EVICTION_DIR):
+        self.budget_bytes = budget_bytes
+        # Held while evicting, reloading or deleting an evicted document
+        self.lock = threading.RLock()
+        self.evicted: dict[str, EvictedDoc] = {}
+        self._root = Path(spill_dir) if spill_dir else None
+        self._owns_root = False
+        self._recent: OrderedDict[str, None] = OrderedDict()
+        self._recent_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget_bytes > 0
+
+    # ── recency ─────────────────────────────────────────────────────────────────
+
+    def touch(self, doc_ids: Iterable[str]) -> None:
+        """Mark documents as just used."""
+        with self._recent_lock:
+            for doc_id in doc_ids:
+                self._recent[doc_id] = None
+                self._recent.move_to_end(doc_id)
+
+    def forget(self, doc_id: str) -> None:
+        with self._recent_lock:
+            self._recent.pop(doc_id, None)
+
+    def coldest(self, resident: Iterable[str], keep: Collection[str] = ()) -> list[str]:
+        """Resident documents not in *keep*, least recently used first (never-used ones before all)."""
+        resident = set(resident).difference(keep)
+        with self._recent_lock:
+            used = [d for d in self._recent if d in resident]
+        seen = set(used)
+        return [d for d in resident if d not in seen] + used
+
+    def record_lookup(self, hit: bool) -> None:
+        with self._recent_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        RESIDENCY_LOOKUPS.inc(1, "hit" if hit else "miss")
+
+    # ── spill files (caller holds ``lock``) ─────────────────────────────────────
+
+    def spill(self, doc_id: str, info: dict, vectors: np.ndarray, meta: list[dict]) -> None:
+        """Write one document to disk and register it as evicted."""
+        if self._root is None:
+            self._root = Path(tempfile.mkdtemp(prefix="pdfqa-evicted-"))
+            self._owns_root = True
+        self._root.mkdir(parents=True, exist_ok=True)
+        path = self._root / hashlib.sha1(doc_id.encode("utf-8")).hexdigest()
+        np.save(path.with_suffix(".npy"), vectors)
+        path.with_suffix(".json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        self.evicted[doc_id] = EvictedDoc(dict(info), path)
+        self.evictions += 1
+        DOCUMENT_EVICTIONS.inc()
+
+    def load(self, doc_id: str) -> tuple[dict, np.ndarray, list[dict]]:
+        """(registry entry, vectors, chunk metadata) of an evicted document."""
+        doc = self.evicted[doc_id]
+        vectors = np.load(doc.path.with_suffix(".npy"))
+        meta = json.loads(doc.path.with_suffix(".json").read_text(encoding="utf-8"))
+        return doc.info, vectors, meta
+
+    def discard(self, doc_id: str) -> bool:
+        """Drop an evicted document's files; False if it wasn't evicted."""
+        doc = self.evicted.pop(doc_id, None)
+        if doc is None:
+            return False
+        doc.path.with_suffix(".npy").unlink(missing_ok=True)
+        doc.path.with_suffix(".json").unlink(missing_ok=True)
+        return True
+
+    def clear(self) -> None:
+        with self.lock:
+            for doc_id in list(self.evicted):
+                self.discard(doc_id)
+        with self._recent_lock:
+            self._recent.clear()
+
+    def close(self) -> None:
+        self.clear()
+        if self._owns_root and self._root is not None:
+            shutil.rmtree(self._root, ignore_errors=True)
+            self._root, self._owns_root = None, False
+
+    def get_stats(self, resident_documents: int, resident_bytes: int) -> dict:
+        evicted = list(self.evicted.values())
+        lookups = self.hits + self.misses
+        return {
+            "memory_budget_bytes": self.budget_bytes,
+            "resident_documents": resident_documents,
+            "resident_bytes": resident_bytes,
+            "evicted_documents": len(evicted),
+            "evicted_bytes": sum(doc.info["bytes"] for doc in evicted),
+            "hot_hits": self.hits,
+            "hot_misses": self.misses,
+            "hot_hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "reloads": self.reloads,
+        }
@@ -0,0 +1,123 @@
+"""
+Resilience helpers for the LLM path: request deadlines and a circuit breaker.
+
+Deadline
+--------
+A monotonic point in time by which an /ask must be answered.  The whole
+request (retrieval + LLM) shares one budget; stages ask for remaining().
+
+CircuitBreaker
+--------------
+closed     calls flow; consecutive failures are counted
+open       after *failure_threshold* consecutive failures, calls are refused
+           for *cooldown_seconds* (callers answer extractively instead)
+half-open  after the cool-down one probe call is let through; success
+           closes the breaker, failure re-opens it for another cool-down
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Deadline:
+    """Absolute time budget for one request."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, cooldown_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state_locked()
+
+    def _current_state_locked(self) -> str:
+        if (
+            self._state == self.OPEN
+            and time.monotonic() - self._opened_at >= self.cooldown_seconds
+        ):
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """True if a call may go upstream now (claims the probe when half-open)."""
+        with self._lock:
+            state = self._current_state_locked()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit '%s' closed after successful probe.", self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            state = self._current_state_locked()
+            if state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(
+                        "Circuit '%s' opened after %d consecutive failure(s); "
+                        "skipping upstream for %.0fs.",
+                        self.name, self._failures, self.cooldown_seconds,
+                    )
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """A claimed probe ended without a verdict (e.g. cancelled); free the slot."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._current_state_locked(),
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "short_circuited": self.short_circuited,
+            }
@@ -0,0 +1,210 @@
+"""
+Index shard node — owns a subset of the documents in distributed mode and
+serves an internal index / search / delete API to the coordinator
+(app/distributed.py).  Shards hold vectors and chunk metadata only: the
+coordinator encodes text, so nodes load no embedding model.
+
+Run one node
+────────────
+    SHARD_NAME=shard-0 uvicorn app.shard_server:app --port 9001
+
+Run several on localhost (prints the SHARD_URLS to give the coordinator)
+──────────────────────────────────────────────────────────────────────
+    python -m app.shard_server --nodes 3 --port 9001
+
+Internal API (not for clients)
+──────────────────────────────
+POST   /shard/documents            {doc_id, filename, chunks:[{text, page_number}], vectors}
+                                   409 if the doc_id is already on this shard
+DELETE /shard/documents/{doc_id}   404 if unknown
+POST   /shard/search               {vector, top_k, doc_id?, route_top_docs?}
+                                   → {hits:[…, score], generation}
+GET    /shard/stats                {name, generation, total_chunks, documents:[…]}
+
+Vectors travel as base64 little-endian float32 (rows × EMBEDDING_DIM).
+State is in memory; the coordinator re-imports INDEX_BUNDLE into empty
+shards at startup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from typing import Optional
+
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from .engine import EMBEDDING_DIM, ChunkMeta, VectorStore
+
+logger = logging.getLogger(__name__)
+
+SHARD_NAME = os.getenv("SHARD_NAME", f"shard-{os.getpid()}")
+
+
+def encode_vectors(vecs: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(vecs, dtype="<f4").tobytes()).decode("ascii")
+
+
+def decode_vectors(payload: str, rows: int) -> np.ndarray:
+    vecs = np.frombuffer(base64.b64decode(payload), dtype="<f4")
+    if vecs.size != rows * EMBEDDING_DIM:
+        raise ValueError(f"expected {rows}×{EMBEDDING_DIM} floats, got {vecs.size}")
+    return vecs.reshape(rows, EMBEDDING_DIM).astype("float32", copy=False)
+
+
+# ─────────────────────────────────────────────────────────────
+# Wire models
+# ─────────────────────────────────────────────────────────────
+
+class ShardChunk(BaseModel):
+    text: str
+    page_number: int = 1
+
+
+class ShardIndexRequest(BaseModel):
+    doc_id: str
+    filename: str
+    chunks: list[ShardChunk]
+    vectors: str
+
+
+class ShardSearchRequest(BaseModel):
+    vector: str
+    top_k: int = 5
+    doc_id: Optional[str] = None
+    route_top_docs: int = 0
+
+
+# ─────────────────────────────────────────────────────────────
+# App
+# ─────────────────────────────────────────────────────────────
+
+app = FastAPI(title=f"PDF QA index shard ({SHARD_NAME})", docs_url=None, redoc_url=None)
+store = VectorStore()
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "name": SHARD_NAME}
+
+
+@app.get("/shard/stats")
+def stats():
+    snap = store.snapshot
+    return {
+        "name": SHARD_NAME,
+        "generation": snap.generation,
+        "total_chunks": snap.ntotal,
+        "documents": [
+            {"doc_id": did, "filename": info["filename"], "num_chunks": info["num_chunks"]}
+            for did, info in snap.docs.items()
+        ],
+    }
+
+
+@app.post("/shard/documents")
+def index_document(request: ShardIndexRequest):
+    try:
+        vecs = decode_vectors(request.vectors, len(request.chunks))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    meta = [
+        ChunkMeta(doc_id=request.doc_id, filename=request.filename, chunk_index=i,
+                  text=chunk.text, page_number=chunk.page_number)
+        for i, chunk in enumerate(request.chunks)
+    ]
+    try:
+        ntotal = store.add(request.doc_id, request.filename, vecs, meta)
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    logger.info("[%s] indexed %s (%d chunks); %d vectors", SHARD_NAME,
+                request.doc_id, len(meta), ntotal)
+    return {"doc_id": request.doc_id, "num_chunks": len(meta), "total_chunks": ntotal}
+
+
+@app.delete("/shard/documents/{doc_id}")
+def delete_document(doc_id: str):
+    try:
+        ntotal = store.remove(doc_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return {"doc_id": doc_id, "total_chunks": ntotal}
+
+
+@app.post("/shard/search")
+def search(request: ShardSearchRequest):
+    snap = store.snapshot
+    try:
+        q_vec = decode_vectors(request.vector, 1)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    hits = (snap.knn(q_vec, request.top_k, request.doc_id, route_top_docs=request.route_top_docs)
+            if snap.ntotal else [])
+    return {
+        "generation": snap.generation,
+        "hits": [{**asdict(meta), "score": score} for meta, score in hits],
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# Localhost launcher
+# ─────────────────────────────────────────────────────────────
+
+def launch(nodes: int, port: int, host: str) -> int:
+    """Start *nodes* shard processes on consecutive ports; stop them on Ctrl-C
+    (or once every node has exited)."""
+    procs = []
+    for i in range(nodes):
+        env = {**os.environ, "SHARD_NAME": f"shard-{i}"}
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.shard_server:app",
+             "--host", host, "--port", str(port + i), "--log-level", "warning"],
+            env=env,
+        ))
+    urls = ",".join(f"http://{host}:{port + i}" for i in range(nodes))
+    print(f"SHARD_URLS={urls}", flush=True)
+
+    def stop(*_):
+        for p in procs:
+            p.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        running = set(range(nodes))
+        while running:
+            for i in sorted(running):
+                if procs[i].poll() is not None:
+                    # Keep the rest up: a dead node is how partial results get exercised
+                    logger.warning("shard-%d exited with status %s", i, procs[i].returncode)
+                    running.discard(i)
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+        for p in procs:
+            p.wait()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run index shard nodes on this host.")
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--port", type=int, default=9001, help="Port of the first node.")
+    parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    return launch(args.nodes, args.port, args.host)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
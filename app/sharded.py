@@ -0,0 +1,249 @@
+"""
+Sharded QA engine — partitions documents across N in-process vector stores
+and searches them in parallel (scatter-gather).
+
+Why
+───
+A global search is one exhaustive faiss.knn scan, and for a single query
+that scan runs on one core, so latency grows linearly with the corpus.
+Splitting the corpus into N shards and scanning them concurrently turns
+one long scan into N short ones.  faiss.knn releases the GIL, so plain
+threads give real parallelism; per-shard top-k lists are merged with a
+heap.
+
+Layout
+──────
+• Each shard is a VectorStore (see engine.py) with its own copy-on-write
+  generations and writer lock, so uploads / deletes on different shards
+  don't serialise, and a delete only copies its own shard.
+• Documents are placed whole on the shard holding the fewest rows, so
+  doc-scoped search touches one shard and shards stay balanced.
+• One embedding model is shared by all shards; the query is encoded once.
+• A global search reads each shard's current generation when it reaches
+  that shard.  Documents never move between shards, so a concurrent write
+  is either fully visible in a result or not at all.
+• Under a memory budget (app/residency.py) an evicted document keeps its
+  placement and is reloaded onto the same shard.
+
+Configuration
+─────────────
+INDEX_SHARDS   number of shards (default 1 = plain QAEngine in main.py;
+               "auto" = one per CPU core)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Collection, Optional
+
+import numpy as np
+
+from .engine import EMBEDDING_DIM, ChunkMeta, QAEngine, VectorStore
+
+logger = logging.getLogger(__name__)
+
+
+def shards_from_env() -> int:
+    """INDEX_SHARDS as an int ("auto" → CPU count, default 1)."""
+    configured = os.getenv("INDEX_SHARDS", "1").strip().lower()
+    if configured == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(configured))
+
+
+@dataclass
+class ShardedQAEngine(QAEngine):
+    """QAEngine whose documents are spread over ``num_shards`` VectorStores."""
+
+    num_shards: int = field(default_factory=shards_from_env)
+    _shards: list[VectorStore] = field(init=False, repr=False)
+    # doc_id → shard number; guarded by _placement_lock (reads are lock-free)
+    _placement: dict[str, int] = field(default_factory=dict, init=False, repr=False)
+    _placement_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _pool: ThreadPoolExecutor = field(init=False, repr=False)
+
+    def __post_init__(self):
+        super().__post_init__()
+        self._shards = [VectorStore(lexical=self._uses_lexical) for _ in range(self.num_shards)]
+        self._pool = ThreadPoolExecutor(max_workers=self.num_shards, thread_name_prefix="shard")
+        logger.info("Sharded index: %d shards", self.num_shards)
+
+    def spawn(self) -> "ShardedQAEngine":
+        child = super().spawn()           # shares the shard thread pool too
+        child._shards = [VectorStore(lexical=self._uses_lexical) for _ in range(self.num_shards)]
+        child._placement = {}
+        child._placement_lock = threading.Lock()
+        return child
+
+    def _store_for(self, doc_id: str) -> Optional[VectorStore]:
+        shard = self._placement.get(doc_id)
+        return self._shards[shard] if shard is not None else None
+
+    def _resident_docs(self) -> dict[str, dict]:
+        return {did: info for shard in self._shards for did, info in shard.snapshot.docs.items()}
+
+    # ── writes ─────────────────────────────────────────────────────────────────
+
+    def index_document(
+        self,
+        doc_id: str,
+        filename: str,
+        chunks: list[str],
+        page_numbers: list[int] | None = None,
+        embeddings: np.ndarray | None = None,
+    ) -> None:
+        logger.info("Indexing doc_id=%s (%s) — %d chunks", doc_id, filename, len(chunks))
+        page_numbers, vecs = self._prepare_chunks(chunks, page_numbers, embeddings)
+        new_meta = [
+            ChunkMeta(doc_id=doc_id, filename=filename, chunk_index=i,
+                      text=chunk, page_number=page_numbers[i])
+            for i, chunk in enumerate(chunks)
+        ]
+
+        with self._placement_lock:
+            if doc_id in self._placement:
+                raise ValueError(f"Document '{doc_id}' is already indexed.")
+            shard = min(range(self.num_shards), key=lambda i: self._shards[i].snapshot.ntotal)
+            self._placement[doc_id] = shard
+        try:
+            ntotal = self._shards[shard].add(doc_id, filename, vecs, new_meta)
+        except Exception:
+            with self._placement_lock:
+                self._placement.pop(doc_id, None)
+            raise
+        logger.info("Shard %d now holds %d vectors", shard, ntotal)
+        self._indexed(doc_id)
+
+    def delete_document(self, doc_id: str) -> None:
+        shard = self._placement.get(doc_id)
+        if shard is None:
+            raise ValueError(f"Document '{doc_id}' not found.")
+        with self._residency.lock:
+            self._residency.forget(doc_id)
+            if self._residency.discard(doc_id):
+                with self._placement_lock:
+                    self._placement.pop(doc_id, None)
+                self._corpus_changed()
+                logger.info("Deleted evicted doc_id=%s", doc_id)
+                return
+            ntotal = self._shards[shard].remove(doc_id)
+            with self._placement_lock:
+                self._placement.pop(doc_id, None)
+            self._corpus_changed()
+        logger.info("Deleted doc_id=%s from shard %d. Vectors remaining there: %d",
+                    doc_id, shard, ntotal)
+
+    # ── reads ──────────────────────────────────────────────────────────────────
+
+    def search(
+        self,
+        query: str,
+        doc_id: Optional[str] = None,
+        top_k: int = 5,
+        lexical_query: Optional[str] = None,
+    ) -> list[tuple[ChunkMeta, float]]:
+        if doc_id:
+            def take():
+                shard = self._placement.get(doc_id)
+                return [] if shard is None else [self._shards[shard].snapshot]
+            snaps = self._resident_snapshots([doc_id], take)
+        else:
+            snaps = [s.snapshot for s in self._shards]
+            snaps = [s for s in snaps if s.ntotal]
+        if not snaps:
+            return []
+        return self._search_in(snaps, query, doc_id, top_k,
+                               fan_out=self._pool.map if len(snaps) > 1 else map,
+                               lexical_query=lexical_query)
+
+    def retrieve(
+        self,
+        query: str,
+        doc_ids: Optional[Collection[str]] = None,
+        pages: Optional[tuple[int, int]] = None,
+        top_k: Optional[int] = None,
+        min_score: Optional[float] = None,
+        offset: int = 0,
+        limit: int = 10,
+    ) -> tuple[list[tuple[ChunkMeta, float]], int]:
+        if doc_ids is not None:
+            def take():
+                shards = {self._placement[d] for d in doc_ids if d in self._placement}
+                return [self._shards[i].snapshot for i in sorted(shards)]
+            snaps = self._resident_snapshots(doc_ids, take)
+        else:
+            snaps = [s.snapshot for s in self._shards]
+        snaps = [s for s in snaps if s.ntotal]
+        if not snaps:
+            return [], 0
+        return self._retrieve_in(snaps, query, doc_ids, pages, top_k, min_score, offset, limit,
+                                 fan_out=self._pool.map if len(snaps) > 1 else map)
+
+    def list_documents(self) -> list[dict]:
+        docs = self._resident_docs()
+        return [
+            {"doc_id": did, "filename": info["filename"], "num_chunks": info["num_chunks"]}
+            for did, info in docs.items()
+        ] + self._evicted_documents(docs)
+
+    def total_chunks(self) -> int:
+        return sum(shard.snapshot.ntotal for shard in self._shards) + self._evicted_chunks()
+
+    def memory_bytes(self) -> int:
+        return sum(info["bytes"] for shard in self._shards for info in shard.snapshot.docs.values())
+
+    def get_stats(self) -> dict:
+        snaps = [shard.snapshot for shard in self._shards]
+        return {
+            "total_documents": len(self.list_documents()),
+            "total_chunks": self.total_chunks(),
+            "embedding_model": self.model_name,
+            "embedding_backend": self._embedder.name,
+            "embedding_dim": EMBEDDING_DIM,
+            "generation": self.generation,
+            "memory_bytes": self.memory_bytes(),
+            "route_top_docs": self.route_top_docs,
+            "search_mode": self.search_mode,
+            "lexical_fast_path": self.lexical_fast_path,
+            "shards": [{"documents": len(s.docs), "chunks": s.ntotal} for s in snaps],
+            "residency": self._residency.get_stats(sum(len(s.docs) for s in snaps), self.memory_bytes()),
+        }
+
+    # ── bundles ────────────────────────────────────────────────────────────────
+
+    def _export(self) -> tuple[np.ndarray, list[ChunkMeta], dict[str, dict]]:
+        with self._residency.lock:
+            snaps = [shard.snapshot for shard in self._shards]
+            vectors = np.concatenate([s.vectors for s in snaps])
+            meta = [m for s in snaps for m in s.meta[:s.ntotal]]
+            docs = {did: info for s in snaps for did, info in s.docs.items()}
+            return self._with_evicted(vectors, meta, docs)
+
+    def _import(self, vectors: np.ndarray | None, meta: list[ChunkMeta], docs: dict[str, dict]) -> None:
+        self._residency.clear()
+        # Greedy balance: biggest documents first, each onto the emptiest shard
+        rows_by_doc: dict[str, list[int]] = {did: [] for did in docs}
+        for row, m in enumerate(meta):
+            rows_by_doc[m.doc_id].append(row)
+        loads = [0] * self.num_shards
+        assignment: list[list[str]] = [[] for _ in range(self.num_shards)]
+        for did in sorted(docs, key=lambda d: len(rows_by_doc[d]), reverse=True):
+            shard = loads.index(min(loads))
+            assignment[shard].append(did)
+            loads[shard] += len(rows_by_doc[did])
+
+        with self._placement_lock:
+            for shard, doc_ids in enumerate(assignment):
+                rows = [r for did in doc_ids for r in rows_by_doc[did]]
+                self._shards[shard].replace(
+                    vectors[rows] if rows else None,
+                    [meta[r] for r in rows],
+                    {did: docs[did] for did in doc_ids},
+                )
+            self._placement = {did: s for s, ids in enumerate(assignment) for did in ids}
+        self._corpus_changed()
+        self._enforce_budget()
@@ -0,0 +1,470 @@
+"""
+Shared, memory-mapped index for running app.main under several uvicorn
+workers (``uvicorn app.main:app --workers 4`` with SHARED_INDEX_DIR set).
+
+Every worker opens the same on-disk *store*.  Mutations (upload, delete,
+bundle import) are serialised across processes by an flock; the writer
+builds the next immutable *generation* directory beside the current one
+and publishes it by atomically replacing the ``CURRENT`` pointer file.
+Readers ``stat`` the pointer on each search and, when it changed, map the
+new generation's arrays with ``np.load(mmap_mode="r")`` — so the vectors
+and chunk text live once in the OS page cache however many workers there
+are, and an upload to any worker is visible to all of them on their next
+request.
+
+Store layout
+------------
+    <store>/.lock                   writer lock (flock)
+    <store>/CURRENT                 name of the live generation
+    <store>/gen-00000042/
+        manifest.json               generation, model, dim, ntotal
+        docs.json                   [{doc_id, filename, num_chunks}, ...] in row order
+        vectors.npy                 float32 (ntotal × dim), L2-normalised
+        text.npy / text_offsets.npy chunk text as one UTF-8 byte array + offsets
+        pages.npy / chunk_index.npy int32 per-row metadata
+
+A document's chunks occupy one contiguous row range, so doc-scoped search
+scans only that slice instead of over-fetching from the whole index.
+Search uses faiss.knn (exact inner product) directly on the mapped array.
+
+Each generation is a full copy of the previous one plus/minus a document:
+writes cost O(corpus) I/O and are meant for interactive-rate uploads, not
+bulk ingest (build a bundle with app.ingest and import it instead).  Old
+generations are removed after SHARED_INDEX_KEEP_GENERATIONS newer ones
+exist; workers still mapping them keep working (unlinked files stay valid
+while mapped).  The embedding model is still loaded once per worker.
+
+Configuration
+-------------
+SHARED_INDEX_DIR                unset -> per-process QAEngine (default)
+SHARED_INDEX_KEEP_GENERATIONS   generations kept on disk (default 3)
+"""
+
+from __future__ import annotations
+
+import bisect
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+import faiss
+import numpy as np
+
+from .engine import (
+    BUNDLE_INDEX_FILE,
+    BUNDLE_META_FILE,
+    BUNDLE_VERSION,
+    EMBEDDING_DIM,
+    ChunkMeta,
+    QAEngine,
+    UnsupportedInEngine,
+)
+from .metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+SHARED_INDEX_KEEP_GENERATIONS = int(os.getenv("SHARED_INDEX_KEEP_GENERATIONS", "3"))
+
+STORE_FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+_COPY_BLOCK_ROWS = 65_536
+_OPEN_RETRIES = 5
+
+
+@dataclass
+class _NewDocument:
+    doc_id: str
+    filename: str
+    chunks: list[str]
+    page_numbers: list[int]
+    vectors: np.ndarray
+
+
+def _map(path: Path) -> np.ndarray:
+    """Memory-map a .npy file read-only (empty arrays can't be mapped; load those)."""
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        return np.load(path)
+
+
+class _Generation:
+    """One published, immutable generation, mapped read-only."""
+
+    def __init__(self, path: Path, key: tuple[int, int]):
+        self.path = path
+        self.key = key              # (inode, mtime_ns) of CURRENT when opened
+        manifest = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+        self.generation: int = manifest["generation"]
+        self.embedding_model: str = manifest["embedding_model"]
+        self.ntotal: int = manifest["ntotal"]
+        self.docs: list[dict] = json.loads((path / "docs.json").read_text(encoding="utf-8"))
+
+        self.vectors = _map(path / "vectors.npy")
+        self.text = _map(path / "text.npy")
+        self.offsets = _map(path / "text_offsets.npy")
+        self.pages = _map(path / "pages.npy")
+        self.chunk_index = _map(path / "chunk_index.npy")
+
+        self.starts: list[int] = []
+        self.ranges: dict[str, tuple[int, int]] = {}
+        row = 0
+        for doc in self.docs:
+            self.starts.append(row)
+            self.ranges[doc["doc_id"]] = (row, row + doc["num_chunks"])
+            row += doc["num_chunks"]
+
+    def chunk_text(self, row: int) -> str:
+        return bytes(self.text[self.offsets[row]:self.offsets[row + 1]]).decode("utf-8")
+
+    def meta(self, row: int) -> ChunkMeta:
+        doc = self.docs[bisect.bisect_right(self.starts, row) - 1]
+        return ChunkMeta(
+            doc_id=doc["doc_id"],
+            filename=doc["filename"],
+            chunk_index=int(self.chunk_index[row]),
+            text=self.chunk_text(row),
+            page_number=int(self.pages[row]),
+        )
+
+
+@dataclass
+class SharedIndexEngine(QAEngine):
+    """QAEngine whose index lives in a multi-process, memory-mapped store."""
+
+    store_dir: str = ""
+    _root: Path = field(init=False, repr=False)
+    _current: Optional[_Generation] = field(default=None, init=False, repr=False)
+    _refresh_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _write_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self):
+        if not self.store_dir:
+            raise ValueError("SharedIndexEngine needs a store_dir.")
+        super().__post_init__()
+        if self._uses_lexical:
+            logger.warning("SharedIndexEngine searches vectors only; "
+                           "SEARCH_MODE / LEXICAL_FAST_PATH are ignored.")
+        if self._residency.enabled:
+            logger.warning("SharedIndexEngine does not evict documents; MEMORY_BUDGET_MB is ignored.")
+        self._root = Path(self.store_dir)
+        self._root.mkdir(parents=True, exist_ok=True)
+        snap = self._mapped()
+        logger.info(
+            "Shared index store %s — %s", self._root,
+            f"generation {snap.generation}, {snap.ntotal} vectors" if snap else "empty",
+        )
+
+    # ── reading ──────────────────────────────────────────────
+
+    def _mapped(self) -> _Generation | None:
+        """The live generation, re-mapped if another process published a new one."""
+        for _ in range(_OPEN_RETRIES):
+            try:
+                st = os.stat(self._root / CURRENT_FILE)
+            except FileNotFoundError:
+                return None
+            key = (st.st_ino, st.st_mtime_ns)
+            snap = self._current
+            if snap is not None and snap.key == key:
+                return snap
+            with self._refresh_lock:
+                snap = self._current
+                if snap is not None and snap.key == key:
+                    return snap
+                try:
+                    name = (self._root / CURRENT_FILE).read_text(encoding="utf-8").strip()
+                    snap = _Generation(self._root / name, key)
+                except FileNotFoundError:
+                    continue        # superseded and collected meanwhile; re-read pointer
+                self._current = snap
+                logger.info("Mapped shared index generation %d (%d vectors)", snap.generation, snap.ntotal)
+                return snap
+        raise RuntimeError(f"Shared index at {self._root} keeps changing; could not open it.")
+
+    def search(
+        self,
+        query: str,
+        doc_id: Optional[str] = None,
+        top_k: int = 5,
+        lexical_query: Optional[str] = None,
+    ) -> list[tuple[ChunkMeta, float]]:
+        snap = self._mapped()
+        if snap is None or snap.ntotal == 0:
+            return []
+
+        if doc_id:
+            if doc_id not in snap.ranges:
+                return []
+            start, stop = snap.ranges[doc_id]
+        else:
+            start, stop = 0, snap.ntotal
+
+        q_vec = self._embed([query])
+        with STAGE_SECONDS.time("faiss_search"):
+            scores, rows = faiss.knn(
+                q_vec, snap.vectors[start:stop], min(top_k, stop - start),
+                metric=faiss.METRIC_INNER_PRODUCT,
+            )
+        return [
+            (snap.meta(start + int(row)), float(score))
+            for score, row in zip(scores[0], rows[0])
+            if row != -1
+        ]
+
+    def list_documents(self) -> list[dict]:
+        snap = self._mapped()
+        return [dict(d) for d in snap.docs] if snap else []
+
+    def total_chunks(self) -> int:
+        snap = self._mapped()
+        return snap.ntotal if snap else 0
+
+    def memory_bytes(self) -> int:
+        """Vector bytes only, as an estimate for collection quotas."""
+        return self.total_chunks() * EMBEDDING_DIM * 4
+
+    def spawn(self) -> QAEngine:
+        raise UnsupportedInEngine("Collections are not supported with the shared index store.")
+
+    def retrieve(self, query: str, **filters) -> tuple[list[tuple[ChunkMeta, float]], int]:
+        raise UnsupportedInEngine("Retrieval-only search is not supported with the shared index store.")
+
+    @property
+    def generation(self) -> int:
+        snap = self._mapped()
+        return snap.generation if snap else 0
+
+    def get_stats(self) -> dict:
+        snap = self._mapped()
+        return {
+            "total_documents": len(snap.docs) if snap else 0,
+            "total_chunks": snap.ntotal if snap else 0,
+            "embedding_model": self.model_name,
+            "embedding_backend": self._embedder.name,
+            "embedding_dim": EMBEDDING_DIM,
+            "generation": snap.generation if snap else 0,
+            "shared_index": {"store": str(self._root), "pid": os.getpid()},
+        }
+
+    # ── writing ──────────────────────────────────────────────
+
+    @contextmanager
+    def _writer(self) -> Iterator[_Generation | None]:
+        """Exclusive write access across threads and processes; yields the latest generation."""
+        with self._write_lock, open(self._root / LOCK_FILE, "a+") as lock_fh:
+            fcntl.flock(lock_fh, fcntl.LOCK_EX)
+            try:
+                yield self._mapped()
+            finally:
+                fcntl.flock(lock_fh, fcntl.LOCK_UN)
+
+    def index_document(
+        self,
+        doc_id: str,
+        filename: str,
+        chunks: list[str],
+        page_numbers: list[int] | None = None,
+        embeddings: np.ndarray | None = None,
+    ) -> None:
+        logger.info("Indexing doc_id=%s (%s) — %d chunks", doc_id, filename, len(chunks))
+        # Encode before taking the lock — other workers' writes needn't wait on it
+        page_numbers, vecs = self._prepare_chunks(chunks, page_numbers, embeddings)
+        new = _NewDocument(doc_id, filename, chunks, page_numbers, vecs)
+        with self._writer() as base:
+            if base is not None and doc_id in base.ranges:
+                raise ValueError(f"Document '{doc_id}' is already indexed.")
+            keep = [(0, base.ntotal)] if base else []
+            self._publish(base, keep, [new])
+        self._mapped()
+
+    def delete_document(self, doc_id: str) -> None:
+        with self._writer() as base:
+            if base is None or doc_id not in base.ranges:
+                raise ValueError(f"Document '{doc_id}' not found.")
+            start, stop = base.ranges[doc_id]
+            self._publish(base, [(0, start), (stop, base.ntotal)], [], drop=doc_id)
+        snap = self._mapped()
+        logger.info("Deleted doc_id=%s. Vectors remaining: %d", doc_id, snap.ntotal)
+
+    def _publish(
+        self,
+        base: _Generation | None,
+        keep: list[tuple[int, int]],
+        added: list[_NewDocument],
+        drop: str | None = None,
+    ) -> None:
+        """Write base[keep rows] + added docs as the next generation and point CURRENT at it."""
+        keep = [(a, b) for a, b in keep if b > a]
+        ntotal = sum(b - a for a, b in keep) + sum(len(d.chunks) for d in added)
+        generation = (base.generation if base else 0) + 1
+
+        tmp = self._root / f".tmp-{uuid.uuid4().hex}"
+        tmp.mkdir()
+        try:
+            vectors = np.lib.format.open_memmap(
+                tmp / "vectors.npy", mode="w+", dtype=np.float32, shape=(ntotal, EMBEDDING_DIM)
+            )
+            pages = np.empty(ntotal, dtype=np.int32)
+            chunk_index = np.empty(ntotal, dtype=np.int32)
+            offsets = np.zeros(ntotal + 1, dtype=np.int64)
+            text_parts: list[np.ndarray] = []
+
+            row = 0
+            for a, b in keep:
+                for s in range(a, b, _COPY_BLOCK_ROWS):
+                    e = min(b, s + _COPY_BLOCK_ROWS)
+                    vectors[row + s - a:row + e - a] = base.vectors[s:e]
+                pages[row:row + b - a] = base.pages[a:b]
+                chunk_index[row:row + b - a] = base.chunk_index[a:b]
+                text_parts.append(np.asarray(base.text[base.offsets[a]:base.offsets[b]]))
+                offsets[row + 1:row + b - a + 1] = (
+                    offsets[row] + base.offsets[a + 1:b + 1] - base.offsets[a]
+                )
+                row += b - a
+
+            for doc in added:
+                n = len(doc.chunks)
+                encoded = [c.encode("utf-8") for c in doc.chunks]
+                vectors[row:row + n] = doc.vectors
+                pages[row:row + n] = doc.page_numbers
+                chunk_index[row:row + n] = np.arange(n, dtype=np.int32)
+                offsets[row + 1:row + n + 1] = offsets[row] + np.cumsum([len(b) for b in encoded])
+                text_parts.append(np.frombuffer(b"".join(encoded), dtype=np.uint8))
+                row += n
+
+            vectors.flush()
+            del vectors
+            text = np.concatenate(text_parts) if text_parts else np.zeros(0, dtype=np.uint8)
+            np.save(tmp / "text.npy", text)
+            np.save(tmp / "text_offsets.npy", offsets)
+            np.save(tmp / "pages.npy", pages)
+            np.save(tmp / "chunk_index.npy", chunk_index)
+
+            docs = [d for d in (base.docs if base else []) if d["doc_id"] != drop]
+            docs += [
+                {"doc_id": d.doc_id, "filename": d.filename, "num_chunks": len(d.chunks)}
+                for d in added
+            ]
+            (tmp / "docs.json").write_text(json.dumps(docs, ensure_ascii=False), encoding="utf-8")
+            (tmp / "manifest.json").write_text(json.dumps({
+                "version": STORE_FORMAT_VERSION,
+                "generation": generation,
+                "embedding_model": self.model_name,
+                "embedding_dim": EMBEDDING_DIM,
+                "ntotal": ntotal,
+                "created_at": time.time(),
+            }), encoding="utf-8")
+
+            name = f"gen-{generation:08d}"
+            os.replace(tmp, self._root / name)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        pointer_tmp = self._root / f".{CURRENT_FILE}.{uuid.uuid4().hex}"
+        with open(pointer_tmp, "w", encoding="utf-8") as fh:
+            fh.write(name + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(pointer_tmp, self._root / CURRENT_FILE)
+        logger.info("Published shared index generation %d (%d vectors)", generation, ntotal)
+        self._collect_garbage()
+
+    def _collect_garbage(self) -> None:
+        generations = sorted(p for p in self._root.glob("gen-*") if p.is_dir())
+        for old in generations[:-SHARED_INDEX_KEEP_GENERATIONS]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    # ── bundles ──────────────────────────────────────────────
+
+    def load_bundle(self, path: str | Path) -> None:
+        """
+        Import an index bundle into an *empty* store.  With several workers
+        all starting with INDEX_BUNDLE set, the first one imports it and the
+        rest find the store populated and skip.
+        """
+        src = Path(path)
+        with self._writer() as base:
+            if base is not None and base.ntotal:
+                logger.info("Shared index already populated; not importing bundle %s", src)
+                return
+            engine_meta, index = self._read_bundle(src)
+            vectors = index.reconstruct_n(0, index.ntotal)
+
+            # Group rows by document (bundles are written doc-contiguous; be safe)
+            rows_by_doc: dict[str, list[int]] = {doc_id: [] for doc_id in engine_meta["docs"]}
+            chunks = [ChunkMeta(**m) for m in engine_meta["chunks"]]
+            for row, meta in enumerate(chunks):
+                rows_by_doc[meta.doc_id].append(row)
+
+            added = [
+                _NewDocument(
+                    doc_id=doc_id,
+                    filename=engine_meta["docs"][doc_id]["filename"],
+                    chunks=[chunks[r].text for r in rows],
+                    page_numbers=[chunks[r].page_number for r in rows],
+                    vectors=vectors[rows],
+                )
+                for doc_id, rows in rows_by_doc.items()
+                if rows
+            ]
+            self._publish(base, [], added)
+        self._mapped()
+        logger.info("Imported index bundle %s into shared store %s", src, self._root)
+
+    def _read_bundle(self, src: Path) -> tuple[dict, faiss.Index]:
+        with open(src / BUNDLE_META_FILE, encoding="utf-8") as fh:
+            payload = json.load(fh)
+        if payload.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported bundle version: {payload.get('version')!r}")
+        if payload.get("embedding_model") != self.model_name:
+            raise ValueError(
+                f"Bundle was built with '{payload.get('embedding_model')}', "
+                f"engine uses '{self.model_name}'."
+            )
+        if payload.get("embedding_backend", "torch") != self._embedder.name:
+            logger.warning(
+                "Bundle vectors came from the %s embedding backend, queries use %s; "
+                "check agreement with `python -m app.embedders verify`.",
+                payload.get("embedding_backend", "torch"), self._embedder.name,
+            )
+        index = faiss.read_index(str(src / BUNDLE_INDEX_FILE))
+        if index.ntotal != len(payload["chunks"]):
+            raise ValueError(
+                f"Corrupt bundle: {index.ntotal} vectors but {len(payload['chunks'])} chunk records."
+            )
+        return payload, index
+
+    def save_bundle(self, path: str | Path) -> None:
+        snap = self._mapped()
+        out = Path(path)
+        out.mkdir(parents=True, exist_ok=True)
+        index = faiss.IndexFlatIP(EMBEDDING_DIM)
+        if snap is not None and snap.ntotal:
+            index.add(np.ascontiguousarray(snap.vectors))
+        faiss.write_index(index, str(out / BUNDLE_INDEX_FILE))
+        payload = {
+            "version": BUNDLE_VERSION,
+            "embedding_model": self.model_name,
+            "embedding_backend": self._embedder.name,
+            "embedding_dim": EMBEDDING_DIM,
+            "docs": {
+                d["doc_id"]: {"filename": d["filename"], "num_chunks": d["num_chunks"]}
+                for d in (snap.docs if snap else [])
+            },
+            "chunks": [asdict(snap.meta(r)) for r in range(snap.ntotal)] if snap else [],
+        }
+        with open(out / BUNDLE_META_FILE, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, ensure_ascii=False)
+        logger.info("Saved index bundle to %s (%d vectors)", out, index.ntotal)
@@ -0,0 +1,59 @@
+"""
+Single-flight request coalescing for async handlers.
+
+When many callers ask for the same thing at once (e.g. agents clicking the
+same topic chip), only the first — the *leader* — does the work; everyone
+else arriving while it is in flight awaits the same result.  Keys are
+dropped as soon as the call finishes, so this is de-duplication of
+concurrent work, not a cache.
+
+The shared work runs as its own task: a leader whose client disconnects
+(and whose handler is cancelled) doesn't cancel the call for its followers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with equal keys onto one in-flight task."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return fn()'s result, sharing it with concurrent calls for *key*."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug("%s: coalesced onto in-flight call for %r", self.name, key)
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._finished(k, t))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every waiter went away.
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
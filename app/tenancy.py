@@ -0,0 +1,215 @@
+"""
+Collections — named, independent indexes for separate tenants.
+
+Each collection owns its own engine (index, chunk metadata and document
+registry), so a search scans only that tenant's vectors and its cost grows
+with the tenant's own corpus.  Every collection's engine is spawned from
+the process engine (QAEngine.spawn), so all of them share one embedding
+model and one ingest encode pool; engine settings (sharding, search mode,
+routing) apply to each.
+
+The "default" collection is the process engine itself: requests that name
+no collection, and INDEX_BUNDLE, use it as before.
+
+Limits
+──────
+max_documents   documents in the collection                 (0 = unlimited)
+max_bytes       size of its chunks: float32 vectors
+                plus chunk text (engine.chunk_bytes)        (0 = unlimited)
+
+An upload reserves room for its document before encoding (Collection.admit)
+and releases it once indexed, so concurrent uploads cannot overshoot a
+limit between the check and the write.  New collections take their limits
+from the request, falling back to COLLECTION_MAX_DOCUMENTS /
+COLLECTION_MAX_MEMORY_MB; the default collection uses the env values.
+
+Configuration
+─────────────
+MAX_COLLECTIONS              collections per process, default included (64)
+COLLECTION_MAX_DOCUMENTS     default document limit (0)
+COLLECTION_MAX_MEMORY_MB     default memory limit in MiB (0)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from .engine import ChunkMeta, QAEngine, UnsupportedInEngine, chunk_bytes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COLLECTION = "default"
+MAX_COLLECTIONS = int(os.getenv("MAX_COLLECTIONS", "64"))
+COLLECTION_MAX_DOCUMENTS = int(os.getenv("COLLECTION_MAX_DOCUMENTS", "0"))
+COLLECTION_MAX_MEMORY_MB = float(os.getenv("COLLECTION_MAX_MEMORY_MB", "0"))
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+
+class CollectionExistsError(ValueError):
+    """A collection with that name already exists."""
+
+
+class QuotaExceededError(ValueError):
+    """The upload would take a collection past one of its limits."""
+
+
+@dataclass(frozen=True)
+class CollectionLimits:
+    max_documents: int = 0      # 0 = unlimited
+    max_bytes: int = 0          # 0 = unlimited
+
+    @classmethod
+    def from_env(cls) -> "CollectionLimits":
+        return cls(COLLECTION_MAX_DOCUMENTS, int(COLLECTION_MAX_MEMORY_MB * 1024 * 1024))
+
+    def to_dict(self) -> dict:
+        return {"max_documents": self.max_documents, "max_memory_bytes": self.max_bytes}
+
+
+@dataclass
+class Collection:
+    """One tenant's engine plus its limits and counters."""
+
+    name: str
+    engine: QAEngine
+    limits: CollectionLimits = field(default_factory=CollectionLimits.from_env)
+    created_at: float = field(default_factory=time.time)
+    searches: int = 0
+    rejected_uploads: int = 0
+    # Room held by uploads between admission and indexing
+    _pending_docs: int = field(default=0, repr=False)
+    _pending_bytes: int = field(default=0, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @contextmanager
+    def admit(self, chunks: list[str]) -> Iterator[None]:
+        """
+        Hold room for one document of *chunks* while it is indexed; raises
+        QuotaExceededError when it would not fit.
+        """
+        size = chunk_bytes(chunks)
+        with self._lock:
+            docs = len(self.engine.list_documents()) + self._pending_docs
+            used = self.engine.indexed_bytes() + self._pending_bytes
+            problem = None
+            if self.limits.max_documents and docs + 1 > self.limits.max_documents:
+                problem = f"document limit of {self.limits.max_documents} reached"
+            elif self.limits.max_bytes and used + size > self.limits.max_bytes:
+                problem = (f"memory limit of {self.limits.max_bytes} bytes exceeded "
+                           f"({used} used, document needs {size})")
+            if problem:
+                self.rejected_uploads += 1
+                raise QuotaExceededError(f"Collection '{self.name}': {problem}.")
+            self._pending_docs += 1
+            self._pending_bytes += size
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pending_docs -= 1
+                self._pending_bytes -= size
+
+    def search(
+        self,
+        query: str,
+        doc_id: Optional[str] = None,
+        top_k: int = 5,
+        lexical_query: Optional[str] = None,
+    ) -> list[tuple[ChunkMeta, float]]:
+        with self._lock:
+            self.searches += 1
+        return self.engine.search(query=query, doc_id=doc_id, top_k=top_k, lexical_query=lexical_query)
+
+    def retrieve(self, query: str, **filters) -> tuple[list[tuple[ChunkMeta, float]], int]:
+        """Retrieval-only search (QAEngine.retrieve); counts as a search."""
+        with self._lock:
+            self.searches += 1
+        return self.engine.retrieve(query, **filters)
+
+    def get_stats(self) -> dict:
+        return {
+            "name": self.name,
+            "documents": len(self.engine.list_documents()),
+            "chunks": self.engine.total_chunks(),
+            "memory_bytes": self.engine.memory_bytes(),
+            "generation": self.engine.generation,
+            "limits": self.limits.to_dict(),
+            "searches": self.searches,
+            "rejected_uploads": self.rejected_uploads,
+            "created_at": self.created_at,
+        }
+
+
+class CollectionRegistry:
+    """Name → Collection, with the process engine as the default collection."""
+
+    def __init__(self, engine: QAEngine, limits: CollectionLimits | None = None,
+                 max_collections: int = MAX_COLLECTIONS):
+        self.max_collections = max_collections
+        self._default = Collection(DEFAULT_COLLECTION, engine, limits or CollectionLimits.from_env())
+        self._collections: dict[str, Collection] = {DEFAULT_COLLECTION: self._default}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Collection:
+        """The collection called *name*; KeyError if there is none."""
+        try:
+            return self._collections[name]
+        except KeyError:
+            raise KeyError(f"Collection '{name}' not found.") from None
+
+    def create(self, name: str, limits: CollectionLimits | None = None) -> Collection:
+        if not _NAME_RE.match(name):
+            raise ValueError(
+                "Collection names are 1-64 letters, digits, '-' or '_', starting with a letter or digit."
+            )
+        with self._lock:
+            if name in self._collections:
+                raise CollectionExistsError(f"Collection '{name}' already exists.")
+            if len(self._collections) >= self.max_collections:
+                raise ValueError(f"Collection limit of {self.max_collections} reached.")
+            try:
+                engine = self._default.engine.spawn()
+            except UnsupportedInEngine as exc:
+                raise ValueError(str(exc)) from None
+            collection = Collection(name, engine, limits or CollectionLimits.from_env())
+            self._collections[name] = collection
+        logger.info("Created collection %s (%s)", name, collection.limits)
+        return collection
+
+    def drop(self, name: str) -> list[str]:
+        """Remove a collection and its index; the default collection stays.
+        Returns the doc_ids it held, evicted ones included."""
+        if name == DEFAULT_COLLECTION:
+            raise ValueError("The default collection cannot be deleted.")
+        with self._lock:
+            collection = self.get(name)
+            del self._collections[name]
+        # List before close(): closing removes the evicted documents' spill files
+        doc_ids = [doc["doc_id"] for doc in collection.engine.list_documents()]
+        collection.engine.close()
+        logger.info("Dropped collection %s (%d documents)", name, len(doc_ids))
+        return doc_ids
+
+    def list(self) -> list[Collection]:
+        return list(self._collections.values())
+
+    def __len__(self) -> int:
+        return len(self._collections)
+
+    def total_chunks(self) -> int:
+        return sum(c.engine.total_chunks() for c in self.list())
+
+    def total_documents(self) -> int:
+        return sum(len(c.engine.list_documents()) for c in self.list())
+
+    def close(self) -> None:
+        for collection in self.list():
+            collection.engine.close()
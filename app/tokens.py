@@ -0,0 +1,71 @@
+"""
+Token counting for prompt budgeting.
+
+Uses tiktoken's cl100k_base encoding when the package is installed — close to
+the Llama 3 tokenizer (also a ~100k+ vocab BPE) for English text.  Without it
+we fall back to a BPE-style pre-tokenizer: text is split the way GPT/Llama
+tokenizers pre-split it (words with their leading space, digit groups,
+punctuation runs, newlines) and long words are charged one token per
+~4 characters, which tracks real counts far better than len(text) / 4 on
+FAQ-style prose with page references and product names.
+
+The encoding is loaded on the first estimate_tokens() call, not at import:
+on a fresh install tiktoken downloads its BPE file, which must not stall
+importing the app when offline.  Success or failure is cached.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+_UNLOADED = object()
+_encoding = _UNLOADED
+_encoding_lock = threading.Lock()
+
+# Pre-tokenization in the style of cl100k / Llama 3.
+_PRETOKEN_RE = re.compile(
+    r"'(?:s|t|re|ve|m|ll|d)|[^\r\n\w]?[^\W\d_]+|\d{1,3}| ?[^\s\w]+|\s*[\r\n]+|\s+|_+",
+    re.IGNORECASE,
+)
+# Common English words are single tokens; longer ones split into subwords.
+_WHOLE_WORD_CHARS = 7
+_CHARS_PER_SUBWORD = 4
+
+
+def _get_encoding():
+    """tiktoken's cl100k_base encoding, or None if it can't be loaded (cached either way)."""
+    global _encoding
+    if _encoding is _UNLOADED:
+        with _encoding_lock:
+            if _encoding is _UNLOADED:
+                try:  # optional, exact counts
+                    import tiktoken
+
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception as exc:  # ImportError, or the encoding file can't be fetched offline
+                    logger.info("tiktoken unavailable (%s); estimating token counts.", exc)
+                    _encoding = None
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of *text* (exact with tiktoken, estimated otherwise)."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    count = 0
+    for piece in _PRETOKEN_RE.findall(text):
+        word = piece.strip()
+        if len(word) <= _WHOLE_WORD_CHARS:
+            count += 1
+        else:
+            count += math.ceil(len(word) / _CHARS_PER_SUBWORD)
+    return count
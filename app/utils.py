@@ -8,6 +8,12 @@ the end of each answer block. We prefer those cited page numbers over the
 physical PDF page number (which just tells us which sheet of paper the text
 is on). extract_cited_page() detects these inline citations.
 
+Page-text cache
+---------------
+extract_pages_from_pdf() results are cached on disk keyed by the PDF's hash
+and the pdfplumber version (see page_cache.py), so re-chunking, re-indexing
+or regenerating topics for a known PDF skips parsing entirely.
+
 Functions
 ---------
 * extract_pages_from_pdf()      -> list[(physical_page, text)]
@@ -25,8 +31,14 @@ from pathlib import Path
 
 import pdfplumber
 
+from .metrics import PAGE_CACHE_LOOKUPS, PAGES_EXTRACTED, STAGE_SECONDS
+from .page_cache import cache_from_env, file_sha256
+
 logger = logging.getLogger(__name__)
 
+EXTRACTOR_BACKEND = "pdfplumber"
+PAGE_CACHE = cache_from_env(EXTRACTOR_BACKEND, pdfplumber.__version__)
+
 # Defaults
 DEFAULT_CHUNK_SIZE    = 500
 DEFAULT_CHUNK_OVERLAP = 50
@@ -60,20 +72,35 @@ def extract_cited_page(text: str, fallback: int = 1) -> int:
     return fallback
 
 
-def extract_pages_from_pdf(filepath: str | Path) -> list[tuple[int, str]]:
+def extract_pages_from_pdf(
+    filepath: str | Path,
+    use_cache: bool = True,
+) -> list[tuple[int, str]]:
     """
     Extract text per page, preserving 1-based PHYSICAL page numbers.
 
     Returns list of (physical_page_number, page_text).
     Skips pages with no extractable text.
+    Served from PAGE_CACHE when the same PDF bytes were parsed before.
     """
     path = Path(filepath)
     if not path.exists():
         raise FileNotFoundError(f"PDF not found: {path}")
 
+    cache = PAGE_CACHE if use_cache else None
+    digest = None
+    if cache is not None:
+        digest = file_sha256(path)
+        cached = cache.get(digest)
+        PAGE_CACHE_LOOKUPS.inc(1, "miss" if cached is None else "hit")
+        if cached is not None:
+            logger.info("Page cache hit for %s (%d page(s))", path.name, len(cached))
+            PAGES_EXTRACTED.inc(len(cached))
+            return cached
+
     pages: list[tuple[int, str]] = []
     try:
-        with pdfplumber.open(path) as pdf:
+        with STAGE_SECONDS.time("pdf_extract"), pdfplumber.open(path) as pdf:
             for page_num, page in enumerate(pdf.pages, start=1):
                 text = page.extract_text()
                 if text and text.strip():
@@ -83,6 +110,10 @@ def extract_pages_from_pdf(filepath: str | Path) -> list[tuple[int, str]]:
     except Exception as exc:
         raise RuntimeError(f"pdfplumber failed on '{path}': {exc}") from exc
 
+    if cache is not None:
+        cache.put(digest, pages)
+    PAGES_EXTRACTED.inc(len(pages))
+
     logger.info("Extracted %d page(s) from %s", len(pages), path.name)
     return pages
 
@@ -177,6 +208,16 @@ def chunk_text_with_pages(
     This means answers in this QA-format PDF will always cite the correct
     document page (e.g. 27) rather than which sheet of paper they appear on.
     """
+    with STAGE_SECONDS.time("chunking"):
+        return _chunk_text_with_pages(pages, chunk_size, chunk_overlap, min_chunk_length)
+
+
+def _chunk_text_with_pages(
+    pages:            list[tuple[int, str]],
+    chunk_size:       int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap:    int = DEFAULT_CHUNK_OVERLAP,
+    min_chunk_length: int = MIN_CHUNK_LENGTH,
+) -> list[tuple[str, int]]:
     # Flatten pages into (sentence, physical_page) pairs
     sentence_page_pairs: list[tuple[str, int]] = []
     for phys_page, page_text in pages:
@@ -299,55 +340,52 @@ def extract_headings(filepath: str | Path, max_headings: int = 12) -> list[str]:
     headings: list[str] = []
     seen:     set[str]  = set()
 
+    # Same page text as extract_pages_from_pdf(), so topics reuse the cache.
     try:
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if not text:
-                    continue
-
-                for raw_line in text.splitlines():
-                    line = raw_line.strip()
-
-                    # Skip empty or very short lines
-                    if len(line) < 10:
-                        continue
-
-                    # Skip pure page citations e.g. "Page 27"
-                    if _CITED_PAGE_RE.fullmatch(line):
-                        continue
-
-                    is_heading = False
-
-                    # Rule 1: question that ends with "?" and is short enough
-                    # to be a heading, not a paragraph mid-sentence question
-                    if (
-                        _QUESTION_START.match(line)
-                        and line.endswith("?")
-                        and len(line) < 80
-                    ):
-                        is_heading = True
-
-                    # Rule 2: ALL CAPS line, 3–6 words (avoids long cap sentences)
-                    elif (
-                        line.isupper()
-                        and 3 <= len(line.split()) <= 6
-                        and len(line) < 60
-                    ):
-                        is_heading = True
-
-                    if is_heading:
-                        cleaned = " ".join(line.split())
-                        key     = cleaned.lower()
-                        if key not in seen:
-                            seen.add(key)
-                            headings.append(cleaned)
-
-                    if len(headings) >= max_headings:
-                        break
-
+        pages = extract_pages_from_pdf(path)
     except Exception as exc:
         raise RuntimeError(f"Heading extraction failed on '{path}': {exc}") from exc
 
+    for _, text in pages:
+        for raw_line in text.splitlines():
+            line = raw_line.strip()
+
+            # Skip empty or very short lines
+            if len(line) < 10:
+                continue
+
+            # Skip pure page citations e.g. "Page 27"
+            if _CITED_PAGE_RE.fullmatch(line):
+                continue
+
+            is_heading = False
+
+            # Rule 1: question that ends with "?" and is short enough
+            # to be a heading, not a paragraph mid-sentence question
+            if (
+                _QUESTION_START.match(line)
+                and line.endswith("?")
+                and len(line) < 80
+            ):
+                is_heading = True
+
+            # Rule 2: ALL CAPS line, 3–6 words (avoids long cap sentences)
+            elif (
+                line.isupper()
+                and 3 <= len(line.split()) <= 6
+                and len(line) < 60
+            ):
+                is_heading = True
+
+            if is_heading:
+                cleaned = " ".join(line.split())
+                key     = cleaned.lower()
+                if key not in seen:
+                    seen.add(key)
+                    headings.append(cleaned)
+
+            if len(headings) >= max_headings:
+                break
+
     logger.info("Extracted %d heading(s) from %s", len(headings), path.name)
     return headings[:max_headings]
\ No newline at end of file
@@ -0,0 +1,296 @@
+"""
+Core pipeline benchmarks — extraction, chunking, embedding, search, delete.
+
+Usage
+-----
+    python -m benchmarks.bench_core --out results.json
+    python -m benchmarks.bench_core --scales 1k,10k,100k,1m --out big.json
+    python -m benchmarks.bench_core --baseline main.json     # fail on regression
+
+What is measured
+----------------
+extract    extract_pages_from_pdf on a synthetic FAQ PDF (page cache off)
+chunking   chunk_text_with_pages over synthetic FAQ pages
+embed      QAEngine._embed in batches (whatever model the engine loads)
+scale_N    for each corpus size N: indexing throughput with precomputed
+           random vectors (so a 1M-chunk run doesn't take hours of encoding),
+           global and doc-scoped search latency (p50/p95/p99, plus the FAISS
+           share of it) and delete_document latency
+
+Results are written as JSON: run metadata plus a flat list of
+``{"name", "value", "unit", "better"}`` records that benchmarks.compare
+checks against a baseline using the tolerances in thresholds.json.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import faiss
+import numpy as np
+
+from app.engine import EMBEDDING_DIM, QAEngine
+from app.metrics import STAGE_SECONDS, resident_memory_bytes
+from app.utils import chunk_text_with_pages, extract_pages_from_pdf
+
+from .compare import compare, load_thresholds, print_report
+from .synthetic import faq_chunks, faq_pages, faq_questions, random_unit_vectors, write_pdf
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+DEFAULT_SCALES = "1k,10k,100k"
+CHUNKS_PER_DOC = 500
+
+
+class Results:
+    def __init__(self):
+        self.records: list[dict] = []
+        self.skipped: list[dict] = []
+
+    def add(self, name: str, value: float, unit: str, better: str) -> None:
+        self.records.append(
+            {"name": name, "value": round(float(value), 6), "unit": unit, "better": better}
+        )
+        logger.info("%-40s %14.3f %s", name, value, unit)
+
+    def skip(self, name: str, reason: str) -> None:
+        self.skipped.append({"name": name, "reason": reason})
+        logger.info("%-40s skipped (%s)", name, reason)
+
+
+def parse_scale(token: str) -> int:
+    token = token.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(token[-1:], 1)
+    return int(float(token.rstrip("km")) * factor)
+
+
+def scale_label(n: int) -> str:
+    if n % 1_000_000 == 0:
+        return f"{n // 1_000_000}m"
+    if n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+def _latencies(fn: Callable[[], object], n: int) -> np.ndarray:
+    samples = np.empty(n)
+    for i in range(n):
+        start = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - start
+    return samples * 1000.0
+
+
+def _add_latency(results: Results, prefix: str, samples_ms: np.ndarray) -> None:
+    for q in (50, 95, 99):
+        results.add(f"{prefix}.p{q}_ms", np.percentile(samples_ms, q), "ms", "lower")
+    results.add(f"{prefix}.qps", 1000.0 / samples_ms.mean(), "1/s", "higher")
+
+
+# ─────────────────────────────────────────────────────────────
+# Stages
+# ─────────────────────────────────────────────────────────────
+
+def bench_extract(results: Results, num_pages: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = write_pdf(Path(tmp) / "faq.pdf", faq_pages(num_pages))
+        best = min(
+            _latencies(lambda: extract_pages_from_pdf(str(pdf), use_cache=False), repeat)
+        ) / 1000.0
+    results.add("extract.pages_per_s", num_pages / best, "pages/s", "higher")
+
+
+def bench_chunking(results: Results, num_pages: int, repeat: int) -> None:
+    pages = faq_pages(num_pages)
+    n_chunks = len(chunk_text_with_pages(pages))
+    best = min(_latencies(lambda: chunk_text_with_pages(pages), repeat)) / 1000.0
+    results.add("chunking.pages_per_s", num_pages / best, "pages/s", "higher")
+    results.add("chunking.chunks_per_s", n_chunks / best, "chunks/s", "higher")
+
+
+def bench_embed(results: Results, engine: QAEngine, num_texts: int, batch_size: int) -> None:
+    texts = faq_chunks(num_texts)
+    engine._embed(texts[:batch_size])              # warm-up
+    start = time.perf_counter()
+    for i in range(0, num_texts, batch_size):
+        engine._embed(texts[i:i + batch_size])
+    elapsed = time.perf_counter() - start
+    results.add("embed.texts_per_s", num_texts / elapsed, "texts/s", "higher")
+    query_ms = _latencies(lambda: engine._embed(["How do I reset my router?"]), 50)
+    results.add("embed.query_p50_ms", np.percentile(query_ms, 50), "ms", "lower")
+
+
+def bench_scale(
+    results: Results,
+    n_chunks: int,
+    queries: int,
+    scoped_queries: int,
+    delete_max_chunks: int,
+) -> None:
+    label = f"scale_{scale_label(n_chunks)}"
+    engine = QAEngine()
+    rss_before = resident_memory_bytes()
+
+    # Build: documents of CHUNKS_PER_DOC chunks each, vectors precomputed.
+    texts = faq_chunks(min(n_chunks, 10_000))
+    doc_ids: list[str] = []
+    index_seconds = 0.0
+    for d, start in enumerate(range(0, n_chunks, CHUNKS_PER_DOC)):
+        size = min(CHUNKS_PER_DOC, n_chunks - start)
+        chunks = [texts[(start + i) % len(texts)] for i in range(size)]
+        vecs = random_unit_vectors(size, EMBEDDING_DIM, seed=d)
+        doc_id = f"doc-{d:05d}"
+        t0 = time.perf_counter()
+        engine.index_document(
+            doc_id=doc_id,
+            filename=f"{doc_id}.pdf",
+            chunks=chunks,
+            page_numbers=[1 + i // 4 for i in range(size)],
+            embeddings=vecs,
+        )
+        index_seconds += time.perf_counter() - t0
+        doc_ids.append(doc_id)
+    results.add(f"{label}.index.chunks_per_s", n_chunks / index_seconds, "chunks/s", "higher")
+    results.add(
+        f"{label}.memory.bytes_per_chunk",
+        (resident_memory_bytes() - rss_before) / n_chunks, "B", "lower",
+    )
+
+    rng = random.Random(0)
+    questions = faq_questions(max(queries, scoped_queries))
+
+    def run_search(prefix: str, n: int, scoped: bool) -> None:
+        it = iter(range(n))
+
+        def one():
+            i = next(it)
+            engine.search(
+                questions[i], doc_id=rng.choice(doc_ids) if scoped else None, top_k=5
+            )
+
+        faiss_before = STAGE_SECONDS.snapshot("faiss_search")[1]
+        samples = _latencies(one, n)
+        faiss_ms = (STAGE_SECONDS.snapshot("faiss_search")[1] - faiss_before) * 1000.0 / n
+        _add_latency(results, prefix, samples)
+        results.add(f"{prefix}.faiss_mean_ms", faiss_ms, "ms", "lower")
+
+    engine.search(questions[0], top_k=5)          # warm-up
+    run_search(f"{label}.search", queries, scoped=False)
+    run_search(f"{label}.search_doc", scoped_queries, scoped=True)
+
+    if n_chunks > delete_max_chunks:
+        results.skip(
+            f"{label}.delete",
+            f"{n_chunks} chunks > --delete-max-chunks {delete_max_chunks}",
+        )
+    else:
+        t0 = time.perf_counter()
+        engine.delete_document(doc_ids[len(doc_ids) // 2])
+        results.add(f"{label}.delete.seconds", time.perf_counter() - t0, "s", "lower")
+    del engine
+
+
+# ─────────────────────────────────────────────────────────────
+# Entry point
+# ─────────────────────────────────────────────────────────────
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = Results()
+    scales = [parse_scale(s) for s in args.scales.split(",") if s.strip()]
+
+    if not args.skip_pipeline:
+        bench_extract(results, args.extract_pages, args.repeat)
+        bench_chunking(results, args.chunk_pages, args.repeat)
+        bench_embed(results, QAEngine(), args.embed_texts, args.batch_size)
+
+    for n in scales:
+        bench_scale(results, n, args.queries, args.scoped_queries, args.delete_max_chunks)
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "faiss": getattr(faiss, "__version__", "unknown"),
+            "scales": scales,
+        },
+        "results": results.records,
+        "skipped": results.skipped,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the PDF QA pipeline.")
+    parser.add_argument("--scales", default=DEFAULT_SCALES,
+                        help="Comma-separated corpus sizes, e.g. 1k,10k,100k,1m.")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="Global searches per scale.")
+    parser.add_argument("--scoped-queries", type=int, default=50,
+                        help="Doc-scoped searches per scale.")
+    parser.add_argument("--delete-max-chunks", type=int, default=1_000_000,
+                        help="Skip the delete benchmark above this corpus size "
+                             "(delete copies every surviving vector).")
+    parser.add_argument("--extract-pages", type=int, default=40)
+    parser.add_argument("--chunk-pages", type=int, default=400)
+    parser.add_argument("--embed-texts", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Repetitions for extract/chunking (best is kept).")
+    parser.add_argument("--skip-pipeline", action="store_true",
+                        help="Only run the index-scale benchmarks.")
+    parser.add_argument("--out", help="Write JSON results here (default: stdout).")
+    parser.add_argument("--baseline", help="Compare against this results file.")
+    parser.add_argument("--thresholds", default=str(Path(__file__).with_name("thresholds.json")))
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    logging.getLogger(__name__).setLevel(logging.INFO)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        rows = compare(baseline, report, load_thresholds(args.thresholds))
+        return print_report(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Embedding-backend benchmark — PyTorch vs. ONNX Runtime (fp32 / int8) on CPU.
+
+Usage
+-----
+    python -m benchmarks.bench_embed                                # every backend, all cores
+    python -m benchmarks.bench_embed --backends torch,onnx-int8 --threads 1,2,4 --out embed.json
+    python -m benchmarks.compare embed-main.json embed.json
+
+What is measured
+----------------
+For each backend (EMBED_BACKEND value) and intra-op thread count:
+
+<backend>_t<N>.batch.chunks_per_s   ingest throughput: synthetic FAQ chunks
+                                    encoded in batches of --batch-size
+<backend>_t<N>.query.*              single-query encode latency (p50/p95/p99, qps)
+<backend>_t<N>.cosine_min/mean      agreement with the PyTorch vectors for the
+<backend>_t<N>.topk_overlap         same chunks (see app.embedders.agreement)
+
+Backends whose runtime isn't installed are recorded under "skipped".
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.embedders import BACKENDS, agreement, embedder_from_env
+from app.engine import MODEL_NAME
+
+from .bench_core import Results, _add_latency, _git_commit, _latencies
+from .compare import compare, load_thresholds, print_report
+from .synthetic import faq_chunks, faq_questions
+
+
+SCHEMA_VERSION = 1
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = Results()
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    thread_counts = [int(t) for t in args.threads.split(",") if t.strip()]
+    texts = faq_chunks(args.texts)
+    questions = faq_questions(args.queries)
+    reference: np.ndarray | None = None
+
+    for backend in backends:
+        for threads in thread_counts:
+            label = f"{backend}_t{threads}"
+            os.environ["EMBED_THREADS"] = str(threads)
+            try:
+                embedder = embedder_from_env(args.model, backend=backend)
+            except (ImportError, RuntimeError) as exc:
+                results.skip(label, str(exc))
+                continue
+
+            embedder.encode(texts[:args.batch_size], batch_size=args.batch_size)   # warm-up
+            start = time.perf_counter()
+            vecs = embedder.encode(texts, batch_size=args.batch_size)
+            results.add(f"{label}.batch.chunks_per_s",
+                        len(texts) / (time.perf_counter() - start), "chunks/s", "higher")
+
+            it = iter(questions)
+            _add_latency(results, f"{label}.query",
+                         _latencies(lambda: embedder.encode([next(it)]), len(questions)))
+
+            if backend == "torch":
+                reference = vecs if reference is None else reference
+            elif reference is not None:
+                report = agreement(reference, vecs)
+                results.add(f"{label}.cosine_min", report["cosine_min"], "cosine", "higher")
+                results.add(f"{label}.cosine_mean", report["cosine_mean"], "cosine", "higher")
+                if report["topk_overlap"] is not None:
+                    results.add(f"{label}.topk_overlap", report["topk_overlap"], "ratio", "higher")
+            del embedder
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": _git_commit(),
+            "cpu_count": os.cpu_count(),
+            "model": args.model,
+            "texts": len(texts),
+            "batch_size": args.batch_size,
+        },
+        "results": results.records,
+        "skipped": results.skipped,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends.")
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help="Comma-separated EMBED_BACKEND values; put torch first for agreement.")
+    parser.add_argument("--threads", default=str(os.cpu_count() or 1),
+                        help="Comma-separated intra-op thread counts (default: all cores).")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--texts", type=int, default=1000, help="Chunks encoded for throughput.")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--out", help="Write JSON results here (default: stdout).")
+    parser.add_argument("--baseline", help="Compare against this results file.")
+    parser.add_argument("--thresholds", default=str(Path(__file__).with_name("thresholds.json")))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return print_report(compare(baseline, report, load_thresholds(args.thresholds)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
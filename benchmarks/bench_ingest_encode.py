@@ -0,0 +1,153 @@
+"""
+Ingest-encoding benchmark — chunk throughput of the bucketed / pooled ingest
+path against a plain encode() call over the same chunks.
+
+Usage
+-----
+    python -m benchmarks.bench_ingest_encode                        # 5k chunks, workers 2..cpu_count
+    python -m benchmarks.bench_ingest_encode --chunks 20k --workers 2,4 --out ingest.json
+    python -m benchmarks.compare ingest-main.json ingest.json
+
+What is measured
+----------------
+The corpus is synthetic FAQ text cut to a spread of lengths (one sentence to
+a full 500-char chunk), shuffled, like the chunks of a real upload batch.
+
+plain.chunks_per_s        embedder.encode(texts) — the path before bucketing
+bucketed.chunks_per_s     encode_bucketed() in this process
+pool_N.chunks_per_s       encode_bucketed() on an EncodePool of N processes
+                          (pool start-up and model loading excluded)
+<mode>.speedup            chunks/s relative to plain
+<mode>.cosine_min         lowest per-chunk cosine against the plain vectors;
+                          below 0.9999 the run aborts (a row came back out
+                          of order or was encoded differently)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.embedders import (
+    INGEST_TOKENS_PER_BATCH,
+    EncodePool,
+    embedder_from_env,
+    encode_bucketed,
+)
+from app.engine import MODEL_NAME
+
+from .bench_core import Results, _git_commit, parse_scale
+from .compare import compare, load_thresholds, print_report
+from .synthetic import faq_chunks
+
+
+SCHEMA_VERSION = 1
+MIN_COSINE = 0.9999
+
+
+def varied_chunks(n: int, seed: int = 0) -> list[str]:
+    """*n* texts from ~40 to 500 chars, in random order."""
+    rng = random.Random(seed)
+    base = faq_chunks(n, seed=seed)
+    texts = []
+    for i, text in enumerate(base):
+        joined = " ".join([text, base[(i + 1) % n], base[(i + 2) % n]])
+        texts.append(joined[: rng.choice((40, 80, 160, 320, 500))])
+    return texts
+
+
+def timed(fn, texts: list[str]) -> tuple[np.ndarray, float]:
+    fn(texts[:64])                                  # warm-up
+    start = time.perf_counter()
+    vecs = fn(texts)
+    return vecs, len(texts) / (time.perf_counter() - start)
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = Results()
+    texts = varied_chunks(parse_scale(args.chunks))
+    embedder = embedder_from_env(args.model, backend=args.backend)
+
+    reference, plain = timed(embedder.encode, texts)
+    results.add("plain.chunks_per_s", plain, "chunks/s", "higher")
+
+    def record(label: str, vecs: np.ndarray, rate: float) -> None:
+        cosine = float(np.sum(reference * vecs, axis=1).min())
+        if cosine < MIN_COSINE:
+            raise SystemExit(f"{label}: vectors differ from the plain path (min cosine {cosine:.5f})")
+        results.add(f"{label}.chunks_per_s", rate, "chunks/s", "higher")
+        results.add(f"{label}.speedup", rate / plain, "x", "higher")
+        results.add(f"{label}.cosine_min", cosine, "cosine", "higher")
+
+    record("bucketed", *timed(lambda t: encode_bucketed(embedder, t, args.token_budget), texts))
+
+    for n in (int(w) for w in args.workers.split(",") if w.strip()):
+        pool = EncodePool(args.model, embedder.name, n)
+        try:
+            list(pool.map([["warm-up"]] * n * 2))     # start workers and load their models
+            record(f"pool_{n}", *timed(
+                lambda t: encode_bucketed(embedder, t, args.token_budget, pool=pool), texts,
+            ))
+        finally:
+            pool.shutdown()
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": _git_commit(),
+            "cpu_count": os.cpu_count(),
+            "model": args.model,
+            "backend": embedder.name,
+            "chunks": len(texts),
+            "token_budget": args.token_budget,
+        },
+        "results": results.records,
+        "skipped": results.skipped,
+    }
+
+
+def _default_workers() -> str:
+    cores = os.cpu_count() or 1
+    return ",".join(str(n) for n in sorted({2, cores}) if n <= cores) if cores > 1 else ""
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark bucketed / multi-process ingest encoding.")
+    parser.add_argument("--chunks", default="5k")
+    parser.add_argument("--workers", default=_default_workers(),
+                        help="Comma-separated encode-pool sizes (default: 2 and cpu_count).")
+    parser.add_argument("--token-budget", type=int, default=INGEST_TOKENS_PER_BATCH)
+    parser.add_argument("--backend", default=None, help="EMBED_BACKEND value (default: env).")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--out", help="Write JSON results here (default: stdout).")
+    parser.add_argument("--baseline", help="Compare against this results file.")
+    parser.add_argument("--thresholds", default=str(Path(__file__).with_name("thresholds.json")))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return print_report(compare(baseline, report, load_thresholds(args.thresholds)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Lexical-search benchmark — retrieval quality and latency of vector, hybrid
+(BM25 + cosine) and lexical fast-path search over the same index.
+
+Usage
+-----
+    python -m benchmarks.bench_lexical                              # 5k chunks, 200 queries per set
+    python -m benchmarks.bench_lexical --chunks 20k --alpha 0.3 --out lexical.json
+    python -m benchmarks.compare lexical-main.json lexical.json
+
+What is measured
+----------------
+The corpus is synthetic FAQ chunks (benchmarks/synthetic.py) in documents
+of --chunks-per-doc, encoded once with the configured embedding backend and
+indexed with BM25 postings.  Two labelled query sets, each answered by the
+chunks that contain its identifying token:
+
+natural    the chunk's own question ("How do I reset my router (model 417)?")
+keyword    "<product> <reference code>", the way agents paste an error code
+
+For each mode (vector, hybrid, vector + fast path, hybrid + fast path) and
+query set:
+
+<mode>.<set>.recall_at_k     share of queries with a relevant chunk in the top k
+<mode>.<set>.mrr             mean reciprocal rank of the first relevant chunk
+<mode>.<set>.search.*        engine.search() latency, query encoding included
+<mode>.<set>.fast_path_rate  share of queries answered without the model
+
+plus lexical.build.chunks_per_s (postings construction) and
+lexical.bytes_per_chunk (postings arrays, excluding the shared term dicts).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.engine import MODEL_NAME, QAEngine
+from app.lexical import HYBRID_ALPHA, DocPostings
+from app.metrics import SEARCHES
+
+from .bench_core import Results, _add_latency, _git_commit, _latencies, parse_scale
+from .compare import compare, load_thresholds, print_report
+from .synthetic import faq_chunks
+
+
+SCHEMA_VERSION = 1
+MODES = {
+    "vector": ("vector", False),
+    "hybrid": ("hybrid", False),
+    "vector_fast": ("vector", True),
+    "hybrid_fast": ("hybrid", True),
+}
+_QUESTION_RE = re.compile(r"^Q\d+\. (How do I .+? my (.+?) \(model (\d+)\)\?)")
+_CODE_RE = re.compile(r"reference code (\d+)")
+
+
+def labelled_queries(texts: list[str], n: int, seed: int = 2) -> dict[str, list[tuple[str, set[int]]]]:
+    """(query, relevant chunk numbers) per query set."""
+    rng = random.Random(seed)
+    picks = rng.sample(range(len(texts)), min(n, len(texts)))
+
+    def containing(token: str) -> set[int]:
+        pattern = re.compile(rf"\b{token}\b")
+        return {i for i, text in enumerate(texts) if pattern.search(text)}
+
+    sets: dict[str, list[tuple[str, set[int]]]] = {"natural": [], "keyword": []}
+    for i in picks:
+        question, product, model = _QUESTION_RE.match(texts[i]).groups()
+        code = _CODE_RE.search(texts[i]).group(1)
+        sets["natural"].append((question, containing(f"model {model}") | {i}))
+        sets["keyword"].append((f"{product} {code}", containing(code) | {i}))
+    return sets
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = Results()
+    n = parse_scale(args.chunks)
+    texts = faq_chunks(n)
+    engine = QAEngine(model_name=args.model, search_mode="hybrid", hybrid_alpha=args.alpha)
+    vecs = engine._embed_chunks(texts)
+
+    docs = [(f"doc-{d:05d}", start) for d, start in enumerate(range(0, n, args.chunks_per_doc))]
+    start = time.perf_counter()
+    postings = [DocPostings.from_texts(texts[a:a + args.chunks_per_doc]) for _, a in docs]
+    results.add("lexical.build.chunks_per_s", n / (time.perf_counter() - start), "chunks/s", "higher")
+    results.add(
+        "lexical.bytes_per_chunk",
+        sum(p.offsets.nbytes + p.positions.nbytes + p.tf.nbytes + p.lengths.nbytes for p in postings) / n,
+        "B", "lower",
+    )
+
+    for doc_id, a in docs:
+        b = min(a + args.chunks_per_doc, n)
+        engine.index_document(doc_id, f"{doc_id}.pdf", texts[a:b], embeddings=vecs[a:b])
+    position = {(doc_id, i): a + i for doc_id, a in docs for i in range(args.chunks_per_doc)}
+
+    query_sets = labelled_queries(texts, args.queries)
+    for label, (mode, fast_path) in MODES.items():
+        engine.search_mode, engine.lexical_fast_path = mode, fast_path
+        for set_name, queries in query_sets.items():
+            prefix = f"{label}.{set_name}"
+            fast_before = SEARCHES.value("lexical")
+            ranks = []
+            for query, relevant in queries:
+                hits = engine.search(query, top_k=args.top_k)
+                found = [r for r, (m, _) in enumerate(hits, 1)
+                         if position[(m.doc_id, m.chunk_index)] in relevant]
+                ranks.append(found[0] if found else None)
+            results.add(f"{prefix}.recall_at_k", np.mean([r is not None for r in ranks]), "ratio", "higher")
+            results.add(f"{prefix}.mrr", np.mean([1.0 / r if r else 0.0 for r in ranks]), "ratio", "higher")
+            results.add(f"{prefix}.fast_path_rate",
+                        (SEARCHES.value("lexical") - fast_before) / len(queries), "ratio", "higher")
+
+            it = iter(queries)
+            _add_latency(results, f"{prefix}.search",
+                         _latencies(lambda: engine.search(next(it)[0], top_k=args.top_k), len(queries)))
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": _git_commit(),
+            "cpu_count": os.cpu_count(),
+            "model": args.model,
+            "backend": engine._embedder.name,
+            "chunks": n,
+            "chunks_per_doc": args.chunks_per_doc,
+            "top_k": args.top_k,
+            "hybrid_alpha": args.alpha,
+        },
+        "results": results.records,
+        "skipped": results.skipped,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark vector / hybrid / lexical fast-path search.")
+    parser.add_argument("--chunks", default="5k")
+    parser.add_argument("--chunks-per-doc", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200, help="Queries per query set.")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--alpha", type=float, default=HYBRID_ALPHA, help="HYBRID_ALPHA value.")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--out", help="Write JSON results here (default: stdout).")
+    parser.add_argument("--baseline", help="Compare against this results file.")
+    parser.add_argument("--thresholds", default=str(Path(__file__).with_name("thresholds.json")))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return print_report(compare(baseline, report, load_thresholds(args.thresholds)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Residency benchmark — hot-set hit rate, doc-scoped search latency on hits
+and misses, and resident memory under MEMORY_BUDGET_MB.
+
+Usage
+-----
+    python -m benchmarks.bench_residency                            # 200 docs × 50 chunks
+    python -m benchmarks.bench_residency --docs 1000 --budgets 0.1,0.25,0.5 --zipf 1.2
+    python -m benchmarks.compare residency-main.json residency.json
+
+What is measured
+----------------
+Synthetic FAQ chunks (benchmarks/synthetic.py) in --docs documents, encoded
+once and indexed into a fresh engine per budget.  Each budget is a share of
+the corpus size (chunk vectors + text).  Doc-scoped queries then pick their
+document from a Zipf distribution (exponent --zipf), so a few documents are
+hot and most are cold, as in a real document library.
+
+b<B>.hot_hit_rate       share of queries whose document was resident
+b<B>.hit.search.*       engine.search() latency when it was (p50/p95/p99, qps)
+b<B>.miss.search.*      latency when the document had to be reloaded first
+b<B>.resident_mb        resident vectors + chunk text after the run
+b<B>.evictions          documents spilled to disk during the run
+
+plus full.search.* — the same queries with no budget, for reference.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.engine import MODEL_NAME, QAEngine, chunk_bytes
+
+from .bench_core import Results, _add_latency, _git_commit
+from .compare import compare, load_thresholds, print_report
+from .synthetic import faq_chunks
+
+
+SCHEMA_VERSION = 1
+
+
+def zipf_docs(n_docs: int, n: int, exponent: float, seed: int = 3) -> np.ndarray:
+    """*n* document numbers, document d drawn with weight 1 / (rank + 1) ** exponent."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, n_docs + 1) ** exponent
+    ranks = rng.choice(n_docs, size=n, p=weights / weights.sum())
+    return rng.permutation(n_docs)[ranks]          # hot documents spread over the upload order
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = Results()
+    texts = faq_chunks(args.docs * args.chunks)
+    loader = QAEngine(model_name=args.model)
+    vecs = loader._embed_chunks(texts)
+    corpus_bytes = chunk_bytes(texts)
+    picks = zipf_docs(args.docs, args.queries, args.zipf)
+    queries = [(f"doc-{d:05d}", texts[d * args.chunks]) for d in picks]
+
+    budgets = [("full", 0.0)] + [
+        (f"b{b}", float(b)) for b in args.budgets.split(",") if b.strip()
+    ]
+    for label, share in budgets:
+        engine = QAEngine(model_name=args.model, memory_budget_bytes=int(share * corpus_bytes))
+        for d in range(args.docs):
+            a = d * args.chunks
+            doc_id = f"doc-{d:05d}"
+            engine.index_document(doc_id, f"{doc_id}.pdf", texts[a:a + args.chunks],
+                                  embeddings=vecs[a:a + args.chunks])
+        residency = engine._residency
+        evictions_before = residency.evictions
+
+        hit, miss = [], []
+        for doc_id, query in queries:
+            misses = residency.misses
+            start = time.perf_counter()
+            engine.search(query, doc_id=doc_id, top_k=args.top_k)
+            elapsed = time.perf_counter() - start
+            (miss if residency.misses > misses else hit).append(elapsed)
+
+        if not share:
+            _add_latency(results, "full.search", np.array(hit) * 1000.0)
+        else:
+            results.add(f"{label}.hot_hit_rate", len(hit) / len(queries), "ratio", "higher")
+            results.add(f"{label}.resident_mb", engine.memory_bytes() / 2 ** 20, "MB", "lower")
+            results.add(f"{label}.evictions", residency.evictions - evictions_before, "docs", "lower")
+            for name, samples in (("hit", hit), ("miss", miss)):
+                if samples:
+                    _add_latency(results, f"{label}.{name}.search", np.array(samples) * 1000.0)
+                else:
+                    results.skip(f"{label}.{name}.search", "no such queries at this budget")
+        engine.close()
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": _git_commit(),
+            "cpu_count": os.cpu_count(),
+            "model": args.model,
+            "backend": loader._embedder.name,
+            "docs": args.docs,
+            "chunks_per_doc": args.chunks,
+            "corpus_mb": corpus_bytes / 2 ** 20,
+            "zipf": args.zipf,
+            "top_k": args.top_k,
+        },
+        "results": results.records,
+        "skipped": results.skipped,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the memory budget and document eviction.")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=50, help="Chunks per document.")
+    parser.add_argument("--budgets", default="0.1,0.25,0.5",
+                        help="Comma-separated budgets as shares of the corpus size.")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of document popularity.")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--out", help="Write JSON results here (default: stdout).")
+    parser.add_argument("--baseline", help="Compare against this results file.")
+    parser.add_argument("--thresholds", default=str(Path(__file__).with_name("thresholds.json")))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return print_report(compare(baseline, report, load_thresholds(args.thresholds)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Document-routing benchmark — recall and latency of two-stage global search
+(route to the top-M documents, then scan their chunks) against the
+exhaustive scan, at thousands of documents.
+
+Usage
+-----
+    python -m benchmarks.bench_routing                              # 2000 docs × 100 chunks
+    python -m benchmarks.bench_routing --docs 5000 --top-docs 10,25,50,100 --reps 1,4,8
+    python -m benchmarks.compare routing-main.json routing.json
+
+What is measured
+----------------
+A clustered corpus: documents belong to shared themes (about DOCS_PER_THEME
+per theme, like several manuals for one product line), each has a few
+sub-topics around its theme, and its chunks are noisy copies of those
+sub-topics.  Random unit vectors would give documents no identity to route
+on.  Queries are heavily perturbed chunks of random documents, so their
+nearest chunks are often spread over several documents of the same theme.  For every representative count R (--reps) and M (--top-docs):
+
+exhaustive.search.*       knn over every row (p50/p95/p99, qps)
+r<R>_m<M>.search.*        routed knn latency
+r<R>_m<M>.recall_at_k     share of the exhaustive top-k that routing also returns
+r<R>_m<M>.speedup         exhaustive mean latency / routed mean latency
+
+Vectors are searched directly on the index snapshot, so query encoding is
+not part of the numbers.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.engine import EMBEDDING_DIM, ChunkMeta, VectorStore
+
+from .bench_core import Results, _add_latency, _git_commit, _latencies
+from .compare import compare, load_thresholds, print_report
+
+
+SCHEMA_VERSION = 1
+SUBTOPICS_PER_DOC = 4
+DOCS_PER_THEME = 20
+
+
+def _unit(rows: np.ndarray) -> np.ndarray:
+    return (rows / np.linalg.norm(rows, axis=-1, keepdims=True)).astype("float32")
+
+
+def clustered_corpus(docs: int, chunks: int, seed: int = 0) -> list[np.ndarray]:
+    """Per document: chunks × dim unit vectors around its topic's sub-topics."""
+    rng = np.random.default_rng(seed)
+    themes = _unit(rng.standard_normal((max(1, docs // DOCS_PER_THEME), EMBEDDING_DIM)))
+    corpus = []
+    for _ in range(docs):
+        theme = themes[rng.integers(len(themes))]
+        topic = _unit(theme + 0.05 * rng.standard_normal(EMBEDDING_DIM))
+        subtopics = _unit(topic + 0.06 * rng.standard_normal((SUBTOPICS_PER_DOC, EMBEDDING_DIM)))
+        picks = subtopics[rng.integers(0, SUBTOPICS_PER_DOC, chunks)]
+        corpus.append(_unit(picks + 0.06 * rng.standard_normal((chunks, EMBEDDING_DIM))))
+    return corpus
+
+
+def build(corpus: list[np.ndarray], reps: int) -> VectorStore:
+    store = VectorStore(representatives=reps)
+    for d, vecs in enumerate(corpus):
+        doc_id = f"doc-{d:05d}"
+        meta = [ChunkMeta(doc_id, f"{doc_id}.pdf", i, "") for i in range(len(vecs))]
+        store.add(doc_id, f"{doc_id}.pdf", vecs, meta)
+    return store
+
+
+def queries(corpus: list[np.ndarray], n: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = [corpus[rng.integers(len(corpus))][rng.integers(len(corpus[0]))] for _ in range(n)]
+    return _unit(np.array(picks) + 0.1 * rng.standard_normal((n, EMBEDDING_DIM)))
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = Results()
+    corpus = clustered_corpus(args.docs, args.chunks)
+    qs = queries(corpus, args.queries)
+    top_docs = [int(m) for m in args.top_docs.split(",") if m.strip()]
+
+    def key(hits):
+        return {(m.doc_id, m.chunk_index) for m, _ in hits}
+
+    exact: list[set] | None = None
+    exhaustive_mean = 0.0
+    for reps in (int(r) for r in args.reps.split(",") if r.strip()):
+        snap = build(corpus, reps).snapshot
+        if exact is None:
+            exact = [key(snap.knn(q[None], args.top_k)) for q in qs]
+            it = iter(qs)
+            samples = _latencies(lambda: snap.knn(next(it)[None], args.top_k), len(qs))
+            _add_latency(results, "exhaustive.search", samples)
+            exhaustive_mean = samples.mean()
+
+        for m in top_docs:
+            label = f"r{reps}_m{m}"
+            found = [key(snap.knn(q[None], args.top_k, route_top_docs=m)) for q in qs]
+            recall = np.mean([len(f & e) / len(e) for f, e in zip(found, exact)])
+            it = iter(qs)
+            samples = _latencies(
+                lambda: snap.knn(next(it)[None], args.top_k, route_top_docs=m), len(qs),
+            )
+            _add_latency(results, f"{label}.search", samples)
+            results.add(f"{label}.recall_at_k", float(recall), "ratio", "higher")
+            results.add(f"{label}.speedup", exhaustive_mean / samples.mean(), "x", "higher")
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": _git_commit(),
+            "cpu_count": os.cpu_count(),
+            "docs": args.docs,
+            "chunks_per_doc": args.chunks,
+            "top_k": args.top_k,
+        },
+        "results": results.records,
+        "skipped": results.skipped,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark two-stage document routing.")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--chunks", type=int, default=100, help="Chunks per document.")
+    parser.add_argument("--top-docs", default="5,10,25,50,100", help="Comma-separated M values.")
+    parser.add_argument("--reps", default="1,4", help="Comma-separated representatives per document.")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--out", help="Write JSON results here (default: stdout).")
+    parser.add_argument("--baseline", help="Compare against this results file.")
+    parser.add_argument("--thresholds", default=str(Path(__file__).with_name("thresholds.json")))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return print_report(compare(baseline, report, load_thresholds(args.thresholds)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Retrieval benchmark — latency of filtered and threshold (range) searches on
+an index snapshot, with filters pushed into the scan versus applied to an
+over-fetched top-k afterwards.
+
+Usage
+-----
+    python -m benchmarks.bench_search                               # 1000 docs × 100 chunks
+    python -m benchmarks.bench_search --docs 5000 --doc-share 0.01 --thresholds-at 0.3,0.5
+    python -m benchmarks.compare search-main.json search.json
+
+What is measured
+----------------
+Random unit vectors in --docs documents of --chunks chunks, 2 chunks per
+page, indexed into one VectorStore.  Queries are perturbed chunks, so each
+query has one close match.  The cases are
+
+unfiltered      top-k over every row (faiss.knn)
+docs            top-k within a random --doc-share of the documents
+pages           top-k within pages 1 .. 10 of every document
+range_<T>       every row with cosine ≥ T, first page of --top-k sorted
+
+For the two filters, <case>.pushdown.search.* is IndexSnapshot.retrieve()
+and <case>.postfilter.search.* is knn over --overfetch × top-k rows
+followed by a Python filter; <case>.postfilter.recall_at_k is the share of
+the exact filtered top-k the post-filter still returns.  range_<T>.matches
+is the mean number of qualifying rows.  Query encoding is not included.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.engine import EMBEDDING_DIM, ChunkMeta, VectorStore
+
+from .bench_core import Results, _add_latency, _git_commit, _latencies
+from .compare import compare, load_thresholds, print_report
+
+
+SCHEMA_VERSION = 1
+CHUNKS_PER_PAGE = 2
+PAGE_RANGE = (1, 10)
+
+
+def _unit(rows: np.ndarray) -> np.ndarray:
+    return (rows / np.linalg.norm(rows, axis=-1, keepdims=True)).astype("float32")
+
+
+def build(docs: int, chunks: int, seed: int = 0) -> VectorStore:
+    rng = np.random.default_rng(seed)
+    store = VectorStore()
+    for d in range(docs):
+        doc_id = f"doc-{d:05d}"
+        meta = [ChunkMeta(doc_id, f"{doc_id}.pdf", i, "", page_number=1 + i // CHUNKS_PER_PAGE)
+                for i in range(chunks)]
+        store.add(doc_id, f"{doc_id}.pdf", _unit(rng.standard_normal((chunks, EMBEDDING_DIM))), meta)
+    return store
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = Results()
+    snap = build(args.docs, args.chunks).snapshot
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, snap.ntotal, args.queries)
+    qs = _unit(snap.vectors[picks] + 0.03 * rng.standard_normal((args.queries, EMBEDDING_DIM)))
+    doc_sets = [
+        set(rng.choice(list(snap.docs), max(1, int(args.doc_share * args.docs)), replace=False))
+        for _ in range(args.queries)
+    ]
+    k = args.top_k
+
+    def key(hits):
+        return {(m.doc_id, m.chunk_index) for m, _ in hits}
+
+    it = iter(qs)
+    _add_latency(results, "unfiltered.search", _latencies(lambda: snap.retrieve(next(it)[None], k), len(qs)))
+
+    filters = {
+        "docs": (lambda i: {"doc_ids": doc_sets[i]}, lambda i, m: m.doc_id in doc_sets[i]),
+        "pages": (lambda i: {"pages": PAGE_RANGE},
+                  lambda i, m: PAGE_RANGE[0] <= m.page_number <= PAGE_RANGE[1]),
+    }
+    for case, (kwargs, keep) in filters.items():
+        exact = [key(snap.retrieve(q[None], k, **kwargs(i))[0]) for i, q in enumerate(qs)]
+        it = iter(enumerate(qs))
+        _add_latency(results, f"{case}.pushdown.search", _latencies(
+            lambda: (lambda i, q: snap.retrieve(q[None], k, **kwargs(i)))(*next(it)), len(qs)))
+
+        def postfilter(i, q):
+            return [hit for hit in snap.knn(q[None], k * args.overfetch) if keep(i, hit[0])][:k]
+
+        found = [key(postfilter(i, q)) for i, q in enumerate(qs)]
+        it = iter(enumerate(qs))
+        _add_latency(results, f"{case}.postfilter.search",
+                     _latencies(lambda: postfilter(*next(it)), len(qs)))
+        results.add(f"{case}.postfilter.recall_at_k",
+                    np.mean([len(f & e) / len(e) for f, e in zip(found, exact) if e]), "ratio", "higher")
+
+    for threshold in (float(t) for t in args.thresholds_at.split(",") if t.strip()):
+        label = f"range_{threshold:g}"
+        matches = [snap.retrieve(q[None], k, min_score=threshold)[1] for q in qs]
+        it = iter(qs)
+        _add_latency(results, f"{label}.search", _latencies(
+            lambda: snap.retrieve(next(it)[None], k, min_score=threshold), len(qs)))
+        results.add(f"{label}.matches", float(np.mean(matches)), "rows", "higher")
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": _git_commit(),
+            "cpu_count": os.cpu_count(),
+            "docs": args.docs,
+            "chunks_per_doc": args.chunks,
+            "doc_share": args.doc_share,
+            "overfetch": args.overfetch,
+            "top_k": k,
+        },
+        "results": results.records,
+        "skipped": results.skipped,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark filtered and range retrieval.")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--chunks", type=int, default=100, help="Chunks per document.")
+    parser.add_argument("--doc-share", type=float, default=0.05,
+                        help="Share of documents in each doc_ids filter.")
+    parser.add_argument("--overfetch", type=int, default=10,
+                        help="Post-filter baseline fetches this many × top-k rows.")
+    parser.add_argument("--thresholds-at", default="0.3,0.5,0.8",
+                        help="Comma-separated min_score values for range searches.")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--out", help="Write JSON results here (default: stdout).")
+    parser.add_argument("--baseline", help="Compare against this results file.")
+    parser.add_argument("--thresholds", default=str(Path(__file__).with_name("thresholds.json")))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return print_report(compare(baseline, report, load_thresholds(args.thresholds)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Sharded-search benchmark — global search latency of ShardedQAEngine as the
+shard count grows, against the single-store QAEngine.
+
+Usage
+-----
+    python -m benchmarks.bench_sharded                           # 200k chunks, 1..cpu_count shards
+    python -m benchmarks.bench_sharded --chunks 1m --shards 1,2,4,8 --out sharded.json
+    python -m benchmarks.compare sharded-main.json sharded.json
+
+What is measured
+----------------
+For the same corpus (random unit vectors, CHUNKS_PER_DOC chunks per
+document) indexed into QAEngine and into ShardedQAEngine with each shard
+count:
+
+shards_N.search.*         end-to-end global search latency (p50/p95/p99, qps)
+shards_N.scan_mean_ms     mean of the faiss_search stage (the scatter-gather)
+shards_N.speedup          single-store scan time / sharded scan time
+shards_N.efficiency       speedup / min(N, cpu_count) — 1.0 is linear
+
+Every sharded result list is checked against the single-store one (same
+chunks, same order up to score ties); a mismatch aborts the run.  Speed-up
+is bounded by physical cores — meta.cpu_count is recorded with the results.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from app.engine import EMBEDDING_DIM, QAEngine
+from app.metrics import STAGE_SECONDS
+from app.sharded import ShardedQAEngine
+
+from .bench_core import CHUNKS_PER_DOC, Results, _add_latency, _git_commit, _latencies, parse_scale
+from .compare import compare, load_thresholds, print_report
+from .synthetic import faq_chunks, faq_questions, random_unit_vectors
+
+
+SCHEMA_VERSION = 1
+
+
+def build(engine: QAEngine, corpus: list[np.ndarray], texts: list[str]) -> None:
+    for d, vecs in enumerate(corpus):
+        doc_id = f"doc-{d:05d}"
+        engine.index_document(doc_id, f"{doc_id}.pdf", texts[:len(vecs)], embeddings=vecs)
+
+
+def scan_mean_ms(engine: QAEngine, questions: list[str]) -> tuple[np.ndarray, float]:
+    """Run every question once; return (latencies_ms, mean faiss_search ms)."""
+    count_before, sum_before = STAGE_SECONDS.snapshot("faiss_search")
+    it = iter(questions)
+    samples = _latencies(lambda: engine.search(next(it), top_k=5), len(questions))
+    count, total = STAGE_SECONDS.snapshot("faiss_search")
+    return samples, (total - sum_before) * 1000.0 / max(count - count_before, 1)
+
+
+def same_hits(expected, got) -> bool:
+    """Same scores rank by rank; chunk identity may differ only between tied scores."""
+    def key(hits):
+        return sorted((round(score, 5), m.doc_id, m.chunk_index) for m, score in hits)
+    return [round(s, 5) for _, s in expected] == [round(s, 5) for _, s in got] \
+        and key(expected) == key(got)
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = Results()
+    n_chunks = parse_scale(args.chunks)
+    shard_counts = [int(s) for s in args.shards.split(",") if s.strip()]
+    cores = os.cpu_count() or 1
+
+    texts = faq_chunks(CHUNKS_PER_DOC)
+    corpus = [
+        random_unit_vectors(min(CHUNKS_PER_DOC, n_chunks - start), EMBEDDING_DIM, seed=d)
+        for d, start in enumerate(range(0, n_chunks, CHUNKS_PER_DOC))
+    ]
+    questions = faq_questions(args.queries)
+
+    baseline = QAEngine()
+    build(baseline, corpus, texts)
+    for q in questions[:5]:
+        baseline.search(q)                                  # warm-up
+    expected = [baseline.search(q, top_k=5) for q in questions]
+    samples, base_scan = scan_mean_ms(baseline, questions)
+    _add_latency(results, "single.search", samples)
+    results.add("single.scan_mean_ms", base_scan, "ms", "lower")
+    del baseline
+
+    for n in shard_counts:
+        engine = ShardedQAEngine(num_shards=n)
+        build(engine, corpus, texts)
+        for q in questions[:5]:
+            engine.search(q)
+        for q, want in zip(questions, expected):
+            if not same_hits(want, engine.search(q, top_k=5)):
+                raise SystemExit(f"shards={n}: results differ from the single store for {q!r}")
+        samples, scan = scan_mean_ms(engine, questions)
+        label = f"shards_{n}"
+        _add_latency(results, f"{label}.search", samples)
+        results.add(f"{label}.scan_mean_ms", scan, "ms", "lower")
+        results.add(f"{label}.speedup", base_scan / scan, "x", "higher")
+        results.add(f"{label}.efficiency", base_scan / scan / min(n, cores), "ratio", "higher")
+        engine._pool.shutdown()
+        del engine
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": _git_commit(),
+            "cpu_count": cores,
+            "faiss": getattr(faiss, "__version__", "unknown"),
+            "chunks": n_chunks,
+            "shards": shard_counts,
+        },
+        "results": results.records,
+        "skipped": results.skipped,
+    }
+
+
+def _default_shards() -> str:
+    cores = os.cpu_count() or 1
+    counts = [1, 2]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    return ",".join(map(str, sorted(set(counts) | {cores})))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark sharded scatter-gather search.")
+    parser.add_argument("--chunks", default="200k", help="Corpus size, e.g. 200k or 1m.")
+    parser.add_argument("--shards", default=_default_shards(),
+                        help="Comma-separated shard counts (default: powers of two up to cpu_count).")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--out", help="Write JSON results here (default: stdout).")
+    parser.add_argument("--baseline", help="Compare against this results file.")
+    parser.add_argument("--thresholds", default=str(Path(__file__).with_name("thresholds.json")))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    logging.getLogger("benchmarks.bench_core").setLevel(logging.INFO)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return print_report(compare(baseline, report, load_thresholds(args.thresholds)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
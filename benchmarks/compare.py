@@ -0,0 +1,92 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+Usage
+-----
+    python -m benchmarks.compare baseline.json current.json
+    python -m benchmarks.compare baseline.json current.json --thresholds my.json
+
+A metric regresses when it moves in its "worse" direction by more than its
+tolerance (a fraction of the baseline).  Tolerances come from
+thresholds.json: fnmatch patterns mapped to fractions, first match wins,
+falling back to "default".  Exit status is 1 if anything regressed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import sys
+from pathlib import Path
+
+DEFAULT_TOLERANCE = 0.25
+
+
+def load_thresholds(path: str | Path | None) -> dict:
+    if path is None or not Path(path).exists():
+        return {"default": DEFAULT_TOLERANCE, "metrics": {}}
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def tolerance_for(name: str, thresholds: dict) -> float:
+    for pattern, tol in thresholds.get("metrics", {}).items():
+        if fnmatch.fnmatchcase(name, pattern):
+            return float(tol)
+    return float(thresholds.get("default", DEFAULT_TOLERANCE))
+
+
+def compare(baseline: dict, current: dict, thresholds: dict) -> list[dict]:
+    """One row per metric present in both runs."""
+    base = {r["name"]: r for r in baseline.get("results", [])}
+    rows = []
+    for rec in current.get("results", []):
+        old = base.get(rec["name"])
+        if old is None or old["value"] == 0:
+            continue
+        change = (rec["value"] - old["value"]) / abs(old["value"])
+        worse = -change if rec["better"] == "higher" else change
+        tol = tolerance_for(rec["name"], thresholds)
+        rows.append({
+            "name": rec["name"],
+            "unit": rec["unit"],
+            "baseline": old["value"],
+            "current": rec["value"],
+            "change": change,
+            "tolerance": tol,
+            "regressed": worse > tol,
+        })
+    return rows
+
+
+def print_report(rows: list[dict]) -> int:
+    """Print a table; return the process exit status (1 on regression)."""
+    width = max((len(r["name"]) for r in rows), default=10)
+    for r in rows:
+        flag = "REGRESSED" if r["regressed"] else "ok"
+        print(
+            f"{r['name']:<{width}}  {r['baseline']:>12.3f} -> {r['current']:>12.3f} "
+            f"{r['unit']:<8} {r['change']:+7.1%}  (tol {r['tolerance']:.0%})  {flag}"
+        )
+    regressed = [r["name"] for r in rows if r["regressed"]]
+    if regressed:
+        print(f"\n{len(regressed)} regression(s): {', '.join(regressed)}")
+        return 1
+    print(f"\nNo regressions across {len(rows)} metric(s).")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare benchmark results.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--thresholds", default=str(Path(__file__).with_name("thresholds.json")))
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    return print_report(compare(baseline, current, load_thresholds(args.thresholds)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,413 @@
+"""
+Load-test harness — replay recorded /ask and /upload traffic (or a synthetic
+mix) against the API and report per-endpoint throughput, latency
+percentiles and error rates.
+
+Usage
+-----
+    # In-process app, LLM behind the local stub, synthetic 95/5 ask/upload mix
+    python -m benchmarks.loadtest --concurrency 16 --requests 500
+
+    # Replay a recording (REQUEST_LOG_PATH) at 20 req/s open-loop arrivals
+    python -m benchmarks.loadtest --replay traffic.jsonl --rate 20 --pdf-dir ./pdfs
+
+    # Replay with the recorded inter-arrival times, 4x faster, against a server
+    python -m benchmarks.loadtest --replay traffic.jsonl --timing recorded --speedup 4 \\
+        --url http://localhost:8000
+
+Targets
+-------
+Without --url the app is imported and driven in-process through httpx's
+ASGI transport, with LLM_BACKEND=stub (see app/backends.py) unless the
+environment already selects a backend — no network, no API key, and the
+stub's latency / 429 settings shape the LLM side.  With --url a running
+server is driven over HTTP; start it with LLM_BACKEND=stub for the same
+isolation.
+
+The app's client-side LLM budgets (GROQ_*_PER_MINUTE / _PER_DAY) still
+apply, and calls they reject are answered with HTTP 200 and a "try again"
+message — the report therefore includes the limiter and circuit-breaker
+counters from /health.  --no-llm-budget lifts the budgets (in-process only)
+to measure the app's own capacity rather than the Groq quota.
+
+Load shape
+----------
+--concurrency N   closed loop: N workers, each sends its next request as
+                  soon as the previous one finishes
+--rate R          open loop: Poisson arrivals at R req/s, regardless of
+                  how fast responses come back (exposes queueing)
+--timing recorded replay with the recording's own inter-arrival gaps
+
+Replay files
+------------
+JSON Lines in the app/request_log.py format.  The encoding is sniffed from
+the byte-order mark (UTF-8, UTF-8-SIG, UTF-16 LE/BE, UTF-32) with a BOM-less
+UTF-16 fallback, since logs exported from Windows tooling are often UTF-16.
+Lines that aren't /ask, /ask/stream or /upload records are counted and
+skipped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import codecs
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+import httpx
+import numpy as np
+
+from .synthetic import faq_pages, faq_questions, write_pdf
+
+logger = logging.getLogger(__name__)
+
+REPLAYABLE_ENDPOINTS = ("/ask", "/ask/stream", "/upload")
+DEFAULT_MIX = "ask=0.95,upload=0.05"
+REQUEST_TIMEOUT_SECONDS = 120.0
+UNLIMITED_BUDGET = "1000000000"
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+# ─────────────────────────────────────────────────────────────
+# Workload
+# ─────────────────────────────────────────────────────────────
+
+@dataclass
+class Call:
+    endpoint: str
+    body: dict | None = None        # JSON body for /ask, /ask/stream
+    filename: str | None = None     # /upload
+    at: float | None = None         # seconds from start (recorded timing)
+
+
+def sniff_encoding(raw: bytes) -> str:
+    """Encoding for a log file's bytes: BOM first, then a UTF-16 NUL-byte heuristic."""
+    for bom, encoding in _BOMS:
+        if raw.startswith(bom):
+            return encoding
+    head = raw[:4096]
+    if len(head) >= 2:
+        even_nuls = head[0::2].count(0)
+        odd_nuls = head[1::2].count(0)
+        half = len(head) // 2
+        if odd_nuls > 0.3 * half and even_nuls == 0:
+            return "utf-16-le"
+        if even_nuls > 0.3 * half and odd_nuls == 0:
+            return "utf-16-be"
+    return "utf-8"
+
+
+def read_replay(path: str | Path) -> tuple[list[Call], int]:
+    """Parse a recording into calls; returns (calls, skipped_line_count)."""
+    raw = Path(path).read_bytes()
+    encoding = sniff_encoding(raw)
+    text = raw.decode(encoding, errors="replace")
+    logger.info("Reading %s as %s", path, encoding)
+
+    calls: list[Call] = []
+    skipped = 0
+    first_ts = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rec = json.loads(line)
+        except json.JSONDecodeError:
+            skipped += 1
+            continue
+        endpoint = rec.get("endpoint") if isinstance(rec, dict) else None
+        if endpoint not in REPLAYABLE_ENDPOINTS:
+            skipped += 1
+            continue
+        ts = rec.get("ts")
+        if isinstance(ts, (int, float)):
+            first_ts = ts if first_ts is None else first_ts
+            at = ts - first_ts
+        else:
+            at = None
+        if endpoint == "/upload":
+            calls.append(Call(endpoint, filename=rec.get("filename"), at=at))
+        elif isinstance(rec.get("body"), dict) and rec["body"].get("question"):
+            calls.append(Call(endpoint, body=rec["body"], at=at))
+        else:
+            skipped += 1
+    return calls, skipped
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        endpoint = "/" + name.strip().lstrip("/").replace("ask_stream", "ask/stream")
+        if endpoint not in REPLAYABLE_ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in --mix: {name!r}")
+        mix[endpoint] = float(weight)
+    return mix
+
+
+def synthetic_calls(mix: dict[str, float], n: int, seed: int = 0) -> Iterator[Call]:
+    rng = random.Random(seed)
+    questions = faq_questions(max(n, 1), seed=seed + 1)
+    endpoints, weights = zip(*mix.items())
+    for i in range(n):
+        endpoint = rng.choices(endpoints, weights)[0]
+        if endpoint == "/upload":
+            yield Call(endpoint, filename=f"synthetic_{i:05d}.pdf")
+        else:
+            yield Call(endpoint, body={"question": questions[i], "doc_id": None, "top_k": 3})
+
+
+# ─────────────────────────────────────────────────────────────
+# Execution
+# ─────────────────────────────────────────────────────────────
+
+@dataclass
+class EndpointStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0                 # transport failures / timeouts (no status)
+
+    def summary(self, elapsed: float) -> dict:
+        lat = np.asarray(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        total = sum(self.statuses.values()) + self.errors
+        failed = self.errors + sum(n for s, n in self.statuses.items() if s >= 400)
+        return {
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 3) if elapsed else 0.0,
+            "p50_ms": round(float(np.percentile(lat, 50)), 2),
+            "p95_ms": round(float(np.percentile(lat, 95)), 2),
+            "p99_ms": round(float(np.percentile(lat, 99)), 2),
+            "max_ms": round(float(lat.max()), 2),
+            "error_rate": round(failed / total, 4) if total else 0.0,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "transport_errors": self.errors,
+        }
+
+
+class Runner:
+    def __init__(self, client: httpx.AsyncClient, pdf_dir: Path | None, scratch: Path):
+        self.client = client
+        self.pdf_dir = pdf_dir
+        self.scratch = scratch
+        self.stats: dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self._synthetic_pdf: Path | None = None
+
+    def _pdf_for(self, filename: str | None) -> tuple[str, bytes]:
+        if self.pdf_dir and filename and (self.pdf_dir / filename).is_file():
+            return filename, (self.pdf_dir / filename).read_bytes()
+        if self._synthetic_pdf is None:
+            self._synthetic_pdf = write_pdf(self.scratch / "synthetic.pdf", faq_pages(8))
+        return filename or "synthetic.pdf", self._synthetic_pdf.read_bytes()
+
+    async def send(self, call: Call) -> None:
+        stats = self.stats[call.endpoint]
+        start = time.perf_counter()
+        try:
+            if call.endpoint == "/upload":
+                name, data = self._pdf_for(call.filename)
+                response = await self.client.post(
+                    "/upload", files={"file": (name, data, "application/pdf")}
+                )
+            elif call.endpoint == "/ask/stream":
+                # Latency is time to the complete answer (the whole event stream)
+                async with self.client.stream("POST", "/ask/stream", json=call.body) as response:
+                    async for _ in response.aiter_bytes():
+                        pass
+            else:
+                response = await self.client.post(call.endpoint, json=call.body)
+        except (httpx.HTTPError, asyncio.TimeoutError) as exc:
+            stats.errors += 1
+            logger.debug("%s failed: %s", call.endpoint, exc)
+            return
+        stats.latencies_ms.append((time.perf_counter() - start) * 1000.0)
+        stats.statuses[response.status_code] += 1
+
+    async def closed_loop(self, calls: list[Call], concurrency: int) -> None:
+        queue = iter(calls)
+
+        async def worker():
+            for call in queue:
+                await self.send(call)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def open_loop(self, calls: list[Call], rate: float | None, speedup: float, seed: int) -> None:
+        rng = random.Random(seed)
+        start = time.perf_counter()
+        tasks = []
+        offset = 0.0
+        for call in calls:
+            if rate:
+                offset += rng.expovariate(rate)
+            else:
+                offset = (call.at or 0.0) / speedup
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self.send(call)))
+        await asyncio.gather(*tasks)
+
+
+async def _seed_documents(client: httpx.AsyncClient, n: int, scratch: Path) -> None:
+    """Make sure there is something to ask about before measuring."""
+    listed = (await client.get("/documents")).json()
+    for i in range(max(0, n - len(listed))):
+        pdf = write_pdf(scratch / f"seed_{i}.pdf", faq_pages(10, seed=100 + i))
+        response = await client.post(
+            "/upload", files={"file": (pdf.name, pdf.read_bytes(), "application/pdf")}
+        )
+        response.raise_for_status()
+
+
+def _make_client(url: str | None, no_llm_budget: bool, scratch: Path) -> httpx.AsyncClient:
+    timeout = httpx.Timeout(REQUEST_TIMEOUT_SECONDS)
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=timeout)
+    os.environ.setdefault("LLM_BACKEND", "stub")
+    # Uploaded PDFs go to the run's scratch directory, not the app's app/uploads
+    os.environ.setdefault("UPLOAD_DIR", str(scratch / "uploads"))
+    if no_llm_budget:
+        for var in ("GROQ_REQUESTS_PER_MINUTE", "GROQ_TOKENS_PER_MINUTE",
+                    "GROQ_REQUESTS_PER_DAY", "GROQ_TOKENS_PER_DAY"):
+            os.environ[var] = UNLIMITED_BUDGET
+    from app.main import app      # imported late so the env above applies
+
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=timeout
+    )
+
+
+async def run(args: argparse.Namespace) -> dict:
+    if args.replay:
+        calls, skipped = read_replay(args.replay)
+        if args.requests:
+            calls = calls[: args.requests]
+        source = {"replay": str(args.replay), "skipped_lines": skipped}
+    else:
+        calls = list(synthetic_calls(parse_mix(args.mix), args.requests, seed=args.seed))
+        source = {"mix": args.mix}
+    if not calls:
+        raise SystemExit("No replayable requests.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = Path(tmp)
+        async with _make_client(args.url, args.no_llm_budget, scratch) as client:
+            await _seed_documents(client, args.seed_docs, scratch)
+            runner = Runner(client, Path(args.pdf_dir) if args.pdf_dir else None, scratch)
+            start = time.perf_counter()
+            if args.rate or args.timing == "recorded":
+                await runner.open_loop(calls, args.rate, args.speedup, args.seed)
+                shape = {"rate": args.rate} if args.rate else {"timing": "recorded", "speedup": args.speedup}
+            else:
+                await runner.closed_loop(calls, args.concurrency)
+                shape = {"concurrency": args.concurrency}
+            elapsed = time.perf_counter() - start
+            health = (await client.get("/health")).json()
+
+    all_stats = EndpointStats()
+    for s in runner.stats.values():
+        all_stats.latencies_ms += s.latencies_ms
+        all_stats.statuses.update(s.statuses)
+        all_stats.errors += s.errors
+    return {
+        "target": args.url or "in-process",
+        "llm_backend": os.getenv("LLM_BACKEND", "groq") if not args.url else "server-side",
+        "source": source,
+        "load": shape,
+        "elapsed_seconds": round(elapsed, 3),
+        "overall": all_stats.summary(elapsed),
+        "endpoints": {ep: s.summary(elapsed) for ep, s in sorted(runner.stats.items())},
+        "server": {
+            "llm_limiter": health.get("llm_limiter"),
+            "llm_circuit": health.get("llm_circuit"),
+            "ask_coalescing": health.get("ask_coalescing"),
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"target={report['target']}  source={report['source']}  "
+        f"load={report['load']}  elapsed={report['elapsed_seconds']}s"
+    )
+    header = f"{'endpoint':<14}{'reqs':>7}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'err%':>8}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("ALL", report["overall"])]
+    for name, s in rows:
+        print(
+            f"{name:<14}{s['requests']:>7}{s['throughput_rps']:>9.1f}"
+            f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}"
+            f"{s['error_rate'] * 100:>7.1f}%"
+        )
+    server = report["server"]
+    limiter, circuit = server.get("llm_limiter") or {}, server.get("llm_circuit") or {}
+    print(
+        f"\nLLM limiter: admitted={limiter.get('admitted')} rejected={limiter.get('rejected')}  "
+        f"circuit: {circuit.get('state')} (short-circuited={circuit.get('short_circuited')})  "
+        f"coalesced /ask: {(server.get('ask_coalescing') or {}).get('coalesced')}"
+    )
+    if limiter.get("rejected"):
+        print("note: limiter rejections are HTTP 200 'try again' answers; "
+              "see --no-llm-budget to measure past the Groq quota.")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay or synthesise load against the PDF QA API.")
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process app).")
+    parser.add_argument("--replay", help="JSONL request log to replay (see app/request_log.py).")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help="Synthetic endpoint weights, e.g. ask=0.9,ask_stream=0.05,upload=0.05.")
+    parser.add_argument("--requests", type=int, default=200,
+                        help="Synthetic request count (or cap on replayed requests).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Closed-loop workers.")
+    parser.add_argument("--rate", type=float, help="Open-loop Poisson arrival rate (req/s).")
+    parser.add_argument("--timing", choices=("none", "recorded"), default="none",
+                        help="'recorded' replays the log's own inter-arrival gaps.")
+    parser.add_argument("--speedup", type=float, default=1.0,
+                        help="Divide recorded gaps by this factor.")
+    parser.add_argument("--pdf-dir", help="Directory with the PDFs named in replayed /upload records.")
+    parser.add_argument("--seed-docs", type=int, default=3,
+                        help="Upload synthetic PDFs first until at least this many documents exist.")
+    parser.add_argument("--no-llm-budget", action="store_true",
+                        help="Lift the app's client-side LLM budgets (in-process target only).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Also write the JSON report here.")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    if not args.verbose:
+        # Per-request app warnings (limiter rejections, retries) would bury the report
+        logging.getLogger("app").setLevel(logging.ERROR)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+Concurrency stress test for the copy-on-write index — searches racing
+uploads and deletes must always see one consistent generation.
+
+Usage
+-----
+    python -m benchmarks.stress_snapshots                       # in-memory QAEngine
+    python -m benchmarks.stress_snapshots --seconds 30 --readers 8 --writers 2
+    python -m benchmarks.stress_snapshots --store /tmp/store    # SharedIndexEngine
+    python -m benchmarks.stress_snapshots --shards 4            # ShardedQAEngine
+
+What is checked
+---------------
+Every document is indexed with known vectors (random unit vectors from a
+per-document seed), so each search hit can be verified independently of
+the engine:
+
+• score == query · vector(doc_id, chunk_index)   (vectors and metadata agree;
+  searches are pinned to vector mode, whatever SEARCH_MODE says)
+• doc-scoped hits all belong to the requested document
+• hits are sorted by score and never exceed top_k
+• the generation a reader observes never goes backwards
+• no search raises
+
+Readers run global and doc-scoped searches throughout; writers add and
+delete documents, keeping the corpus between --min-docs and --max-docs.
+Search latency is reported for a quiet phase (no writers) and for the
+contended phase.  Exit status is 1 on any violation.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import logging
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+from app.engine import EMBEDDING_DIM, QAEngine
+
+from .synthetic import faq_chunks, faq_questions, random_unit_vectors
+
+SCORE_TOLERANCE = 1e-4
+
+
+class Corpus:
+    """Known vectors per document, reproducible from the document's seed."""
+
+    def __init__(self, chunks_per_doc: int):
+        self.chunks_per_doc = chunks_per_doc
+        self._seeds: dict[str, int] = {}
+        self._vectors: dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._next_seed = itertools.count(1)
+
+    def new_document(self, doc_id: str) -> np.ndarray:
+        seed = next(self._next_seed)
+        vecs = random_unit_vectors(self.chunks_per_doc, EMBEDDING_DIM, seed=seed)
+        with self._lock:
+            self._seeds[doc_id] = seed
+            self._vectors[seed] = vecs
+        return vecs
+
+    def vector(self, doc_id: str, chunk_index: int) -> np.ndarray | None:
+        with self._lock:
+            seed = self._seeds.get(doc_id)
+            return None if seed is None else self._vectors[seed][chunk_index]
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.failures: list[str] = []
+        self.latencies_ms: dict[str, list[float]] = {"quiet": [], "contended": []}
+        self.searches = 0
+        self.writes = {"index": 0, "delete": 0}
+
+    def fail(self, message: str) -> None:
+        with self._lock:
+            if len(self.failures) < 50:
+                self.failures.append(message)
+
+    def search(self, phase: str, ms: float) -> None:
+        with self._lock:
+            self.searches += 1
+            self.latencies_ms[phase].append(ms)
+
+    def write(self, kind: str) -> None:
+        with self._lock:
+            self.writes[kind] += 1
+
+
+def check_hits(hits, query_vec, corpus: Corpus, top_k: int, doc_id: str | None) -> str | None:
+    """Return a description of the first violation, or None."""
+    if len(hits) > top_k:
+        return f"{len(hits)} hits for top_k={top_k}"
+    scores = [score for _, score in hits]
+    if any(a < b - SCORE_TOLERANCE for a, b in zip(scores, scores[1:])):
+        return f"hits not sorted by score: {scores}"
+    for meta, score in hits:
+        if doc_id and meta.doc_id != doc_id:
+            return f"scoped search for {doc_id} returned a chunk of {meta.doc_id}"
+        vec = corpus.vector(meta.doc_id, meta.chunk_index)
+        if vec is None:
+            return f"hit from unknown document {meta.doc_id}"
+        expected = float(query_vec @ vec)
+        if abs(expected - score) > SCORE_TOLERANCE:
+            return (
+                f"{meta.doc_id}#{meta.chunk_index}: score {score:.5f} "
+                f"but its vector gives {expected:.5f}"
+            )
+    return None
+
+
+def reader(engine, corpus, queries, stats, phase, stop: threading.Event, top_k, seed):
+    rng = random.Random(seed)
+    last_generation = -1
+    while not stop.is_set():
+        text, qvec = rng.choice(queries)
+        docs = engine.list_documents()
+        doc_id = rng.choice(docs)["doc_id"] if docs and rng.random() < 0.5 else None
+        t0 = time.perf_counter()
+        try:
+            hits = engine.search(text, doc_id=doc_id, top_k=top_k)
+        except Exception as exc:     # noqa: BLE001 — any exception is a finding
+            stats.fail(f"search raised {type(exc).__name__}: {exc}")
+            continue
+        stats.search(phase, (time.perf_counter() - t0) * 1e3)
+        problem = check_hits(hits, qvec, corpus, top_k, doc_id)
+        if problem:
+            stats.fail(problem)
+        generation = engine.generation
+        if generation < last_generation:
+            stats.fail(f"generation went backwards: {last_generation} -> {generation}")
+        last_generation = generation
+
+
+def writer(engine, corpus, chunks, stats, stop: threading.Event, min_docs, max_docs, seed, wid):
+    rng = random.Random(seed)
+    for n in itertools.count():
+        if stop.is_set():
+            return
+        docs = engine.list_documents()
+        grow = len(docs) < min_docs or (len(docs) < max_docs and rng.random() < 0.5)
+        try:
+            if grow:
+                doc_id = f"w{wid}-{n}"
+                vecs = corpus.new_document(doc_id)
+                engine.index_document(doc_id, f"{doc_id}.pdf", chunks, embeddings=vecs)
+                stats.write("index")
+            else:
+                engine.delete_document(rng.choice(docs)["doc_id"])
+                stats.write("delete")
+        except ValueError:
+            pass        # another writer deleted the same document first
+        except Exception as exc:     # noqa: BLE001
+            stats.fail(f"writer raised {type(exc).__name__}: {exc}")
+
+
+def run_phase(threads: list[threading.Thread], stop: threading.Event, seconds: float) -> None:
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+
+def _pct(samples: list[float], q: float) -> float:
+    return float(np.percentile(samples, q)) if samples else float("nan")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Stress concurrent search vs. index/delete.")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Contended phase length.")
+    parser.add_argument("--quiet-seconds", type=float, default=2.0, help="Reader-only phase length.")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--chunks-per-doc", type=int, default=200)
+    parser.add_argument("--min-docs", type=int, default=5)
+    parser.add_argument("--max-docs", type=int, default=40)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--store", help="Stress a SharedIndexEngine on this (fresh) store directory.")
+    parser.add_argument("--shards", type=int, default=1, help="Stress a ShardedQAEngine with N shards.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.store:
+        from app.shared_index import SharedIndexEngine
+        engine = SharedIndexEngine(store_dir=args.store)
+        if engine.total_chunks():
+            parser.error(f"--store {args.store} is not empty")
+    elif args.shards > 1:
+        from app.sharded import ShardedQAEngine
+        engine = ShardedQAEngine(num_shards=args.shards, search_mode="vector", lexical_fast_path=False)
+    else:
+        engine = QAEngine(search_mode="vector", lexical_fast_path=False)
+
+    corpus = Corpus(args.chunks_per_doc)
+    chunks = faq_chunks(args.chunks_per_doc)
+    texts = faq_questions(64)
+    queries = list(zip(texts, engine._embed(texts)))
+    stats = Stats()
+
+    for i in range(args.min_docs):
+        engine.index_document(f"seed-{i}", f"seed-{i}.pdf", chunks,
+                              embeddings=corpus.new_document(f"seed-{i}"))
+
+    stop = threading.Event()
+    run_phase(
+        [threading.Thread(target=reader, args=(engine, corpus, queries, stats, "quiet",
+                                               stop, args.top_k, r))
+         for r in range(args.readers)],
+        stop, args.quiet_seconds,
+    )
+
+    stop = threading.Event()
+    run_phase(
+        [threading.Thread(target=reader, args=(engine, corpus, queries, stats, "contended",
+                                               stop, args.top_k, 100 + r))
+         for r in range(args.readers)]
+        + [threading.Thread(target=writer, args=(engine, corpus, chunks, stats, stop,
+                                                 args.min_docs, args.max_docs, 200 + w, w))
+           for w in range(args.writers)],
+        stop, args.seconds,
+    )
+
+    print(f"engine        {type(engine).__name__}")
+    print(f"searches      {stats.searches}")
+    print(f"writes        {stats.writes['index']} index, {stats.writes['delete']} delete "
+          f"(final generation {engine.generation}, {engine.total_chunks()} chunks)")
+    for phase, samples in stats.latencies_ms.items():
+        print(f"{phase:<13} search p50 {_pct(samples, 50):7.2f} ms  p95 {_pct(samples, 95):7.2f} ms  "
+              f"p99 {_pct(samples, 99):7.2f} ms  max {max(samples, default=float('nan')):7.2f} ms")
+
+    if stats.failures:
+        print(f"\n{len(stats.failures)} violation(s):")
+        for message in stats.failures:
+            print(f"  - {message}")
+        return 1
+    print("\nNo violations.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
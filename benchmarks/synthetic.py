@@ -0,0 +1,176 @@
+"""
+Synthetic FAQ corpus for benchmarks and load tests.
+
+Generates customer-support style question/answer text, writes it as real
+(text-extractable) PDFs with a tiny dependency-free PDF writer, and
+produces chunk corpora plus random unit vectors for index-scale runs where
+encoding a million chunks would dominate the measurement.
+
+Usage
+-----
+    python -m benchmarks.synthetic --out ./bench_pdfs --docs 10 --pages 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from pathlib import Path
+
+import numpy as np
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+FONT_SIZE = 10
+LEADING = 13
+LINES_PER_PAGE = 52
+CHARS_PER_LINE = 95
+
+_PRODUCTS = [
+    "contact lens", "hearing aid", "router", "thermostat", "e-reader",
+    "smart watch", "coffee machine", "vacuum robot", "printer", "soundbar",
+]
+_ACTIONS = [
+    "clean", "reset", "pair", "update", "charge", "store", "replace the filter of",
+    "register", "return", "troubleshoot",
+]
+_DETAILS = [
+    "Use only the accessories supplied in the box.",
+    "Never immerse the device in water or use abrasive cleaners.",
+    "If the indicator light keeps blinking, hold the power button for ten seconds.",
+    "Keep the receipt, as the warranty covers manufacturing defects for two years.",
+    "Firmware updates are installed automatically overnight when connected to Wi-Fi.",
+    "Contact support with your serial number if the problem persists.",
+    "Store it at room temperature away from direct sunlight.",
+    "Charging fully takes about ninety minutes with the original adapter.",
+]
+
+
+def faq_entry(rng: random.Random, n: int) -> tuple[str, str]:
+    """One (question, answer) pair; *n* makes the wording unique."""
+    product = rng.choice(_PRODUCTS)
+    action = rng.choice(_ACTIONS)
+    question = f"Q{n}. How do I {action} my {product} (model {rng.randint(100, 999)})?"
+    steps = rng.sample(_DETAILS, k=rng.randint(2, 4))
+    answer = (
+        f"To {action} the {product}, follow these steps. "
+        + " ".join(steps)
+        + f" See reference code {rng.randint(1000, 9999)} for details."
+    )
+    return question, answer
+
+
+def faq_pages(num_pages: int, seed: int = 0) -> list[tuple[int, str]]:
+    """(page_number, text) pairs — the shape extract_pages_from_pdf returns."""
+    rng = random.Random(seed)
+    pages: list[tuple[int, str]] = []
+    n = 0
+    for page_no in range(1, num_pages + 1):
+        lines = [f"Frequently Asked Questions - Section {page_no}", ""]
+        while len(lines) < LINES_PER_PAGE - 4:
+            n += 1
+            question, answer = faq_entry(rng, n)
+            lines.append(question)
+            lines.extend(_wrap("A: " + answer))
+            lines.append("")
+        pages.append((page_no, "\n".join(lines[:LINES_PER_PAGE])))
+    return pages
+
+
+def _wrap(text: str, width: int = CHARS_PER_LINE) -> list[str]:
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str | Path, pages: list[tuple[int, str]]) -> Path:
+    """Write *pages* as a minimal PDF 1.4 file with one Helvetica text block per page."""
+    objects: list[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = font_id + 2 * len(pages) + 1      # allocated after every page
+    page_ids = []
+    for _, text in pages:
+        ops = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL 50 {PAGE_HEIGHT - 50} Td"]
+        ops += [f"({_pdf_escape(line)}) '" for line in text.split("\n")]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", errors="replace")
+        content_id = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>"
+            % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, content_id, font_id)
+        ))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    assert add(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))) == pages_id
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref,
+    )
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(out))
+    return path
+
+
+def faq_chunks(n: int, seed: int = 0) -> list[str]:
+    """*n* chunk-sized FAQ texts (one Q/A pair each), cheap enough for 1M."""
+    rng = random.Random(seed)
+    return [" ".join(faq_entry(rng, i)) for i in range(n)]
+
+
+def faq_questions(n: int, seed: int = 1) -> list[str]:
+    """Query strings in the style agents type."""
+    rng = random.Random(seed)
+    return [faq_entry(rng, i)[0].split(". ", 1)[1] for i in range(n)]
+
+
+def random_unit_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """L2-normalised float32 Gaussian vectors (n × dim)."""
+    rng = np.random.default_rng(seed)
+    vecs = rng.standard_normal((n, dim), dtype=np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Write synthetic FAQ PDFs.")
+    parser.add_argument("--out", required=True, help="Output directory.")
+    parser.add_argument("--docs", type=int, default=5, help="Number of PDFs.")
+    parser.add_argument("--pages", type=int, default=20, help="Pages per PDF.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for d in range(args.docs):
+        path = write_pdf(
+            Path(args.out) / f"faq_{d:04d}.pdf", faq_pages(args.pages, seed=args.seed + d)
+        )
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
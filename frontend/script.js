@@ -240,16 +240,26 @@ async function askQuestion() {
   if (docId) body.doc_id = docId;
 
   try {
-    const res  = await fetch(`${API}/ask`, {
+    const res = await fetch(`${API}/ask/stream`, {
       method:  'POST',
       headers: { 'Content-Type': 'application/json' },
       body:    JSON.stringify(body),
     });
-    const data = await res.json();
 
-    if (!res.ok) throw new Error(data.detail || 'Request failed.');
+    if (!res.ok) {
+      const data = await res.json();
+      throw new Error(data.detail || 'Request failed.');
+    }
 
-    renderAnswer(data);
+    await readEventStream(res, (event, data) => {
+      if (event === 'meta') {
+        renderAnswer({ answer: '', confidence: data.confidence, sources: data.sources });
+      } else if (event === 'token') {
+        answerBody.textContent += data.text;
+      } else if (event === 'error') {
+        throw new Error(data.message);
+      }
+    });
 
   } catch (err) {
     showError('Could not get an answer: ' + err.message);
@@ -258,6 +268,34 @@ async function askQuestion() {
   }
 }
 
+// Parse a text/event-stream response body, calling onEvent(name, data)
+// for every complete "event: ...\ndata: ...\n\n" frame as it arrives.
+async function readEventStream(res, onEvent) {
+  const reader  = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let sep;
+    while ((sep = buffer.indexOf('\n\n')) !== -1) {
+      const frame = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+
+      let event = 'message';
+      let data  = '';
+      frame.split('\n').forEach(line => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      });
+      onEvent(event, data ? JSON.parse(data) : {});
+    }
+  }
+}
+
 function renderAnswer(data) {
   answerSection.hidden = false;
 